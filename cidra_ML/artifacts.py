@@ -0,0 +1,48 @@
+"""
+Content-addressed store for rendered artifacts (plots).
+
+Files are named after the SHA-256 of their content, so identical plots are
+stored once and a stored file never changes. Models only keep the digest.
+"""
+
+import hashlib
+import os
+
+from django.conf import settings
+
+
+def artifact_path(digest):
+    """Returns the absolute path of the artifact with the given digest."""
+    return os.path.join(settings.ARTIFACTS_DIR, digest[:2], f"{digest}.png")
+
+
+def is_artifact_digest(value):
+    """Checks if a value is an artifact reference (a SHA-256 hex digest)."""
+    if not isinstance(value, str) or len(value) != 64:
+        return False
+    try:
+        bytes.fromhex(value)
+    except ValueError:
+        return False
+    return True
+
+
+def save_png_artifact(png_bytes):
+    """
+    Stores PNG bytes in the artifact store.
+    Returns the digest to keep on the model, or None if there is no content.
+    """
+    if not png_bytes:
+        return None
+
+    digest = hashlib.sha256(png_bytes).hexdigest()
+    path = artifact_path(digest)
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a temporary file first so readers never see partial files
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(png_bytes)
+        os.replace(tmp_path, path)
+    return digest
+
@@ -0,0 +1,54 @@
+"""
+Helpers of the data migrations.
+
+Migrations must keep doing what they did when they were written, whatever
+the runtime code becomes, so they only import from this module. Its
+functions are never changed, a migration needing a different behavior gets a
+new function.
+"""
+
+import base64
+import binascii
+import hashlib
+import os
+
+from django.conf import settings
+
+# Base64 encoded PNG files always start with the encoded PNG signature
+PNG_BASE64_PREFIX = "iVBORw0KGgo"
+
+
+def save_png_artifact(png_bytes):
+    """
+    Stores PNG bytes in the artifact store (see cidra_ML/artifacts.py, as of
+    the migrations moving the plots there). Returns their digest.
+    """
+    if not png_bytes:
+        return None
+
+    digest = hashlib.sha256(png_bytes).hexdigest()
+    path = os.path.join(settings.ARTIFACTS_DIR, digest[:2], f"{digest}.png")
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(png_bytes)
+        os.replace(tmp_path, path)
+    return digest
+
+
+def extract_png_blobs(value):
+    """
+    Replaces every base64 encoded PNG found in a JSON-like value by an artifact
+    digest, storing the images on the way.
+    """
+    if isinstance(value, dict):
+        return {key: extract_png_blobs(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [extract_png_blobs(item) for item in value]
+    if isinstance(value, str) and value.startswith(PNG_BASE64_PREFIX):
+        try:
+            return save_png_artifact(base64.b64decode(value, validate=True))
+        except binascii.Error:
+            return value
+    return value
@@ -132,6 +132,83 @@ MEDIA_ROOT = BASE_DIR / "media"
 # Custom directory for datasets and models
 DATASETS_DIR = MEDIA_ROOT / "datasets"
 MODELS_DIR = MEDIA_ROOT / "MLmodels"
+ARTIFACTS_DIR = MEDIA_ROOT / "artifacts"
+
+# Dataset ingestion: rows parsed per chunk and chunks used to infer column types
+DATASET_CHUNK_ROWS = 100_000
+DATASET_SCHEMA_INFERENCE_CHUNKS = 2
+
+# Rows per Parquet row group, the row browser reads whole row groups
+DATASET_ROW_GROUP_ROWS = 10_000
+DATASET_ROWS_PAGE_MAX = 1000
+
+# Text columns loaded as category: at most this many distinct values, and at
+# most this fraction of the non-empty values
+DATASET_CATEGORY_MAX_UNIQUE = 1000
+DATASET_CATEGORY_MAX_RATIO = 0.5
+
+# Memory-mapped column cache, written on the first full load of a dataset and
+# mapped by later loads (see manage_datasets/column_cache.py)
+DATASET_COLUMN_CACHE = os.getenv("DATASET_COLUMN_CACHE", "false").lower() == "true"
+
+# Parsed chunks each source dataset may hold ahead while merging
+DATASET_MERGE_PREFETCH_CHUNKS = 2
+
+# Processes used to render dataset plots in parallel (1 renders serially)
+PLOT_RENDER_WORKERS = int(os.getenv("PLOT_RENDER_WORKERS", os.cpu_count() or 1))
+
+# Row budget for density plots and quantiles (None uses every row)
+PROFILE_SAMPLE_ROWS = 200_000
+PROFILE_SAMPLE_SEED = 42
+
+# Column statistics: processes sharing the columns, histogram bins (before
+# trimming the empty ones), categories kept per column, distinct values
+# counted exactly and points of the density grid
+PROFILE_STATS_WORKERS = int(os.getenv("PROFILE_STATS_WORKERS", os.cpu_count() or 1))
+PROFILE_HISTOGRAM_BINS = 128
+PROFILE_TOP_K = 20
+PROFILE_DISTINCT_CAP = 10_000
+PROFILE_KDE_POINTS = 100
+
+# Correlation plot: annotated heatmap up to ANNOTATE columns, clustered heatmap
+# up to MAX columns, above only the top correlated pairs are plotted
+PROFILE_TOP_CORRELATIONS = 20
+PROFILE_HEATMAP_ANNOTATE_COLUMNS = 30
+PROFILE_HEATMAP_MAX_COLUMNS = 200
+
+# Loaded predictors kept by each process (see manage_MLmodels/predictors.py):
+# at most ENTRIES predictors (0 disables the cache) and MAX_MB of model files,
+# PERSIST also keeps their best model in memory
+PREDICTOR_CACHE_ENTRIES = int(os.getenv("PREDICTOR_CACHE_ENTRIES", 4))
+PREDICTOR_CACHE_MAX_MB = int(os.getenv("PREDICTOR_CACHE_MAX_MB", 4096))
+PREDICTOR_CACHE_PERSIST = (
+    os.getenv("PREDICTOR_CACHE_PERSIST", "false").lower() == "true"
+)
+
+# Online predictions (see predicting/online.py): rows per request, requests
+# kept per model for the latency percentiles, and whether each process loads
+# the predictors of the latest models on startup
+ONLINE_PREDICTION_MAX_ROWS = 100
+ONLINE_LATENCY_WINDOW = 1000
+ONLINE_PREDICTION_PRELOAD = (
+    os.getenv("ONLINE_PREDICTION_PRELOAD", "false").lower() == "true"
+)
+
+# Micro-batching of concurrent online predictions of a model (see
+# predicting/batching.py): how long the first request waits for others and
+# the rows that close a batch early. A window of 0 disables batching
+ONLINE_BATCH_WINDOW_MS = float(os.getenv("ONLINE_BATCH_WINDOW_MS", 10))
+ONLINE_BATCH_MAX_ROWS = int(os.getenv("ONLINE_BATCH_MAX_ROWS", 64))
+# Seconds a request waits for the batch it joined before giving up
+ONLINE_BATCH_TIMEOUT = float(os.getenv("ONLINE_BATCH_TIMEOUT", 30))
+
+# Batch size of the inference latency budget of trainings when none is given,
+# and predicts timed to measure the latency of models trained with a budget
+INFERENCE_BATCH_SIZE = 10_000
+INFERENCE_LATENCY_REPEATS = 3
+
+# Minimum seconds between two writes of the progress of a training
+TRAINING_PROGRESS_INTERVAL = 10
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
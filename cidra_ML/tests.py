@@ -0,0 +1,91 @@
+import gzip
+import os
+import tempfile
+
+from django.test import RequestFactory, SimpleTestCase
+
+from .downloads import parse_range_header, stream_file_response
+
+CONTENT = bytes(range(256)) * 40
+
+
+class ParseRangeHeaderTests(SimpleTestCase):
+    def test_open_range(self):
+        self.assertEqual(parse_range_header("bytes=0-", 100), (0, 99))
+        self.assertEqual(parse_range_header("bytes=40-", 100), (40, 99))
+
+    def test_suffix_range(self):
+        self.assertEqual(parse_range_header("bytes=-10", 100), (90, 99))
+        self.assertEqual(parse_range_header("bytes=-500", 100), (0, 99))
+
+    def test_end_past_the_file(self):
+        self.assertEqual(parse_range_header("bytes=10-500", 100), (10, 99))
+
+    def test_unsatisfiable_ranges(self):
+        for header, size in [
+            ("bytes=100-", 100),
+            ("bytes=50-10", 100),
+            ("bytes=-0", 100),
+            ("bytes=-10", 0),
+            ("bytes=0-", 0),
+        ]:
+            with self.subTest(header=header, size=size):
+                with self.assertRaises(ValueError):
+                    parse_range_header(header, size)
+
+    def test_ignored_headers(self):
+        for header in [None, "", "bytes=-", "bytes=0-1,5-6", "items=0-1"]:
+            with self.subTest(header=header):
+                self.assertIsNone(parse_range_header(header, 100))
+
+
+class StreamFileResponseTests(SimpleTestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+        with tempfile.NamedTemporaryFile(delete=False) as f:
+            f.write(CONTENT)
+        self.path = f.name
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def download(self, path="/", **headers):
+        request = self.factory.get(path, headers=headers)
+        return stream_file_response(request, self.path, "data.csv", "text/csv")
+
+    def test_range(self):
+        response = self.download(Range="bytes=-100")
+
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response["Content-Length"], "100")
+        size = len(CONTENT)
+        self.assertEqual(
+            response["Content-Range"], f"bytes {size - 100}-{size - 1}/{size}"
+        )
+        self.assertEqual(b"".join(response.streaming_content), CONTENT[-100:])
+
+    def test_out_of_bounds_range(self):
+        response = self.download(Range=f"bytes={len(CONTENT)}-")
+
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response["Content-Range"], f"bytes */{len(CONTENT)}")
+
+    def test_if_range_match(self):
+        etag = self.download()["ETag"]
+        response = self.download(Range="bytes=0-9", If_Range=etag)
+
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b"".join(response.streaming_content), CONTENT[:10])
+
+    def test_if_range_mismatch_sends_the_full_file(self):
+        response = self.download(Range="bytes=0-9", If_Range='"0-0"')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b"".join(response.streaming_content), CONTENT)
+
+    def test_gzip(self):
+        response = self.download("/?gzip=true", Range="bytes=0-9")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header("Content-Length"))
+        self.assertEqual(gzip.decompress(b"".join(response.streaming_content)), CONTENT)
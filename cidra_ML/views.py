@@ -1,5 +1,12 @@
+import os
+
+from django.contrib.auth.decorators import login_required
 from django.contrib.auth.forms import AuthenticationForm, UserCreationForm
+from django.http import FileResponse, Http404
 from django.shortcuts import render
+from django.views.decorators.http import etag, require_GET
+
+from .artifacts import artifact_path, is_artifact_digest
 
 
 def home(request):
@@ -13,3 +20,22 @@ def home(request):
 
 def about(request):
     return render(request, "about.html")
+
+
+@login_required
+@require_GET
+@etag(lambda request, digest: digest)
+def artifact(request, digest):
+    """
+    Serves a stored artifact (plot image).
+    Artifacts are content-addressed and never change, so browsers can cache them.
+    """
+    if not is_artifact_digest(digest):
+        raise Http404("Invalid artifact reference.")
+    path = artifact_path(digest)
+    if not os.path.exists(path):
+        raise Http404("Artifact not found.")
+
+    response = FileResponse(open(path, "rb"), content_type="image/png")
+    response["Cache-Control"] = "private, max-age=31536000, immutable"
+    return response
@@ -0,0 +1,129 @@
+"""
+Deployment optimization of trained predictors.
+
+fit() saves every model it trained: each fold of the bagged models and all
+the models that are not part of the best one. A deployed predictor only needs
+the best model, so it is optimized:
+
+    - the best model (and the models it stacks on) is refit on all the data
+      as a single model per base model instead of one per fold (refit_full)
+    - every other model is deleted from disk
+    - the files only needed for training are removed (save_space)
+
+The work is done on a copy of the model directory, swapped in only once the
+optimized predictor is saved: a failure leaves the original predictor intact.
+The swap (two renames) is not atomic, a predictor loaded by another process
+in between fails to load, the model is OPTIMIZING meanwhile. It invalidates
+the cached copies of the predictor (see predictors.py).
+
+The per-row inference latency of trained predictors is measured here too.
+"""
+
+import logging
+import os
+import shutil
+import statistics
+import time
+
+from autogluon.tabular import TabularPredictor
+
+from .predictors import evict_predictor, model_disk_size
+
+logger = logging.getLogger(__name__)
+
+
+def _timed_load(path):
+    """Loads the predictor saved at path, returns (predictor, seconds)."""
+    start = time.perf_counter()
+    predictor = TabularPredictor.load(path=path)
+    return predictor, time.perf_counter() - start
+
+
+def _swap_directory(path, new_path):
+    """
+    Replaces the directory at path by the one at new_path. If the new one
+    can't be moved in, the original is put back.
+    """
+    replaced_path = f"{path}.replaced"
+    shutil.rmtree(replaced_path, ignore_errors=True)
+    os.rename(path, replaced_path)
+    try:
+        os.rename(new_path, path)
+    except OSError:
+        os.rename(replaced_path, path)
+        shutil.rmtree(new_path, ignore_errors=True)
+        raise
+    shutil.rmtree(replaced_path, ignore_errors=True)
+
+
+def optimize_for_deployment(path):
+    """
+    Keeps only the refit best model of the predictor saved at path.
+
+    Returns:
+        dict: The disk size (bytes) and load time (seconds) before and after,
+        and the optimized predictor.
+    """
+    size_before = model_disk_size(path)
+    _, load_time_before = _timed_load(path)
+
+    work_path = f"{path}.optimizing"
+    shutil.rmtree(work_path, ignore_errors=True)
+    shutil.copytree(path, work_path)
+    try:
+        predictor = TabularPredictor.load(path=work_path)
+        logger.info(f"Refitting the best model of {path} on all data...")
+        predictor.refit_full(model="best", set_best_to_refit_full=True)
+        predictor.delete_models(models_to_keep="best", dry_run=False)
+        predictor.save_space()
+        predictor.save()
+    except Exception:
+        shutil.rmtree(work_path, ignore_errors=True)
+        raise
+
+    _swap_directory(path, work_path)
+    evict_predictor(path)
+
+    predictor, load_time_after = _timed_load(path)
+    size_after = model_disk_size(path)
+    logger.info(
+        f"Optimized {path}: {size_before} -> {size_after} bytes, "
+        f"load time {load_time_before:.2f}s -> {load_time_after:.2f}s"
+    )
+    return {
+        "predictor": predictor,
+        "disk_size_before": size_before,
+        "disk_size_after": size_after,
+        "load_time_before": load_time_before,
+        "load_time_after": load_time_after,
+    }
+
+
+def record_deployment(model_instance, optimized):
+    """Stores the result of optimize_for_deployment on an MLModel (unsaved)."""
+    model_instance.deploy_optimized = True
+    for field in (
+        "disk_size_before",
+        "disk_size_after",
+        "load_time_before",
+        "load_time_after",
+    ):
+        setattr(model_instance, field, optimized[field])
+
+
+def measure_inference_latency(predictor, data, batch_size, repeats):
+    """
+    Measures the per-row latency of the predictor on batches of batch_size
+    rows drawn from data (the features), after a warm-up predict.
+
+    Returns:
+        float: The median over repeats of the latency per row, in ms.
+    """
+    batch = data.sample(batch_size, replace=len(data) < batch_size, random_state=0)
+    predictor.predict(batch)
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        predictor.predict(batch)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) / batch_size * 1000
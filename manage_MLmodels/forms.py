@@ -90,6 +90,26 @@ class TrainMLModelForm(forms.Form):
         initial="medium_quality",
         widget=forms.Select(attrs={"class": "form-select"}),
     )
+    inference_budget_ms = forms.FloatField(
+        label="Inference Latency Budget (ms per row)",
+        required=False,
+        min_value=0.001,
+        widget=forms.NumberInput(attrs={"class": "form-control", "step": "any"}),
+        help_text="Only keep models predicting a row within this time. Leave empty for no limit.",
+    )
+    inference_batch_size = forms.IntegerField(
+        label="Inference Batch Size",
+        required=False,
+        min_value=1,
+        widget=forms.NumberInput(attrs={"class": "form-control"}),
+        help_text="Rows per predict call the budget applies to: 1 for online predictions, 10000 if empty.",
+    )
+    deploy_optimized = forms.BooleanField(
+        label="Optimize for Deployment",
+        required=False,
+        widget=forms.CheckboxInput(attrs={"class": "form-check-input"}),
+        help_text="Keep only the best model, refit on all data: faster to load and predict, smaller on disk.",
+    )
 
     def __init__(self, *args, **kwargs):
         user = kwargs.pop("user", None)
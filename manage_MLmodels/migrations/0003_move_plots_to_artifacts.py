@@ -0,0 +1,15 @@
+# Generated by Django 5.2.18 on 2026-10-17 20:56
+
+from django.db import migrations
+
+# MLModel.evaluation_plots holds the feature importance data, not plots:
+# there is nothing to move to the artifact store
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('manage_MLmodels', '0002_mlmodel_training_duration'),
+    ]
+
+    operations = []
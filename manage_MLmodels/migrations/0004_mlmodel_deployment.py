@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('manage_MLmodels', '0003_move_plots_to_artifacts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mlmodel',
+            name='deploy_optimized',
+            field=models.BooleanField(default=False, help_text='Only the models used by the best model are kept, refit on all data.'),
+        ),
+        migrations.AddField(
+            model_name='mlmodel',
+            name='disk_size_after',
+            field=models.BigIntegerField(blank=True, help_text='Size of the model files after the deployment optimization, in bytes.', null=True),
+        ),
+        migrations.AddField(
+            model_name='mlmodel',
+            name='disk_size_before',
+            field=models.BigIntegerField(blank=True, help_text='Size of the model files before the deployment optimization, in bytes.', null=True),
+        ),
+        migrations.AddField(
+            model_name='mlmodel',
+            name='load_time_after',
+            field=models.FloatField(blank=True, help_text='Seconds to load the predictor after the deployment optimization.', null=True),
+        ),
+        migrations.AddField(
+            model_name='mlmodel',
+            name='load_time_before',
+            field=models.FloatField(blank=True, help_text='Seconds to load the predictor before the deployment optimization.', null=True),
+        ),
+        migrations.AlterField(
+            model_name='mlmodel',
+            name='status',
+            field=models.CharField(choices=[('TRAINING', 'Training'), ('OPTIMIZING', 'Optimizing'), ('COMPLETED', 'Completed'), ('FAILED', 'Failed')], default='COMPLETED', help_text='The current status of the model.', max_length=10),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('manage_MLmodels', '0004_mlmodel_deployment'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mlmodel',
+            name='inference_batch_size',
+            field=models.IntegerField(blank=True, help_text='Rows per predict call the inference latency applies to.', null=True),
+        ),
+        migrations.AddField(
+            model_name='mlmodel',
+            name='inference_budget_ms',
+            field=models.FloatField(blank=True, help_text='Per-row inference latency the training was constrained to, in ms.', null=True),
+        ),
+        migrations.AddField(
+            model_name='mlmodel',
+            name='inference_latency_ms',
+            field=models.FloatField(blank=True, help_text='Per-row inference latency measured after training, in ms.', null=True),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:38
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('manage_MLmodels', '0005_mlmodel_inference_latency'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrainingProgress',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('started_at', models.DateTimeField(help_text='Date and time when the fit started')),
+                ('finished_at', models.DateTimeField(blank=True, help_text='Date and time when the fit ended', null=True)),
+                ('time_limit', models.IntegerField(blank=True, help_text='Time limit of the fit in seconds, if any', null=True)),
+                ('models_trained', models.IntegerField(default=0, help_text='Number of models trained so far')),
+                ('best_model', models.CharField(blank=True, help_text='Model with the best validation score so far', max_length=200, null=True)),
+                ('best_score', models.FloatField(blank=True, help_text='Best validation score so far', null=True)),
+                ('leaderboard', models.JSONField(blank=True, default=list, help_text='Models trained so far with their validation score and fit time')),
+                ('updated_at', models.DateTimeField(auto_now=True, help_text='Date and time of the last progress update')),
+                ('model', models.OneToOneField(help_text='Model being trained', on_delete=django.db.models.deletion.CASCADE, related_name='training_progress', to='manage_MLmodels.mlmodel')),
+            ],
+        ),
+    ]
@@ -2,9 +2,29 @@ from django.contrib.auth.models import User
 from django.db import models
 
 
+class MLModelQuerySet(models.QuerySet):
+    def with_evaluation(self):
+        """Also loads the evaluation results, which are deferred by default."""
+        return self.defer(None)
+
+
+class MLModelManager(models.Manager.from_queryset(MLModelQuerySet)):
+    """
+    Defers the evaluation results (the full leaderboard of the training),
+    listings and dropdowns only load the metadata. Use with_evaluation() to
+    load them.
+    """
+
+    def get_queryset(self):
+        return super().get_queryset().defer(*self.model.EVALUATION_BLOBS)
+
+
 class MLModel(models.Model):
     """Model to store machine learning models uploaded by users."""
 
+    # Large evaluation fields, only loaded by the views displaying them
+    EVALUATION_BLOBS = ["evaluation_metrics", "evaluation_plots"]
+
     # Attributes that can be filled by user on form
     file = models.FileField(
         upload_to="MLmodels/",
@@ -34,6 +54,7 @@ class MLModel(models.Model):
     # Attributes filled automatically
     STATUS_CHOICES = [
         ("TRAINING", "Training"),
+        ("OPTIMIZING", "Optimizing"),
         ("COMPLETED", "Completed"),
         ("FAILED", "Failed"),
     ]
@@ -59,6 +80,49 @@ class MLModel(models.Model):
         help_text="Time taken to train the model.",
     )
 
+    # Inference latency budget of the training, and the latency achieved
+    inference_budget_ms = models.FloatField(
+        blank=True,
+        null=True,
+        help_text="Per-row inference latency the training was constrained to, in ms.",
+    )
+    inference_batch_size = models.IntegerField(
+        blank=True,
+        null=True,
+        help_text="Rows per predict call the inference latency applies to.",
+    )
+    inference_latency_ms = models.FloatField(
+        blank=True,
+        null=True,
+        help_text="Per-row inference latency measured after training, in ms.",
+    )
+
+    # Attributes filled by the deployment optimization (see deployment.py)
+    deploy_optimized = models.BooleanField(
+        default=False,
+        help_text="Only the models used by the best model are kept, refit on all data.",
+    )
+    disk_size_before = models.BigIntegerField(
+        blank=True,
+        null=True,
+        help_text="Size of the model files before the deployment optimization, in bytes.",
+    )
+    disk_size_after = models.BigIntegerField(
+        blank=True,
+        null=True,
+        help_text="Size of the model files after the deployment optimization, in bytes.",
+    )
+    load_time_before = models.FloatField(
+        blank=True,
+        null=True,
+        help_text="Seconds to load the predictor before the deployment optimization.",
+    )
+    load_time_after = models.FloatField(
+        blank=True,
+        null=True,
+        help_text="Seconds to load the predictor after the deployment optimization.",
+    )
+
     # Attributes filled after model evaluation
     is_evaluated = models.BooleanField(
         default=False, help_text="Indicates if the model has been evaluated."
@@ -79,9 +143,16 @@ class MLModel(models.Model):
         help_text="Cached plots from model evaluation or prediction simulations.",
     )
 
+    objects = MLModelManager()
+
     def __str__(self):
         return self.name
 
+    @classmethod
+    def deferred_through(cls, relation):
+        """Returns the evaluation fields to defer when joining a model relation."""
+        return [f"{relation}__{field}" for field in cls.EVALUATION_BLOBS]
+
     @property
     def formatted_training_duration(self):
         """
@@ -97,3 +168,47 @@ class MLModel(models.Model):
         seconds = total_seconds % 60
 
         return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
+
+
+class TrainingProgress(models.Model):
+    """
+    Model for the progress of a running training, written by the training task
+    every few seconds (see manage_MLmodels/progress.py)
+    """
+
+    model = models.OneToOneField(
+        MLModel,
+        on_delete=models.CASCADE,
+        related_name="training_progress",
+        help_text="Model being trained",
+    )
+    started_at = models.DateTimeField(help_text="Date and time when the fit started")
+    finished_at = models.DateTimeField(
+        blank=True, null=True, help_text="Date and time when the fit ended"
+    )
+    time_limit = models.IntegerField(
+        blank=True, null=True, help_text="Time limit of the fit in seconds, if any"
+    )
+    models_trained = models.IntegerField(
+        default=0, help_text="Number of models trained so far"
+    )
+    best_model = models.CharField(
+        max_length=200,
+        blank=True,
+        null=True,
+        help_text="Model with the best validation score so far",
+    )
+    best_score = models.FloatField(
+        blank=True, null=True, help_text="Best validation score so far"
+    )
+    leaderboard = models.JSONField(
+        default=list,
+        blank=True,
+        help_text="Models trained so far with their validation score and fit time",
+    )
+    updated_at = models.DateTimeField(
+        auto_now=True, help_text="Date and time of the last progress update"
+    )
+
+    def __str__(self):
+        return f"Training progress of {self.model.name}"
@@ -0,0 +1,153 @@
+"""
+Per-process cache of loaded AutoGluon predictors.
+
+Loading a predictor (and the models of a stacked ensemble) from disk takes
+seconds, each worker process keeps the last used ones loaded:
+
+    - entries are keyed by model path and the time the predictor was saved,
+      a model saved again under the same path is loaded again
+    - at most PREDICTOR_CACHE_ENTRIES predictors and PREDICTOR_CACHE_MAX_MB of
+      model files are kept, the least recently used are evicted first
+    - with PREDICTOR_CACHE_PERSIST the best model of each cached predictor is
+      also kept in memory (TabularPredictor.persist), instead of being read
+      from disk on every predict
+
+Concurrent misses on the same model load it once: the first thread loads it
+and the others wait for its result.
+
+Deleting a model evicts it from the deleting process, the other processes
+drop it at their next lookup since its directory is gone.
+"""
+
+import logging
+import os
+import threading
+from collections import OrderedDict
+
+from autogluon.tabular import TabularPredictor
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# File written by TabularPredictor.save, its mtime is the model version
+PREDICTOR_FILE = "predictor.pkl"
+
+_cache = OrderedDict()  # path -> (version, predictor, size in bytes)
+_loading = {}  # (path, version) -> _Loading of the thread loading it
+_lock = threading.Lock()
+
+
+class _Loading:
+    """A predictor being loaded, waited for by the other threads needing it."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.predictor = None
+        self.error = None
+
+
+def _model_version(path):
+    """Returns the modification time of the saved predictor at path."""
+    predictor_file = os.path.join(path, PREDICTOR_FILE)
+    if os.path.exists(predictor_file):
+        return os.stat(predictor_file).st_mtime_ns
+    return os.stat(path).st_mtime_ns
+
+
+def model_disk_size(path):
+    """Returns the size in bytes of the model files, an estimate of its loaded size."""
+    size = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            size += os.path.getsize(os.path.join(root, name))
+    return size
+
+
+def _release(predictor):
+    if settings.PREDICTOR_CACHE_PERSIST:
+        predictor.unpersist()
+
+
+def _evict_over_budget():
+    """Evicts the least recently used entries until the cache fits its budget."""
+    max_bytes = settings.PREDICTOR_CACHE_MAX_MB * 1024 * 1024
+    while _cache and (
+        len(_cache) > settings.PREDICTOR_CACHE_ENTRIES
+        or sum(size for _, _, size in _cache.values()) > max_bytes
+    ):
+        path, (_, predictor, _) = _cache.popitem(last=False)
+        _release(predictor)
+        logger.info(f"Evicted predictor {path} from the cache.")
+
+
+def _drop_deleted():
+    """Drops the entries of models deleted by other processes."""
+    for path in [path for path in _cache if not os.path.exists(path)]:
+        _release(_cache.pop(path)[1])
+
+
+def _load_predictor(path, version):
+    """Loads the predictor saved at path, and caches it when it fits."""
+    logger.info(f"Loading predictor from: {path}")
+    predictor = TabularPredictor.load(path=path)
+    if settings.PREDICTOR_CACHE_ENTRIES <= 0:
+        return predictor
+
+    size = model_disk_size(path)
+    if size > settings.PREDICTOR_CACHE_MAX_MB * 1024 * 1024:
+        logger.info(f"Predictor {path} exceeds the cache budget, not cached.")
+        return predictor
+    if settings.PREDICTOR_CACHE_PERSIST:
+        predictor.persist(models="best")
+
+    with _lock:
+        previous = _cache.pop(path, None)
+        if previous is not None:
+            _release(previous[1])
+        _cache[path] = (version, predictor, size)
+        _evict_over_budget()
+    return predictor
+
+
+def get_predictor(path):
+    """
+    Returns the TabularPredictor saved at path, from the cache of this
+    process or loaded from disk (and cached) on a miss. A thread missing a
+    predictor another thread is loading waits for it.
+    """
+    version = _model_version(path)
+    with _lock:
+        _drop_deleted()
+        entry = _cache.get(path)
+        if entry is not None and entry[0] == version:
+            _cache.move_to_end(path)
+            return entry[1]
+        loading = _loading.get((path, version))
+        leader = loading is None
+        if leader:
+            loading = _loading[(path, version)] = _Loading()
+
+    if not leader:
+        loading.done.wait()
+        if loading.predictor is None:
+            raise loading.error or RuntimeError(f"Loading {path} was interrupted.")
+        return loading.predictor
+
+    try:
+        loading.predictor = _load_predictor(path, version)
+    except Exception as e:
+        loading.error = e
+        raise
+    finally:
+        with _lock:
+            del _loading[(path, version)]
+        loading.done.set()
+    return loading.predictor
+
+
+def evict_predictor(path):
+    """Removes the predictor saved at path from the cache of this process."""
+    with _lock:
+        entry = _cache.pop(path, None)
+        if entry is not None:
+            _release(entry[1])
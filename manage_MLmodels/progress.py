@@ -0,0 +1,109 @@
+"""
+Live progress of trainings.
+
+A callback passed to fit() is called by AutoGluon after every trained model.
+It keeps the models trained so far, with their validation score and fit time,
+and writes them to the TrainingProgress of the model at most every
+TRAINING_PROGRESS_INTERVAL seconds, so long fits cost a few updates a minute.
+The elapsed time is not written, it is computed from the start when read.
+"""
+
+import logging
+import math
+import time
+
+from autogluon.core.callbacks import AbstractCallback
+from django.conf import settings
+from django.utils import timezone
+
+from .models import TrainingProgress
+
+logger = logging.getLogger(__name__)
+
+
+def start_training_progress(model_instance, time_limit):
+    """Creates (or resets) the progress of a training starting now."""
+    progress, _ = TrainingProgress.objects.update_or_create(
+        model=model_instance,
+        defaults={
+            "started_at": timezone.now(),
+            "finished_at": None,
+            "time_limit": time_limit,
+            "models_trained": 0,
+            "best_model": None,
+            "best_score": None,
+            "leaderboard": [],
+        },
+    )
+    return progress
+
+
+def training_progress_by_model(models):
+    """Returns the TrainingProgress of the models being trained, by model id."""
+    training = [model.id for model in models if model.status == "TRAINING"]
+    if not training:
+        return {}
+    return {
+        progress.model_id: progress
+        for progress in TrainingProgress.objects.filter(model_id__in=training)
+    }
+
+
+def _number(value):
+    """Returns value as a JSON float, None if missing or NaN."""
+    if value is None or math.isnan(value):
+        return None
+    return float(value)
+
+
+class TrainingProgressCallback(AbstractCallback):
+    """Reports the models trained by fit() to a TrainingProgress."""
+
+    def __init__(self, progress_id):
+        super().__init__()
+        self.progress_id = progress_id
+        self.leaderboard = []
+        self.last_write = 0
+
+    def _before_model_fit(self, trainer, model, *args, **kwargs):
+        # Neither stop the fit nor skip the model
+        return False, False
+
+    def _after_model_fit(self, trainer, model_names, *args, **kwargs):
+        scores = trainer.get_models_attribute_dict("val_score")
+        fit_times = trainer.get_models_attribute_dict("fit_time")
+        self.leaderboard = [
+            {
+                "model": name,
+                "score_val": _number(score),
+                "fit_time": _number(fit_times.get(name)),
+            }
+            for name, score in scores.items()
+        ]
+        # Best first, models without a validation score (refit) last
+        self.leaderboard.sort(
+            key=lambda row: (row["score_val"] is not None, row["score_val"] or 0),
+            reverse=True,
+        )
+        if time.monotonic() - self.last_write >= settings.TRAINING_PROGRESS_INTERVAL:
+            self.write()
+        return False
+
+    def write(self, finished=False):
+        """Writes the progress so far, errors are only logged."""
+        self.last_write = time.monotonic()
+        best = self.leaderboard[0] if self.leaderboard else {}
+        fields = {
+            "models_trained": len(self.leaderboard),
+            "best_model": best.get("model"),
+            "best_score": best.get("score_val"),
+            "leaderboard": self.leaderboard,
+            # update() doesn't set auto_now fields
+            "updated_at": timezone.now(),
+        }
+        if finished:
+            fields["finished_at"] = timezone.now()
+        try:
+            TrainingProgress.objects.filter(pk=self.progress_id).update(**fields)
+        except Exception as e:
+            logger.warning(f"Could not write the training progress: {e}")
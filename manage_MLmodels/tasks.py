@@ -14,18 +14,58 @@ from django.utils import timezone
 from django.utils.text import slugify
 
 from manage_datasets.models import Dataset
+from manage_datasets.storage import load_dataset_df
 
+from .deployment import (
+    measure_inference_latency,
+    optimize_for_deployment,
+    record_deployment,
+)
 from .models import MLModel
+from .progress import TrainingProgressCallback, start_training_progress
 
 CELERY_WORKER_REDIRECT_STDOUTS = False
 
 logger = logging.getLogger(__name__)
 
 
+def _record_inference_latency(model_instance, predictor, load_features):
+    """
+    Measures the per-row latency of a model trained with an inference budget,
+    on the features returned by load_features(). Errors are only logged.
+    """
+    if not model_instance.inference_budget_ms:
+        return
+    logger.info("Measuring the inference latency...")
+    try:
+        model_instance.inference_latency_ms = measure_inference_latency(
+            predictor,
+            load_features(),
+            model_instance.inference_batch_size or settings.INFERENCE_BATCH_SIZE,
+            settings.INFERENCE_LATENCY_REPEATS,
+        )
+    except Exception as e:
+        logger.warning(f"Could not measure the inference latency: {e}")
+
+
 @shared_task
-def train_autogluon_model(model_id, dataset_id, target, features, time_limit, presets):
+def train_autogluon_model(
+    model_id,
+    dataset_id,
+    target,
+    features,
+    time_limit,
+    presets,
+    deploy_optimized=False,
+    inference_budget_ms=None,
+    inference_batch_size=None,
+):
     """
     A Celery task to train an AutoGluon model in the background.
+    With deploy_optimized, only the refit best model is kept (see deployment.py).
+    With inference_budget_ms, only models predicting a row within the budget
+    (on batches of inference_batch_size rows) are kept, and the achieved per-row
+    latency is measured.
     """
 
     logger.info(f"Starting training task for MLModel ID: {model_id}")
@@ -46,7 +86,7 @@ def train_autogluon_model(model_id, dataset_id, target, features, time_limit, pr
     try:
         logger.info(f"Fetching dataset ID: {dataset_id}")
         dataset_instance = Dataset.objects.get(id=dataset_id)
-        train_data = pd.read_csv(dataset_instance.file.path)
+        train_data = load_dataset_df(dataset_instance)
         logger.info("Dataset loaded successfully.")
 
         # Ensure only selected features and the target are used for training
@@ -61,9 +101,21 @@ def train_autogluon_model(model_id, dataset_id, target, features, time_limit, pr
         model_path = os.path.join(settings.MEDIA_ROOT, "MLmodels", model_name)
         logger.info(f"Model will be saved to: {model_path}")
 
+        inference_batch_size = inference_batch_size or settings.INFERENCE_BATCH_SIZE
+        fit_kwargs = {}
+        if inference_budget_ms:
+            logger.info(
+                f"Limiting inference to {inference_budget_ms} ms per row "
+                f"on batches of {inference_batch_size} rows."
+            )
+            fit_kwargs["infer_limit"] = inference_budget_ms / 1000
+            fit_kwargs["infer_limit_batch_size"] = inference_batch_size
+
         # Train the model
         logger.info("Starting AutoGluon predictor.fit()...")
         start_time = time.time()
+        progress = start_training_progress(model_instance, time_limit)
+        progress_callback = TrainingProgressCallback(progress.id)
 
         predictor = TabularPredictor(
             path=model_path, label=target, problem_type="regression", verbosity=2
@@ -71,12 +123,27 @@ def train_autogluon_model(model_id, dataset_id, target, features, time_limit, pr
             train_data=train_data,
             time_limit=time_limit,
             presets=presets,
+            callbacks=[progress_callback],
+            **fit_kwargs,
         )
+        progress_callback.write(finished=True)
+
+        if deploy_optimized:
+            logger.info("Optimizing the predictor for deployment...")
+            optimized = optimize_for_deployment(model_path)
+            predictor = optimized["predictor"]
+            record_deployment(model_instance, optimized)
 
         end_time = time.time()
         duration_seconds = end_time - start_time
         logger.info("Model training complete.")
 
+        model_instance.inference_budget_ms = inference_budget_ms
+        model_instance.inference_batch_size = inference_batch_size
+        _record_inference_latency(
+            model_instance, predictor, lambda: train_data.drop(columns=[target])
+        )
+
         # Update the MLModel instance with the results
         logger.info("Updating model instance in the database...")
         model_instance.status = "COMPLETED"
@@ -107,7 +174,7 @@ def train_autogluon_model(model_id, dataset_id, target, features, time_limit, pr
             try:
                 # Check if the target column is non-numeric, which is a common cause
                 dataset_instance = Dataset.objects.get(id=dataset_id)
-                df = pd.read_csv(dataset_instance.file.path)
+                df = load_dataset_df(dataset_instance, columns=[target])
                 if not pd.api.types.is_numeric_dtype(df[target]):
                     error_message = (
                         "Training failed: Invalid data type for the target column.\n\n"
@@ -126,3 +193,55 @@ def train_autogluon_model(model_id, dataset_id, target, features, time_limit, pr
         logger.info("Restoring stdout/stderr.")
         sys.stdout = original_stdout
         sys.stderr = original_stderr
+
+
+@shared_task
+def optimize_model_for_deployment_task(model_id):
+    """
+    Celery task to optimize an existing model for deployment, keeping only its
+    best model refit on all data. On failure the model keeps its original
+    predictor and is marked FAILED with the error in its description.
+    """
+    logger.info(f"Starting deployment optimization for MLModel ID: {model_id}")
+    try:
+        model_instance = MLModel.objects.get(id=model_id)
+    except MLModel.DoesNotExist:
+        logger.error(f"MLModel with id={model_id} not found. Aborting optimization.")
+        return
+
+    # Temporarily restore stdout/stderr to prevent 'fileno' error with ray/celery on Windows
+    original_stdout = sys.stdout
+    original_stderr = sys.stderr
+    sys.stdout = sys.__stdout__
+    sys.stderr = sys.__stderr__
+    try:
+        optimized = optimize_for_deployment(model_instance.file.path)
+        record_deployment(model_instance, optimized)
+        leaderboard_df = optimized["predictor"].leaderboard(silent=True).reset_index()
+        model_instance.evaluation_metrics = leaderboard_df.to_dict()
+
+        # Measure the latency again, when the training data is still there
+        if model_instance.related_dataset and model_instance.features:
+            _record_inference_latency(
+                model_instance,
+                optimized["predictor"],
+                lambda: load_dataset_df(
+                    model_instance.related_dataset, columns=model_instance.features
+                ),
+            )
+        model_instance.status = "COMPLETED"
+        model_instance.save()
+        logger.info(f"Optimization for MLModel ID: {model_id} completed successfully.")
+
+    except Exception as e:
+        logger.error(f"An error occurred optimizing MLModel ID: {model_id}. Error: {e}")
+        error_trace = traceback.format_exc()
+        # The original predictor is left intact (see deployment.py)
+        model_instance.status = "FAILED"
+        model_instance.description = (
+            f"Optimization failed: {str(e)}\n\nTraceback:\n{error_trace}"
+        )
+        model_instance.save()
+    finally:
+        sys.stdout = original_stdout
+        sys.stderr = original_stderr
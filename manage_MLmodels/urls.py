@@ -8,7 +8,9 @@ from .views import (
     get_dataset_columns,
     get_leaderboard_data,
     get_MLmodel_row_partial,
+    get_training_progress,
     manage_MLmodels,
+    optimize_MLmodel,
     visualize_MLmodel,
 )
 
@@ -19,6 +21,11 @@ urlpatterns = [
         delete_MLmodel,
         name="delete_MLmodel_view",
     ),
+    path(
+        "manage_MLmodels/optimize/<int:MLmodel_id>/",
+        optimize_MLmodel,
+        name="optimize_MLmodel_view",
+    ),
     path(
         "manage_MLmodels/download/<int:MLmodel_id>/",
         download_MLmodel,
@@ -39,6 +46,11 @@ urlpatterns = [
         get_MLmodel_row_partial,
         name="get_MLmodel_row_partial",
     ),
+    path(
+        "manage_MLmodels/progress/<int:MLmodel_id>/",
+        get_training_progress,
+        name="training_progress_view",
+    ),
     path(
         "manage_MLmodels/leaderboards/<int:result_id>",
         get_leaderboard_data,
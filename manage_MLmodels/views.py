@@ -8,16 +8,20 @@ import pandas as pd
 from autogluon.tabular import TabularPredictor
 from django.conf import settings
 from django.contrib.auth.decorators import login_required
+from django.db import transaction
 from django.http import Http404, HttpResponse, JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
-from django.views.decorators.http import require_GET
+from django.utils import timezone
+from django.views.decorators.http import require_GET, require_POST
 
 from manage_datasets.models import Dataset
 from testing.models import TestResult
 
 from .forms import TrainMLModelForm, UploadMLModelForm
-from .models import MLModel
-from .tasks import train_autogluon_model
+from .models import MLModel, TrainingProgress
+from .predictors import evict_predictor
+from .progress import training_progress_by_model
+from .tasks import optimize_model_for_deployment_task, train_autogluon_model
 
 
 @login_required
@@ -198,6 +202,9 @@ def manage_MLmodels(request):
                     features=data["features"],
                     time_limit=time_limit_seconds,
                     presets=data["presets"],
+                    deploy_optimized=data["deploy_optimized"],
+                    inference_budget_ms=data["inference_budget_ms"],
+                    inference_batch_size=data["inference_batch_size"],
                 )
                 return redirect("manage_MLmodels_view")
 
@@ -230,9 +237,15 @@ def manage_MLmodels(request):
     selected_features_json = json.dumps(selected_features)
 
     # Filter models by the logged-in user
-    models = MLModel.objects.filter(uploaded_by=request.user).order_by("-date")
+    models = (
+        MLModel.objects.filter(uploaded_by=request.user)
+        .select_related("related_dataset")
+        .defer(*Dataset.deferred_through("related_dataset"))
+        .order_by("-date")
+    )
+    progresses = training_progress_by_model(models)
     context = {
-        "models": models,
+        "model_rows": [(model, progresses.get(model.id)) for model in models],
         "upload_form": upload_form,
         "train_form": train_form,
         "selected_target": selected_target,
@@ -250,6 +263,7 @@ def delete_MLmodel(request, MLmodel_id):
 
     # If the model has an associated directory, remove it.
     if model_obj.file and model_obj.file.path and os.path.exists(model_obj.file.path):
+        evict_predictor(model_obj.file.path)
         # Use shutil.rmtree for directories
         shutil.rmtree(model_obj.file.path, ignore_errors=True)
     model_obj.delete()
@@ -257,6 +271,28 @@ def delete_MLmodel(request, MLmodel_id):
     return redirect("manage_MLmodels_view")
 
 
+@login_required
+@require_POST
+def optimize_MLmodel(request, MLmodel_id):
+    """
+    Queue the deployment optimization of a trained ML model.
+    """
+    model_obj = get_object_or_404(
+        MLModel,
+        id=MLmodel_id,
+        uploaded_by=request.user,
+        status="COMPLETED",
+        deploy_optimized=False,
+    )
+    model_obj.status = "OPTIMIZING"
+    model_obj.save(update_fields=["status"])
+    transaction.on_commit(
+        lambda: optimize_model_for_deployment_task.delay(model_obj.id)
+    )
+
+    return redirect("manage_MLmodels_view")
+
+
 @login_required
 def download_MLmodel(request, MLmodel_id):
     """
@@ -321,9 +357,15 @@ def visualize_MLmodel(request, MLmodel_id):
     """
     Display details and cached evaluation results for an ML model.
     """
-    model_obj = get_object_or_404(MLModel, id=MLmodel_id, uploaded_by=request.user)
+    model_obj = get_object_or_404(
+        MLModel.objects.with_evaluation(), id=MLmodel_id, uploaded_by=request.user
+    )
     # Get all test results to be listed in a dropdown
-    test_results = model_obj.test_results.order_by("-test_date").all()
+    test_results = (
+        model_obj.test_results.select_related("dataset")
+        .defer(*TestResult.RESULT_BLOBS, *Dataset.deferred_through("dataset"))
+        .order_by("-test_date")
+    )
 
     context = {
         "model": model_obj,
@@ -367,8 +409,51 @@ def get_MLmodel_row_partial(request, MLmodel_id):
     """
     Returns the HTML for a single model table row to enable live updates.
     """
-    model = get_object_or_404(MLModel, id=MLmodel_id, uploaded_by=request.user)
-    return render(request, "_MLmodel_row_partial.html", {"model": model})
+    model = get_object_or_404(
+        MLModel.objects.select_related("related_dataset").defer(
+            *Dataset.deferred_through("related_dataset")
+        ),
+        id=MLmodel_id,
+        uploaded_by=request.user,
+    )
+    progress = training_progress_by_model([model]).get(model.id)
+    return render(
+        request, "_MLmodel_row_partial.html", {"model": model, "progress": progress}
+    )
+
+
+@login_required
+@require_GET
+def get_training_progress(request, MLmodel_id):
+    """
+    Returns the progress of the training of a model as JSON: elapsed time and
+    time limit, models trained so far and the best validation score.
+    """
+    model = get_object_or_404(
+        MLModel.objects.only("status"), id=MLmodel_id, uploaded_by=request.user
+    )
+    progress = TrainingProgress.objects.filter(model=model).first()
+    if progress is None:
+        return JsonResponse({"status": model.status, "progress": None})
+
+    # Failed trainings stop at their last update
+    end = progress.finished_at or (
+        timezone.now() if model.status == "TRAINING" else progress.updated_at
+    )
+    return JsonResponse(
+        {
+            "status": model.status,
+            "progress": {
+                "elapsed_seconds": round((end - progress.started_at).total_seconds()),
+                "time_limit_seconds": progress.time_limit,
+                "models_trained": progress.models_trained,
+                "best_model": progress.best_model,
+                "best_score": progress.best_score,
+                "leaderboard": progress.leaderboard,
+                "updated_at": progress.updated_at,
+            },
+        }
+    )
 
 
 @login_required
@@ -0,0 +1,154 @@
+"""
+Memory-mapped column cache of datasets.
+
+A loaded dataset is written once to a directory holding one .npy file per
+column, next to the dataset files:
+
+    - numeric, bool and datetime columns: the values, in their compact dtype
+    - category and text columns: integer codes, and the dictionary of values
+      in the manifest
+    - nullable booleans: int8 codes (-1 missing, 0 False, 1 True)
+
+Loads map the files copy-on-write and wrap them in a dataframe without
+copying the numeric columns, so every worker process reading the same dataset
+shares its pages through the OS page cache instead of parsing it again.
+Changes to the loaded dataframe stay private to the process, the files are
+never modified.
+
+The cache is keyed by the dataset content (see storage.content_file_path),
+it never needs invalidating.
+"""
+
+import json
+import logging
+import os
+import shutil
+import uuid
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+MANIFEST = "manifest.json"
+
+KIND_ARRAY = "array"
+KIND_CATEGORY = "category"
+KIND_TEXT = "text"
+KIND_BOOLEAN = "boolean"
+
+
+def _codes_dtype(n_values):
+    """Returns the narrowest integer dtype for the codes of n_values values."""
+    for dtype in (np.int8, np.int16, np.int32):
+        if n_values <= np.iinfo(dtype).max:
+            return dtype
+    return np.int64
+
+
+def _encode_column(series):
+    """
+    Returns (manifest entry, array to save) for a column, None if the column
+    can't be cached (e.g. mixed-type values).
+    """
+    dtype = series.dtype
+    if isinstance(dtype, pd.CategoricalDtype):
+        categories = dtype.categories.tolist()
+        if not all(isinstance(value, str) for value in categories):
+            return None
+        codes = series.cat.codes.to_numpy().astype(_codes_dtype(len(categories)))
+        return {"kind": KIND_CATEGORY, "categories": categories}, codes
+    if isinstance(dtype, pd.BooleanDtype):
+        codes = series.astype("Int8").fillna(-1).to_numpy(dtype=np.int8)
+        return {"kind": KIND_BOOLEAN}, codes
+    if isinstance(dtype, np.dtype) and dtype.kind in "biufM":
+        return {"kind": KIND_ARRAY}, series.to_numpy()
+
+    # Text, stored as codes of its distinct values
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    values = list(uniques)
+    if not all(isinstance(value, str) for value in values):
+        return None
+    return {"kind": KIND_TEXT, "values": values}, codes.astype(
+        _codes_dtype(len(values))
+    )
+
+
+def write_column_cache(path, df):
+    """
+    Writes the column cache of a loaded dataset to the directory `path`.
+    The directory is written aside and renamed, readers never see a partial
+    cache. Returns False if a column can't be cached.
+    """
+    if os.path.exists(path):
+        return True
+
+    encoded = []
+    for col in df.columns:
+        column = _encode_column(df[col])
+        if column is None:
+            logger.info(f"Column '{col}' can't be cached, skipping the column cache.")
+            return False
+        encoded.append((col, *column))
+
+    tmp_path = f"{path}.{uuid.uuid4().hex[:8]}.tmp"
+    os.makedirs(tmp_path)
+    try:
+        columns = []
+        for i, (col, entry, values) in enumerate(encoded):
+            entry = {"name": col, "file": f"{i}.npy", **entry}
+            file_path = os.path.join(tmp_path, entry["file"])
+            np.save(file_path, np.ascontiguousarray(values))
+            columns.append(entry)
+        with open(os.path.join(tmp_path, MANIFEST), "w") as f:
+            json.dump({"n_rows": len(df), "columns": columns}, f)
+        os.rename(tmp_path, path)
+    except OSError as e:
+        # Another process wrote the same cache first
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        if not os.path.exists(path):
+            logger.warning(f"Could not write the column cache {path}: {e}")
+            return False
+    return True
+
+
+def _decode_column(path, entry):
+    values = np.load(os.path.join(path, entry["file"]), mmap_mode="c")
+    kind = entry["kind"]
+    if kind == KIND_ARRAY:
+        return values
+    if kind == KIND_CATEGORY:
+        return pd.Categorical.from_codes(values, categories=entry["categories"])
+    if kind == KIND_BOOLEAN:
+        return pd.arrays.BooleanArray(values == 1, values == -1)
+    # Text is materialized, as loaded from the files
+    uniques = np.array(entry["values"] + [None], dtype=object)
+    return pd.array(uniques[values], dtype="str")
+
+
+def load_column_cache(path, columns=None):
+    """
+    Loads a dataframe from the column cache in `path`, None if there is none.
+    Numeric columns are views of the mapped files.
+
+    Args:
+        path (str): The cache directory.
+        columns (list, optional): Subset of columns to load.
+    """
+    try:
+        with open(os.path.join(path, MANIFEST)) as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        return None
+
+    entries = {entry["name"]: entry for entry in manifest["columns"]}
+    names = list(entries) if columns is None else list(columns)
+    if any(col not in entries for col in names):
+        return None
+    data = {col: _decode_column(path, entries[col]) for col in names}
+    return pd.DataFrame(data, columns=names, copy=False)
+
+
+def delete_column_cache(path):
+    """Removes a column cache directory."""
+    shutil.rmtree(path, ignore_errors=True)
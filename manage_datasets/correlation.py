@@ -0,0 +1,96 @@
+"""
+Streaming correlation of numeric columns.
+
+CorrelationAccumulator adds the co-moments of every pair of columns chunk by
+chunk, so the correlation matrix of a dataset is computed over every row
+without loading it. Missing values are excluded pair by pair, like
+DataFrame.corr().
+"""
+
+import numpy as np
+import pandas as pd
+
+# Rows multiplied at once, bounds the size of the temporary matrices
+BLOCK_ROWS = 10_000
+
+
+class CorrelationAccumulator:
+    """
+    Accumulates, for every pair of columns (i, j) over the rows where both are
+    present: the row count, the sums and sums of squares of column i, and the
+    sum of products. Values are shifted by the mean of the first chunk to keep
+    the sums well conditioned.
+    """
+
+    def __init__(self, columns):
+        self.columns = list(columns)
+        size = len(self.columns)
+        self.shift = None
+        self.n = np.zeros((size, size))
+        self.sums = np.zeros((size, size))
+        self.squares = np.zeros((size, size))
+        self.products = np.zeros((size, size))
+
+    def update(self, df):
+        """Adds the rows of a chunk."""
+        values = df[self.columns].apply(pd.to_numeric, errors="coerce")
+        values = values.to_numpy(dtype=np.float64)
+        present = np.isfinite(values)
+        if self.shift is None:
+            counts = present.sum(axis=0)
+            totals = np.where(present, values, 0.0).sum(axis=0)
+            self.shift = np.divide(
+                totals, counts, out=np.zeros_like(totals), where=counts > 0
+            )
+
+        for start in range(0, len(values), BLOCK_ROWS):
+            block_present = present[start : start + BLOCK_ROWS]
+            mask = block_present.astype(np.float64)
+            block = np.where(
+                block_present, values[start : start + BLOCK_ROWS] - self.shift, 0.0
+            )
+            self.n += mask.T @ mask
+            self.sums += block.T @ mask
+            self.squares += (block * block).T @ mask
+            self.products += block.T @ block
+
+    def correlation(self):
+        """Returns the Pearson correlation matrix as a dataframe."""
+        with np.errstate(divide="ignore", invalid="ignore"):
+            n = np.where(self.n > 1, self.n, np.nan)
+            comoment = self.products - self.sums * self.sums.T / n
+            variance = self.squares - self.sums**2 / n
+            corr = comoment / np.sqrt(variance * variance.T)
+        corr[~np.isfinite(corr)] = np.nan
+        corr = np.clip(corr, -1.0, 1.0)
+        return pd.DataFrame(corr, index=self.columns, columns=self.columns)
+
+
+def top_correlated_pairs(corr_matrix, k):
+    """
+    Returns the k pairs of different columns with the strongest correlation
+    (in absolute value), as a list of {'a', 'b', 'r'}.
+    """
+    values = corr_matrix.to_numpy()
+    rows, cols = np.triu_indices(len(values), k=1)
+    r = values[rows, cols]
+    valid = np.flatnonzero(~np.isnan(r))
+    strongest = valid[np.argsort(-np.abs(r[valid]), kind="stable")[:k]]
+    columns = list(corr_matrix.columns)
+    return [
+        {"a": columns[rows[i]], "b": columns[cols[i]], "r": float(r[i])}
+        for i in strongest
+    ]
+
+
+def cluster_order(corr_matrix):
+    """
+    Orders the columns so correlated ones are next to each other, by the
+    angle of their loadings on the first two eigenvectors of the matrix.
+    """
+    values = np.nan_to_num(corr_matrix.to_numpy())
+    if len(values) < 3:
+        return list(corr_matrix.columns)
+    _, vectors = np.linalg.eigh(values)
+    angles = np.arctan2(vectors[:, -2], vectors[:, -1])
+    return [corr_matrix.columns[i] for i in np.argsort(angles, kind="stable")]
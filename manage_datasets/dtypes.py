@@ -0,0 +1,230 @@
+"""
+Compact dtypes for datasets.
+
+Files keep the plain types (int64, float64, text). While a dataset is written,
+DtypeProfiler picks the narrowest dtype that holds every value of each column
+without loss, and apply_dtypes converts the loaded dataframes to it:
+
+    - integers: int8, int16 or int32 when the values fit
+    - floats: float32 when every value is exactly representable
+    - text: bool/boolean for true/false values, datetime for ISO 8601 dates,
+      category for columns with few distinct values
+"""
+
+import logging
+
+import numpy as np
+import pandas as pd
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+INT_DTYPES = ["int8", "int16", "int32"]
+BOOL_VALUES = ["true", "false"]
+DATE_RE = r"^\d{4}-\d{2}-\d{2}"
+
+
+class _ColumnProfile:
+    """Running summary of a column, updated chunk by chunk."""
+
+    def __init__(self, max_categories):
+        self.max_categories = max_categories
+        self.kinds = set()
+        self.n_values = 0
+        self.has_missing = False
+        self.min = None
+        self.max = None
+        self.float32_exact = True
+        self.categories = set()
+        self.is_bool = True
+        self.is_datetime = True
+
+    def update(self, series):
+        values = series.dropna()
+        self.has_missing |= len(values) < len(series)
+        # Empty chunks (e.g. a column missing from a merged dataset) say nothing
+        if values.empty:
+            return
+        self.n_values += len(values)
+        kind = "O" if series.dtype.kind in "OSU" else series.dtype.kind
+        self.kinds.add(kind)
+
+        if kind in "iuf":
+            self._update_numeric(values)
+        elif kind == "O":
+            self._update_text(values.astype(str))
+
+    def _update_numeric(self, values):
+        values = values.to_numpy(dtype=np.float64)
+        low, high = values.min(), values.max()
+        self.min = low if self.min is None else min(self.min, low)
+        self.max = high if self.max is None else max(self.max, high)
+        if self.float32_exact:
+            with np.errstate(over="ignore"):
+                rounded = values.astype(np.float32).astype(np.float64)
+            self.float32_exact = bool(np.array_equal(rounded, values))
+
+    def _update_text(self, values):
+        if self.categories is not None:
+            self.categories.update(values.unique())
+            if len(self.categories) > self.max_categories:
+                self.categories = None
+        if self.is_bool:
+            self.is_bool = bool(values.str.lower().isin(BOOL_VALUES).all())
+        if self.is_datetime:
+            self.is_datetime = self._parses_as_dates(values)
+
+    @staticmethod
+    def _parses_as_dates(values):
+        if not values.str.match(DATE_RE).all():
+            return False
+        try:
+            pd.to_datetime(values, format="ISO8601")
+        except (ValueError, TypeError, OverflowError):
+            return False
+        return True
+
+    def compact_dtype(self):
+        """Returns the dtype entry of the column, None to keep the default type."""
+        if not self.kinds:
+            return None
+
+        if self.kinds <= {"i", "u"} and not self.has_missing:
+            for dtype in INT_DTYPES:
+                info = np.iinfo(dtype)
+                if info.min <= self.min and self.max <= info.max:
+                    return {"dtype": dtype}
+            return None
+
+        if self.kinds <= {"i", "u", "f"}:
+            return {"dtype": "float32"} if self.float32_exact else None
+
+        if self.kinds == {"O"}:
+            if self.is_bool:
+                return {"dtype": "boolean" if self.has_missing else "bool"}
+            if self.is_datetime:
+                return {"dtype": "datetime64"}
+            if self.categories is not None and len(self.categories) <= (
+                self.n_values * settings.DATASET_CATEGORY_MAX_RATIO
+            ):
+                return {"dtype": "category", "categories": sorted(self.categories)}
+        return None
+
+
+class DtypeProfiler:
+    """
+    Chooses the compact dtypes of a dataset from its chunks.
+
+    Usage:
+        profiler = DtypeProfiler()
+        for chunk in chunks:
+            profiler.update(chunk)
+        dtypes = profiler.dtypes()
+    """
+
+    def __init__(self):
+        self.max_categories = settings.DATASET_CATEGORY_MAX_UNIQUE
+        self.columns = {}
+
+    def update(self, df):
+        """Adds the values of a chunk to the column summaries."""
+        for col in df.columns:
+            if col not in self.columns:
+                self.columns[col] = _ColumnProfile(self.max_categories)
+            self.columns[col].update(df[col])
+
+    def dtypes(self):
+        """
+        Returns:
+            dict: Column name -> {'dtype': ..., 'categories': [...]} for the
+            columns that can be stored in a narrower dtype.
+        """
+        dtypes = {}
+        for col, profile in self.columns.items():
+            dtype = profile.compact_dtype()
+            if dtype:
+                dtypes[col] = dtype
+        return dtypes
+
+
+def _convert(series, entry):
+    """Converts a loaded column to its compact dtype."""
+    dtype = entry["dtype"]
+    if dtype in ("bool", "boolean"):
+        flags = series.astype(str).str.lower() == "true"
+        return flags.astype(dtype).mask(series.isna()) if dtype == "boolean" else flags
+    if dtype == "datetime64":
+        return pd.to_datetime(series, format="ISO8601")
+    if dtype == "category":
+        # The CSV fallback may parse some values as numbers
+        values = series.where(series.isna(), series.astype(str))
+        return pd.Categorical(values, categories=entry["categories"])
+    return series.astype(dtype)
+
+
+def apply_dtypes(df, dtypes):
+    """
+    Converts the columns of a loaded dataframe to their compact dtypes in place,
+    one column at a time. Columns that don't convert keep their loaded type.
+    """
+    if not dtypes:
+        return df
+    for col, entry in dtypes.items():
+        if col not in df.columns:
+            continue
+        try:
+            df[col] = _convert(df[col], entry)
+        except (ValueError, TypeError, OverflowError) as e:
+            logger.warning(f"Column '{col}' kept its type, can't convert it: {e}")
+    return df
+
+
+def _merge_entries(entry, profile):
+    """
+    Returns the dtype entry of a column holding the values of `entry` and the
+    appended values summarised by `profile`, None to keep the default type.
+    """
+    dtype = entry["dtype"]
+    # Only empty values were appended
+    if not profile.kinds:
+        if not profile.has_missing or dtype in ("float32", "datetime64", "category"):
+            return entry
+        if dtype in ("bool", "boolean"):
+            return {"dtype": "boolean"}
+        return None
+
+    appended = profile.compact_dtype()
+    if appended is None:
+        return None
+    new_dtype = appended["dtype"]
+
+    if dtype in INT_DTYPES and new_dtype in INT_DTYPES:
+        return {"dtype": max(dtype, new_dtype, key=INT_DTYPES.index)}
+    # int8 and int16 values are exactly representable as float32
+    if {dtype, new_dtype} <= {"int8", "int16", "float32"}:
+        return {"dtype": "float32"}
+    if dtype in ("bool", "boolean") and new_dtype in ("bool", "boolean"):
+        return {"dtype": "bool" if dtype == new_dtype == "bool" else "boolean"}
+    if dtype == new_dtype == "datetime64":
+        return entry
+    if dtype == new_dtype == "category":
+        categories = set(entry["categories"]) | set(appended["categories"])
+        if len(categories) <= settings.DATASET_CATEGORY_MAX_UNIQUE:
+            return {"dtype": "category", "categories": sorted(categories)}
+    return None
+
+
+def extend_dtypes(dtypes, profiler):
+    """
+    Returns the compact dtypes of a dataset after appending rows, from its
+    current dtypes and a DtypeProfiler updated with the appended rows only.
+    Columns are widened (e.g. int8 to int16, new categories) or fall back to
+    their default type, they are never narrowed.
+    """
+    extended = {}
+    for col, entry in (dtypes or {}).items():
+        profile = profiler.columns.get(col)
+        merged = entry if profile is None else _merge_entries(entry, profile)
+        if merged:
+            extended[col] = merged
+    return extended
@@ -1,6 +1,7 @@
 from django import forms
 
 from .models import Dataset
+from .operations import SPLIT_RANDOM, SPLIT_STRATIFIED, SPLIT_TIME
 
 
 class UploadCSVForm(forms.Form):
@@ -13,7 +14,10 @@ class UploadCSVForm(forms.Form):
         required=False,
         widget=forms.Textarea(attrs={"class": "form-control", "rows": 3}),
     )
-    file = forms.FileField(widget=forms.FileInput(attrs={"class": "form-control"}))
+    file = forms.FileField(
+        widget=forms.FileInput(attrs={"class": "form-control"}),
+        help_text="A CSV file, or a .zip / .tar.gz archive of CSV files imported in the background (one dataset per file, named after it).",
+    )
     encoding = forms.ChoiceField(
         choices=[("utf-8", "UTF-8"), ("latin-1", "Latin-1")],
         widget=forms.Select(attrs={"class": "form-select"}),
@@ -24,6 +28,28 @@ class UploadCSVForm(forms.Form):
     )
 
 
+class AppendRowsForm(forms.Form):
+    """Form for appending the rows of a CSV file to a dataset."""
+
+    dataset = forms.ModelChoiceField(
+        queryset=Dataset.objects.none(),
+        widget=forms.Select(attrs={"class": "form-select"}),
+        label="Select Dataset to Append to",
+    )
+    file = forms.FileField(
+        widget=forms.FileInput(attrs={"class": "form-control"}),
+        help_text="Same columns, separator and encoding as the dataset.",
+    )
+
+    def __init__(self, *args, **kwargs):
+        user = kwargs.pop("user", None)
+        super().__init__(*args, **kwargs)
+        if user:
+            self.fields["dataset"].queryset = Dataset.objects.filter(
+                uploaded_by=user
+            ).exclude(name="--manual-data--")
+
+
 class SplitDatasetForm(forms.Form):
     """Form for splitting a dataset."""
 
@@ -39,6 +65,28 @@ class SplitDatasetForm(forms.Form):
         widget=forms.NumberInput(attrs={"class": "form-control"}),
         label="Training Set Ratio (%)",
     )
+    method = forms.ChoiceField(
+        choices=[
+            (SPLIT_RANDOM, "Random"),
+            (SPLIT_STRATIFIED, "Stratified by column"),
+            (SPLIT_TIME, "Time-ordered"),
+        ],
+        initial=SPLIT_RANDOM,
+        widget=forms.Select(attrs={"class": "form-select"}),
+        label="Split Method",
+    )
+    column = forms.CharField(
+        required=False,
+        widget=forms.Select(attrs={"class": "form-select"}),
+        label="Column",
+        help_text="Class column for stratified splits, time column for time-ordered splits (row order if empty).",
+    )
+    seed = forms.IntegerField(
+        min_value=0,
+        initial=42,
+        widget=forms.NumberInput(attrs={"class": "form-control"}),
+        label="Random Seed",
+    )
 
     def __init__(self, *args, **kwargs):
         user = kwargs.pop("user", None)
@@ -48,6 +96,18 @@ class SplitDatasetForm(forms.Form):
                 uploaded_by=user
             ).exclude(name="--manual-data--")
 
+    def clean(self):
+        cleaned_data = super().clean()
+        dataset = cleaned_data.get("dataset")
+        method = cleaned_data.get("method")
+        column = cleaned_data.get("column")
+
+        if method == SPLIT_STRATIFIED and not column:
+            self.add_error("column", "Select the column to stratify by.")
+        if dataset and column and column not in (dataset.columns or {}):
+            self.add_error("column", f"Column '{column}' not found in the dataset.")
+        return cleaned_data
+
 
 class MergeDatasetsForm(forms.Form):
     """Form for merging multiple datasets."""
@@ -0,0 +1,94 @@
+"""
+Bulk import of the CSV files of an archive.
+
+The archive is read once, as a stream: each CSV member is extracted to its
+own staged file (hashed on the way, see storage.new_content_hash) and queued
+to be ingested by a background task of its own, so files are ingested in
+parallel while the next ones are extracted. No file is ever fully loaded.
+"""
+
+import os
+import tarfile
+import uuid
+import zipfile
+
+from django.conf import settings
+
+from .storage import new_content_hash
+
+ARCHIVE_EXTENSIONS = (".zip", ".tar.gz", ".tgz")
+
+# Bytes copied at once when extracting a member
+COPY_BUFFER_SIZE = 1024 * 1024
+
+
+def is_archive(filename):
+    """Checks if an uploaded file is an archive of CSV files, by its name."""
+    return filename.lower().endswith(ARCHIVE_EXTENSIONS)
+
+
+def imports_dir():
+    """Returns the directory holding the uploaded archives and staged files."""
+    return os.path.join(settings.DATASETS_DIR, "imports")
+
+
+def new_archive_path(filename):
+    """Returns a unique path to save an uploaded archive, keeping its extension."""
+    extension = next(
+        ext for ext in ARCHIVE_EXTENSIONS if filename.lower().endswith(ext)
+    )
+    return os.path.join(imports_dir(), f"{uuid.uuid4().hex}{extension}")
+
+
+def member_dataset_name(member):
+    """Returns the dataset name of an archive member (its file name)."""
+    name = os.path.splitext(os.path.basename(member))[0]
+    return name[:100] or "dataset"
+
+
+def _is_csv_member(name):
+    basename = os.path.basename(name)
+    return (
+        name.lower().endswith(".csv")
+        and not basename.startswith(".")
+        # Resource forks added by macOS archivers
+        and not name.startswith("__MACOSX/")
+    )
+
+
+def iter_csv_members(archive_path):
+    """
+    Iterates over the CSV files of a zip or tar (optionally compressed)
+    archive in one pass, yielding (member name, readable file object).
+    Each file object is only valid until the next member is yielded.
+    """
+    if archive_path.lower().endswith(".zip"):
+        with zipfile.ZipFile(archive_path) as archive:
+            for info in archive.infolist():
+                if not info.is_dir() and _is_csv_member(info.filename):
+                    with archive.open(info) as member_file:
+                        yield info.filename, member_file
+        return
+
+    # Stream mode, compressed tars are decompressed once from start to end
+    with tarfile.open(archive_path, mode="r|*") as archive:
+        for member in archive:
+            if member.isfile() and _is_csv_member(member.name):
+                yield member.name, archive.extractfile(member)
+
+
+def stage_member(member_file, separator, encoding):
+    """
+    Copies an archive member to a staged file in bounded chunks, hashing it.
+
+    Returns:
+        tuple: (staged path, content hash hex digest).
+    """
+    os.makedirs(imports_dir(), exist_ok=True)
+    path = os.path.join(imports_dir(), f"{uuid.uuid4().hex}.csv")
+    content_hash = new_content_hash(separator, encoding)
+    with open(path, "wb") as f:
+        while data := member_file.read(COPY_BUFFER_SIZE):
+            f.write(data)
+            content_hash.update(data)
+    return path, content_hash.hexdigest()
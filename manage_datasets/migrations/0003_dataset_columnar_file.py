@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 20:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('manage_datasets', '0002_dataset_head_context_dataset_plots_context_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dataset',
+            name='columnar_file',
+            field=models.FileField(blank=True, help_text='Parquet copy of the dataset used for fast loading', null=True, upload_to='datasets/'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-17 20:52
+
+from django.db import migrations, models
+
+
+def mark_cached_profiles_completed(apps, schema_editor):
+    """Datasets that already have a cached profile don't need to be queued again."""
+    Dataset = apps.get_model('manage_datasets', 'Dataset')
+    Dataset.objects.filter(
+        plots_context__isnull=False,
+        stats_context__isnull=False,
+        head_context__isnull=False,
+    ).update(profile_status='COMPLETED')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('manage_datasets', '0003_dataset_columnar_file'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dataset',
+            name='profile_error',
+            field=models.TextField(blank=True, help_text='Traceback of the last failed profile generation', null=True),
+        ),
+        migrations.AddField(
+            model_name='dataset',
+            name='profile_status',
+            field=models.CharField(blank=True, choices=[('PENDING', 'Pending'), ('RUNNING', 'Running'), ('COMPLETED', 'Completed'), ('FAILED', 'Failed')], help_text='Status of the background profile generation, empty if never requested', max_length=20, null=True),
+        ),
+        migrations.RunPython(mark_cached_profiles_completed, migrations.RunPython.noop),
+    ]
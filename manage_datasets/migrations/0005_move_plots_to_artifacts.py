@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-17 20:56
+
+from django.db import migrations, models
+
+from cidra_ML.migration_utils import extract_png_blobs
+
+
+def move_plots_to_artifacts(apps, schema_editor):
+    """Moves the base64 plots cached on datasets to the artifact store."""
+    Dataset = apps.get_model('manage_datasets', 'Dataset')
+    datasets = Dataset.objects.exclude(plots_context__isnull=True, stats_context__isnull=True)
+    for dataset in datasets.iterator(chunk_size=10):
+        dataset.plots_context = extract_png_blobs(dataset.plots_context)
+        dataset.stats_context = extract_png_blobs(dataset.stats_context)
+        dataset.save(update_fields=['plots_context', 'stats_context'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('manage_datasets', '0004_dataset_profile_status'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='dataset',
+            name='plots_context',
+            field=models.JSONField(blank=True, help_text='Artifact digests of the cached plots', null=True),
+        ),
+        migrations.RunPython(move_plots_to_artifacts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('manage_datasets', '0005_move_plots_to_artifacts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dataset',
+            name='dtypes',
+            field=models.JSONField(blank=True, help_text='Compact dtypes applied when loading the dataset (see manage_datasets.dtypes)', null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('manage_datasets', '0006_dataset_dtypes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dataset',
+            name='content_hash',
+            field=models.CharField(blank=True, db_index=True, help_text='SHA-256 of the file content and parsing options, identical datasets share their files', max_length=64, null=True),
+        ),
+    ]
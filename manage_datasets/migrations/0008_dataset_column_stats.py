@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('manage_datasets', '0007_dataset_content_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dataset',
+            name='column_stats',
+            field=models.JSONField(blank=True, help_text='Column statistics (counts, moments, quantiles, histograms, top categories)', null=True),
+        ),
+    ]
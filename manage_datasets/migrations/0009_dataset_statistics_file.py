@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('manage_datasets', '0008_dataset_column_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dataset',
+            name='statistics_file',
+            field=models.FileField(blank=True, help_text='Saved state of the column statistics, updated when rows are appended', null=True, upload_to='datasets/'),
+        ),
+    ]
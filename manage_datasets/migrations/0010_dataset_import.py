@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:28
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('manage_datasets', '0009_dataset_statistics_file'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DatasetImport',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('archive', models.FileField(blank=True, help_text='The uploaded archive, removed once its files are extracted', null=True, upload_to='datasets/imports/')),
+                ('name', models.CharField(help_text='Name of the uploaded archive', max_length=255)),
+                ('separator', models.CharField(default=',', help_text='Separator used in the CSV files', max_length=10)),
+                ('encoding', models.CharField(default='utf-8', help_text='Encoding of the CSV files', max_length=20)),
+                ('description', models.TextField(blank=True, help_text='Description given to every imported dataset', null=True)),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('RUNNING', 'Running'), ('COMPLETED', 'Completed'), ('FAILED', 'Failed')], default='PENDING', help_text='Status of the archive extraction, each file has its own status', max_length=20)),
+                ('error', models.TextField(blank=True, help_text='Error raised reading the archive', null=True)),
+                ('date', models.DateTimeField(auto_now_add=True, help_text='Date and time when the archive was uploaded')),
+                ('uploaded_by', models.ForeignKey(blank=True, help_text='User who uploaded the archive', null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='DatasetImportFile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('member', models.CharField(help_text='Path of the file inside the archive', max_length=500)),
+                ('staged_file', models.CharField(blank=True, help_text='Extracted file waiting to be ingested, relative to MEDIA_ROOT', max_length=500, null=True)),
+                ('content_hash', models.CharField(blank=True, help_text='SHA-256 of the extracted file and parsing options', max_length=64, null=True)),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('RUNNING', 'Running'), ('COMPLETED', 'Completed'), ('FAILED', 'Failed')], default='PENDING', help_text='Status of the file ingestion', max_length=20)),
+                ('error', models.TextField(blank=True, help_text='Error raised ingesting the file', null=True)),
+                ('dataset', models.ForeignKey(blank=True, help_text='Dataset created from the file', null=True, on_delete=django.db.models.deletion.SET_NULL, to='manage_datasets.dataset')),
+                ('dataset_import', models.ForeignKey(help_text='The import the file belongs to', on_delete=django.db.models.deletion.CASCADE, related_name='files', to='manage_datasets.datasetimport')),
+            ],
+        ),
+    ]
@@ -4,11 +4,53 @@ from django.contrib.auth.models import User
 from django.db import models
 
 
+class DatasetQuerySet(models.QuerySet):
+    def with_profile(self):
+        """Also loads the cached profile, which is deferred by default."""
+        return self.defer(None)
+
+
+class DatasetManager(models.Manager.from_queryset(DatasetQuerySet)):
+    """
+    Defers the cached profile (megabytes of JSON per dataset), listings and
+    dropdowns only load the metadata. Use with_profile() to load it.
+    """
+
+    def get_queryset(self):
+        return super().get_queryset().defer(*self.model.PROFILE_BLOBS)
+
+
 class Dataset(models.Model):
     """
     Model for storing datasets
     """
 
+    PROFILE_PENDING = "PENDING"
+    PROFILE_RUNNING = "RUNNING"
+    PROFILE_COMPLETED = "COMPLETED"
+    PROFILE_FAILED = "FAILED"
+
+    PROFILE_STATUS_CHOICES = [
+        (PROFILE_PENDING, "Pending"),
+        (PROFILE_RUNNING, "Running"),
+        (PROFILE_COMPLETED, "Completed"),
+        (PROFILE_FAILED, "Failed"),
+    ]
+
+    # Fields holding the cached profile, shared by datasets with identical content
+    PROFILE_FIELDS = [
+        "column_stats",
+        "statistics_file",
+        "plots_context",
+        "stats_context",
+        "head_context",
+        "profile_status",
+        "profile_error",
+    ]
+
+    # Large profile fields, only loaded by the views displaying them
+    PROFILE_BLOBS = ["column_stats", "plots_context", "stats_context", "head_context"]
+
     # Atribute filled by user on form
     file = models.FileField(
         upload_to="datasets/", help_text="The CSV file containing the dataset"
@@ -28,7 +70,22 @@ class Dataset(models.Model):
         blank=True, null=True, help_text="A brief description of the dataset's contents"
     )
 
+    # Typed columnar copy used by every reader, the CSV is kept for download
+    columnar_file = models.FileField(
+        upload_to="datasets/",
+        blank=True,
+        null=True,
+        help_text="Parquet copy of the dataset used for fast loading",
+    )
+
     # Atribues filled automatically
+    content_hash = models.CharField(
+        max_length=64,
+        blank=True,
+        null=True,
+        db_index=True,
+        help_text="SHA-256 of the file content and parsing options, identical datasets share their files",
+    )
     date = models.DateTimeField(
         auto_now_add=True, help_text="Date and time when the dataset was uploaded"
     )
@@ -36,6 +93,11 @@ class Dataset(models.Model):
     columns = models.JSONField(
         help_text="JSON representation of the column names and their data types"
     )
+    dtypes = models.JSONField(
+        blank=True,
+        null=True,
+        help_text="Compact dtypes applied when loading the dataset (see manage_datasets.dtypes)",
+    )
     n_columns = models.IntegerField(
         default=0, help_text="Number of columns in the dataset"
     )
@@ -48,8 +110,21 @@ class Dataset(models.Model):
     )
 
     # Context for visualization
+    column_stats = models.JSONField(
+        blank=True,
+        null=True,
+        help_text="Column statistics (counts, moments, quantiles, histograms, top categories)",
+    )
+    # Accumulators behind column_stats, appended rows are added to them
+    statistics_file = models.FileField(
+        upload_to="datasets/",
+        blank=True,
+        null=True,
+        help_text="Saved state of the column statistics, updated when rows are appended",
+    )
+    # Plots are kept in the artifact store (cidra_ML.artifacts), only digests here
     plots_context = models.JSONField(
-        blank=True, null=True, help_text="Cached plots for visualization"
+        blank=True, null=True, help_text="Artifact digests of the cached plots"
     )
     stats_context = models.JSONField(
         blank=True, null=True, help_text="Cached stats for visualization"
@@ -59,6 +134,128 @@ class Dataset(models.Model):
         null=True,
         help_text="Cached HTML for the head of the dataset for visualization",
     )
+    profile_status = models.CharField(
+        max_length=20,
+        choices=PROFILE_STATUS_CHOICES,
+        blank=True,
+        null=True,
+        help_text="Status of the background profile generation, empty if never requested",
+    )
+    profile_error = models.TextField(
+        blank=True, null=True, help_text="Traceback of the last failed profile generation"
+    )
+
+    objects = DatasetManager()
+
+    def __str__(self):
+        return str(self.name)
+
+    @classmethod
+    def deferred_through(cls, relation):
+        """Returns the profile fields to defer when joining a dataset relation."""
+        return [f"{relation}__{field}" for field in cls.PROFILE_BLOBS]
+
+
+class DatasetImport(models.Model):
+    """
+    Model for bulk imports of the CSV files of an archive (zip or tar.gz),
+    each file becomes its own Dataset
+    """
+
+    STATUS_PENDING = "PENDING"
+    STATUS_RUNNING = "RUNNING"
+    STATUS_COMPLETED = "COMPLETED"
+    STATUS_FAILED = "FAILED"
+
+    STATUS_CHOICES = [
+        (STATUS_PENDING, "Pending"),
+        (STATUS_RUNNING, "Running"),
+        (STATUS_COMPLETED, "Completed"),
+        (STATUS_FAILED, "Failed"),
+    ]
+
+    archive = models.FileField(
+        upload_to="datasets/imports/",
+        blank=True,
+        null=True,
+        help_text="The uploaded archive, removed once its files are extracted",
+    )
+    name = models.CharField(max_length=255, help_text="Name of the uploaded archive")
+    separator = models.CharField(
+        max_length=10, default=",", help_text="Separator used in the CSV files"
+    )
+    encoding = models.CharField(
+        max_length=20, default="utf-8", help_text="Encoding of the CSV files"
+    )
+    description = models.TextField(
+        blank=True, null=True, help_text="Description given to every imported dataset"
+    )
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default=STATUS_PENDING,
+        help_text="Status of the archive extraction, each file has its own status",
+    )
+    error = models.TextField(
+        blank=True, null=True, help_text="Error raised reading the archive"
+    )
+    date = models.DateTimeField(
+        auto_now_add=True, help_text="Date and time when the archive was uploaded"
+    )
+    uploaded_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        help_text="User who uploaded the archive",
+    )
 
     def __str__(self):
         return str(self.name)
+
+
+class DatasetImportFile(models.Model):
+    """
+    Model for a CSV file of a bulk import, ingested by its own background task
+    """
+
+    dataset_import = models.ForeignKey(
+        DatasetImport,
+        on_delete=models.CASCADE,
+        related_name="files",
+        help_text="The import the file belongs to",
+    )
+    member = models.CharField(
+        max_length=500, help_text="Path of the file inside the archive"
+    )
+    staged_file = models.CharField(
+        max_length=500,
+        blank=True,
+        null=True,
+        help_text="Extracted file waiting to be ingested, relative to MEDIA_ROOT",
+    )
+    content_hash = models.CharField(
+        max_length=64,
+        blank=True,
+        null=True,
+        help_text="SHA-256 of the extracted file and parsing options",
+    )
+    status = models.CharField(
+        max_length=20,
+        choices=DatasetImport.STATUS_CHOICES,
+        default=DatasetImport.STATUS_PENDING,
+        help_text="Status of the file ingestion",
+    )
+    error = models.TextField(
+        blank=True, null=True, help_text="Error raised ingesting the file"
+    )
+    dataset = models.ForeignKey(
+        Dataset,
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        help_text="Dataset created from the file",
+    )
+
+    def __str__(self):
+        return str(self.member)
@@ -0,0 +1,274 @@
+"""Out-of-core dataset operations (split and merge)"""
+
+import queue
+import threading
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from django.conf import settings
+
+from .storage import (
+    ARROW_TYPES,
+    dataset_arrow_schema,
+    iter_dataset_chunks,
+    load_dataset_df,
+    widest_dtype,
+)
+
+SPLIT_RANDOM = "random"
+SPLIT_STRATIFIED = "stratified"
+SPLIT_TIME = "time"
+
+
+def row_uniforms(row_numbers, seed):
+    """
+    Maps row numbers to reproducible uniform values in [0, 1).
+    Uses the splitmix64 mixer, so the result only depends on the row and the seed.
+    """
+    with np.errstate(over="ignore"):
+        x = np.asarray(row_numbers, dtype=np.uint64) + np.uint64(seed) * np.uint64(
+            0x9E3779B97F4A7C15
+        )
+        x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        x = x ^ (x >> np.uint64(31))
+    return (x >> np.uint64(11)).astype(np.float64) / float(2**53)
+
+
+def _as_time(series):
+    """Converts a column to comparable time values."""
+    if pd.api.types.is_numeric_dtype(series) or pd.api.types.is_datetime64_any_dtype(
+        series
+    ):
+        return series
+    return pd.to_datetime(series, errors="coerce")
+
+
+def _time_cutoff(dataset, column, train_ratio):
+    """
+    Returns the value of `column` below which `train_ratio` of the rows fall.
+    Only that column is loaded.
+    """
+    values = _as_time(load_dataset_df(dataset, columns=[column])[column]).dropna()
+    if values.empty:
+        return None
+    values = values.sort_values(ignore_index=True)
+    index = max(int(len(values) * train_ratio) - 1, 0)
+    return values.iloc[index]
+
+
+class _StratifiedAssigner:
+    """
+    Keeps every class at the train ratio while streaming.
+    In each chunk, the rows of a class with the smallest hash values go to train,
+    as many as needed for the running train count to match the ratio.
+    """
+
+    def __init__(self, train_ratio):
+        self.train_ratio = train_ratio
+        self.seen = {}
+        self.train = {}
+
+    def assign(self, labels, uniforms):
+        is_train = np.zeros(len(labels), dtype=bool)
+        labels = labels.fillna("__missing__").to_numpy()
+        for label in pd.unique(labels):
+            positions = np.flatnonzero(labels == label)
+            seen = self.seen.get(label, 0) + len(positions)
+            needed = int(round(seen * self.train_ratio)) - self.train.get(label, 0)
+            needed = min(max(needed, 0), len(positions))
+            chosen = positions[np.argsort(uniforms[positions], kind="stable")[:needed]]
+            is_train[chosen] = True
+            self.seen[label] = seen
+            self.train[label] = self.train.get(label, 0) + needed
+        return is_train
+
+
+def split_dataset_chunks(
+    dataset, train_ratio, method=SPLIT_RANDOM, column=None, seed=42
+):
+    """
+    Splits a dataset into train and test rows in a single streaming pass.
+
+    Methods:
+        - random: a row goes to train when the hash of its row number and the
+          seed falls below the ratio. Independent of the chunk size.
+        - stratified: like random, but keeps each class of `column` at the ratio.
+        - time: the earliest rows go to train, by `column` (cutoff computed from
+          that column only) or by row order when no column is given.
+
+    Args:
+        dataset (Dataset): The dataset to split.
+        train_ratio (float): Fraction of rows to put in train, between 0 and 1.
+        method (str): One of SPLIT_RANDOM, SPLIT_STRATIFIED or SPLIT_TIME.
+        column (str, optional): Class column (stratified) or time column (time).
+        seed (int): Seed of the row hash (random and stratified).
+
+    Yields:
+        tuple: (train_chunk, test_chunk) dataframes.
+    """
+    stratifier = _StratifiedAssigner(train_ratio) if method == SPLIT_STRATIFIED else None
+    cutoff = None
+    if method == SPLIT_TIME and column:
+        cutoff = _time_cutoff(dataset, column, train_ratio)
+    n_train_rows = int(round(dataset.n_rows * train_ratio))
+
+    offset = 0
+    for chunk in iter_dataset_chunks(dataset, raw=True):
+        row_numbers = np.arange(offset, offset + len(chunk))
+        offset += len(chunk)
+
+        if method == SPLIT_TIME:
+            if column and cutoff is not None:
+                # Rows without a time go to test
+                is_train = (_as_time(chunk[column]) <= cutoff).to_numpy(dtype=bool)
+            elif column:
+                is_train = np.zeros(len(chunk), dtype=bool)
+            else:
+                is_train = row_numbers < n_train_rows
+        else:
+            uniforms = row_uniforms(row_numbers, seed)
+            if stratifier is not None:
+                is_train = stratifier.assign(chunk[column], uniforms)
+            else:
+                is_train = uniforms < train_ratio
+
+        yield chunk[is_train], chunk[~is_train]
+
+
+class _ChunkPrefetcher:
+    """
+    Parses the chunks of a dataset in a background thread.
+    At most `buffer_size` parsed chunks wait to be consumed, bounding memory.
+    """
+
+    _DONE = object()
+
+    def __init__(self, chunks, buffer_size):
+        self._chunks = chunks
+        self._queue = queue.Queue(maxsize=max(buffer_size, 1))
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def _put(self, item):
+        # Wakes up regularly so a stopped consumer doesn't leave the thread blocked
+        while not self._stopped.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _run(self):
+        try:
+            for chunk in self._chunks:
+                if not self._put(chunk):
+                    return
+            self._put(self._DONE)
+        except Exception as e:
+            self._put(e)
+        finally:
+            self._chunks.close()
+
+    def __iter__(self):
+        while True:
+            item = self._queue.get()
+            if item is self._DONE:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+
+    def stop(self):
+        self._stopped.set()
+
+
+def _arrow_dtype(arrow_type):
+    """
+    Returns the schema type of a Parquet column type, None for columns without
+    any value. Raises ValueError for types that can't be widened.
+    """
+    if pa.types.is_null(arrow_type):
+        return None
+    if pa.types.is_boolean(arrow_type):
+        return "bool"
+    if pa.types.is_integer(arrow_type):
+        return "int64"
+    if pa.types.is_floating(arrow_type):
+        return "float64"
+    if pa.types.is_string(arrow_type) or pa.types.is_large_string(arrow_type):
+        return "object"
+    raise ValueError(f"Unsupported column type {arrow_type}")
+
+
+def merged_arrow_schema(datasets_columns):
+    """
+    Returns the Parquet schema of the merge of `datasets_columns`, a list of
+    (dataset, selected columns). Types differing between datasets are widened,
+    datasets without a Parquet copy contribute the types recorded on them.
+    Returns None when the types can't be merged.
+    """
+    dtypes = {}
+    for dataset, columns in datasets_columns:
+        schema = dataset_arrow_schema(dataset)
+        for col in columns:
+            if schema is not None:
+                try:
+                    dtype = _arrow_dtype(schema.field(col).type)
+                except ValueError:
+                    return None
+            else:
+                dtype = (dataset.columns or {}).get(col)
+                if dtype not in ARROW_TYPES:
+                    return None
+            dtypes[col] = widest_dtype(dtypes.get(col), dtype)
+    # Columns without any value are stored as floats, like pandas does
+    return pa.schema(
+        [(col, ARROW_TYPES[dtype or "float64"]) for col, dtype in dtypes.items()]
+    )
+
+
+def merge_dataset_chunks(datasets_columns):
+    """
+    Stacks datasets vertically in a single streaming pass.
+
+    Only the selected columns of each dataset are read, and every dataset is
+    parsed ahead in its own thread while the previous ones are being written.
+    Columns missing from a dataset are left empty.
+
+    Args:
+        datasets_columns (list): (dataset, selected columns) tuples, in order.
+
+    Yields:
+        DataFrame: Chunks with the union of the selected columns.
+    """
+    merged_columns = []
+    for _, columns in datasets_columns:
+        merged_columns += [col for col in columns if col not in merged_columns]
+
+    prefetchers = [
+        _ChunkPrefetcher(
+            iter_dataset_chunks(dataset, columns=columns, raw=True),
+            settings.DATASET_MERGE_PREFETCH_CHUNKS,
+        )
+        for dataset, columns in datasets_columns
+    ]
+    for prefetcher in prefetchers:
+        prefetcher.start()
+
+    try:
+        offset = 0
+        for prefetcher in prefetchers:
+            for chunk in prefetcher:
+                chunk = chunk.reindex(columns=merged_columns)
+                chunk.index = pd.RangeIndex(offset, offset + len(chunk))
+                offset += len(chunk)
+                yield chunk
+    finally:
+        for prefetcher in prefetchers:
+            prefetcher.stop()
@@ -1,82 +1,140 @@
-import base64
 import io
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 
 import matplotlib
 
 matplotlib.use("Agg")
 
-import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
 import seaborn as sns
+from matplotlib.figure import Figure
 
+logger = logging.getLogger(__name__)
 
-def fig_to_base64(fig):
-    """Converts a matplotlib figure to a base64 encoded PNG string."""
+
+def fig_to_png(fig):
+    """Converts a matplotlib figure to PNG bytes."""
     buf = io.BytesIO()
     fig.savefig(buf, format="png", bbox_inches="tight")
-    buf.seek(0)
-    img_str = base64.b64encode(buf.read()).decode("utf-8")
+    png_bytes = buf.getvalue()
     buf.close()
-    plt.close(fig)
-    return img_str
-
-
-def create_correlation_heatmap(df, numerical_cols):
-    """Generates a correlation heatmap for numerical columns."""
-    fig, ax = plt.subplots(figsize=(10, 8))
-    corr_matrix = df[numerical_cols].corr()
-    corr_matrix = corr_matrix.where(
-        pd.DataFrame(
-            np.tril(np.ones(corr_matrix.shape)),
-            index=corr_matrix.index,
-            columns=corr_matrix.columns,
-        ).astype(bool)
-    )
+    return png_bytes
+
+
+def create_correlation_heatmap(corr_matrix, annotate=True):
+    """
+    Generates a correlation heatmap from a correlation matrix.
+    Annotated lower triangle for a few columns, the full matrix without
+    annotations (columns already ordered by cluster) for many.
+    """
+    if annotate:
+        fig = Figure(figsize=(10, 8))
+        ax = fig.subplots()
+        corr_matrix = corr_matrix.where(
+            pd.DataFrame(
+                np.tril(np.ones(corr_matrix.shape)),
+                index=corr_matrix.index,
+                columns=corr_matrix.columns,
+            ).astype(bool)
+        )
+        sns.heatmap(
+            corr_matrix,
+            annot=True,
+            fmt=".2f",
+            cmap="RdBu_r",
+            vmin=-1,
+            vmax=1,
+            ax=ax,
+        )
+        return fig_to_png(fig)
+
+    size = min(8 + len(corr_matrix) / 20, 20)
+    fig = Figure(figsize=(size, size * 0.8))
+    ax = fig.subplots()
+    # Labels of more than ~60 columns overlap, only show some
+    labels = max(len(corr_matrix) // 60, 1)
     sns.heatmap(
         corr_matrix,
-        annot=True,
-        fmt=".2f",
         cmap="RdBu_r",
         vmin=-1,
         vmax=1,
+        xticklabels=labels,
+        yticklabels=labels,
         ax=ax,
     )
-    return fig_to_base64(fig)
+    fig.tight_layout()
+    return fig_to_png(fig)
+
+
+def create_top_correlations_plot(top_pairs):
+    """
+    Generates a bar plot of the most correlated pairs of columns.
+    `top_pairs` is a list of {'a', 'b', 'r'}, strongest first.
+    """
+    fig = Figure(figsize=(10, max(3, len(top_pairs) * 0.35)))
+    ax = fig.subplots()
+    labels = [f"{pair['a']} / {pair['b']}" for pair in top_pairs]
+    values = [pair["r"] for pair in top_pairs]
+    colors = matplotlib.colormaps["RdBu_r"]([(value + 1) / 2 for value in values])
+    ax.barh(labels[::-1], values[::-1], color=colors[::-1])
+    ax.set_xlim(-1, 1)
+    ax.axvline(0, color="black", linewidth=0.8)
+    ax.set_xlabel("Correlation coefficient")
+    fig.tight_layout()
+    return fig_to_png(fig)
 
 
-def create_countplot(df, column):
-    """Generates a count plot for a given categorical column."""
-    fig, ax = plt.subplots()
-    sns.countplot(x=df[column], ax=ax, order=df[column].value_counts().index)
+def create_countplot(categories):
+    """
+    Generates a count plot from category counts.
+    `categories` is a list of {'value', 'count'}, most frequent first.
+    """
+    fig = Figure()
+    ax = fig.subplots()
+    sns.barplot(
+        x=[category["value"] for category in categories],
+        y=[category["count"] for category in categories],
+        ax=ax,
+    )
     ax.yaxis.set_label_text("Count")
     ax.xaxis.set_label_text("Type")
-    ax.set_xticklabels(
-        ax.get_xticklabels(), rotation=45, ha="right", rotation_mode="anchor"
-    )
+    for label in ax.get_xticklabels():
+        label.set_rotation(45)
+        label.set_horizontalalignment("right")
+        label.set_rotation_mode("anchor")
     fig.tight_layout()
-    return fig_to_base64(fig)
+    return fig_to_png(fig)
 
 
-def create_histogram(df, column):
-    """Generates a histogram for a given column."""
-    fig, ax = plt.subplots()
-    sns.histplot(df[column], kde=True, ax=ax)
-    ax.yaxis.set_label_text("Density")
-    return fig_to_base64(fig)
+def create_histogram(edges, counts):
+    """Generates a histogram from precomputed bin edges and counts."""
+    fig = Figure()
+    ax = fig.subplots()
+    ax.stairs(counts, edges, fill=True, alpha=0.6)
+    ax.stairs(counts, edges)
+    ax.yaxis.set_label_text("Count")
+    return fig_to_png(fig)
 
 
-def create_normalized_pdf_plot(df, numerical_cols):
+def create_normalized_pdf_plot(df, numerical_cols, ranges):
     """
     Generates a single plot with PDF/KDE for all numerical columns.
-    Each column's values are scaled using MinMax Scaler.
+    Each column's values are scaled using MinMax Scaler, with the (min, max)
+    of the whole column given in `ranges`.
     """
-    fig, ax = plt.subplots(figsize=(12, 7))
-    colors = plt.cm.get_cmap("viridis")(np.linspace(0, 1, len(numerical_cols)))
+    fig = Figure(figsize=(12, 7))
+    ax = fig.subplots()
+    colors = matplotlib.colormaps["viridis"](np.linspace(0, 1, len(numerical_cols)))
 
     for i, col in enumerate(numerical_cols):
-        data = df[col]
-        scaled_data = (data - data.min()) / (data.max() - data.min())
+        # Infinities are outside the (finite) range
+        data = df[col].replace([np.inf, -np.inf], np.nan)
+        low, high = ranges[col]
+        scaled_data = (data - low) / ((high - low) or 1.0)
         sns.kdeplot(
             data=scaled_data,
             ax=ax,
@@ -89,22 +147,62 @@ def create_normalized_pdf_plot(df, numerical_cols):
     ax.legend()
     ax.set_xlabel("Value (MinMax scaled)")
     ax.set_ylabel("Density")
-    return fig_to_base64(fig)
+    return fig_to_png(fig)
 
 
-def create_missing_values_plot(df):
-    """Generates a bar plot showing the count of missing values for each column."""
-    missing_values = df.isnull().sum()
+def create_missing_values_plot(missing_values):
+    """
+    Generates a bar plot showing the count of missing values for each column.
+    `missing_values` is a Series of missing counts indexed by column.
+    """
     missing_values = missing_values[missing_values > 0]
 
     if missing_values.empty:
         return None
 
-    fig, ax = plt.subplots(figsize=(6, 3))
+    fig = Figure(figsize=(6, 3))
+    ax = fig.subplots()
     missing_values.sort_values(ascending=False).plot(kind="bar", ax=ax)
     ax.set_title("")
     ax.set_xlabel("Features")
     ax.set_ylabel("Number of Missing Values")
-    ax.set_xticklabels(ax.get_xticklabels(), rotation=45, ha="right")
+    for label in ax.get_xticklabels():
+        label.set_rotation(45)
+        label.set_horizontalalignment("right")
     fig.tight_layout()
-    return fig_to_base64(fig)
+    return fig_to_png(fig)
+
+
+def _render_plot(job):
+    """Renders a single (function, args) plot job."""
+    plot_function, args = job
+    return plot_function(*args)
+
+
+def render_plots(jobs, workers=1):
+    """
+    Renders independent plots, in parallel when more than one worker is allowed.
+
+    Args:
+        jobs (dict): Plot key -> (plot function, args). Pass only the columns
+            each plot needs in args, they are pickled to the worker processes.
+        workers (int): Maximum number of worker processes.
+
+    Returns:
+        dict: Plot key -> PNG bytes (or None).
+    """
+    workers = min(workers or 1, len(jobs))
+    if workers <= 1:
+        return {key: _render_plot(job) for key, job in jobs.items()}
+
+    # Spawned processes don't inherit the threads and sockets of web or Celery workers
+    try:
+        with ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+        ) as executor:
+            results = executor.map(_render_plot, jobs.values())
+            return dict(zip(jobs.keys(), results))
+    except (BrokenProcessPool, AssertionError, OSError) as e:
+        # Daemonic processes (e.g. some Celery pools) can't start children
+        logger.warning(f"Plot process pool unavailable, rendering serially: {e}")
+        return {key: _render_plot(job) for key, job in jobs.items()}
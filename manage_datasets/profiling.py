@@ -0,0 +1,196 @@
+"""Dataset profile generation (stats, head and plots)"""
+
+import pandas as pd
+from django.conf import settings
+
+from cidra_ML.artifacts import save_png_artifact
+
+from .correlation import cluster_order
+from .plots import (
+    create_correlation_heatmap,
+    create_countplot,
+    create_histogram,
+    create_missing_values_plot,
+    create_normalized_pdf_plot,
+    create_top_correlations_plot,
+    render_plots,
+)
+
+CORRELATION_ANNOTATED = "annotated"
+CORRELATION_CLUSTERED = "clustered"
+CORRELATION_TOP_PAIRS = "top_pairs"
+
+TABLE_CLASSES = "table table-striped table-bordered"
+
+
+def describe_table(column_stats):
+    """
+    Returns the descriptive statistics table (as pandas' describe()) built
+    from the column statistics.
+    """
+    numeric = {
+        col: stats
+        for col, stats in column_stats["columns"].items()
+        if stats["kind"] == "numeric"
+    }
+    if numeric:
+        rows = {
+            col: {
+                "count": stats["count"],
+                "mean": stats["mean"],
+                "std": stats["std"],
+                "min": stats["min"],
+                "25%": stats["quantiles"]["25%"],
+                "50%": stats["quantiles"]["50%"],
+                "75%": stats["quantiles"]["75%"],
+                "max": stats["max"],
+            }
+            for col, stats in numeric.items()
+        }
+    else:
+        rows = {
+            col: {
+                "count": stats["count"],
+                "unique": stats["distinct"],
+                "top": stats["top"][0]["value"] if stats["top"] else None,
+                "freq": stats["top"][0]["count"] if stats["top"] else None,
+            }
+            for col, stats in column_stats["columns"].items()
+        }
+    return pd.DataFrame(rows)
+
+
+def info_text(column_stats, dtypes):
+    """Returns a summary of the columns in the format of pandas' info()."""
+    n_rows = column_stats["n_rows"]
+    columns = column_stats["columns"]
+    lines = [
+        f"RangeIndex: {n_rows} entries, 0 to {max(n_rows - 1, 0)}",
+        f"Data columns (total {len(columns)} columns):",
+    ]
+    table = pd.DataFrame(
+        {
+            "Column": list(columns),
+            "Non-Null Count": [f"{stats['count']} non-null" for stats in columns.values()],
+            "Dtype": [dtypes.get(col, "object") for col in columns],
+        }
+    )
+    lines.append(table.to_string())
+    counts = table["Dtype"].value_counts().sort_index()
+    lines.append(
+        "dtypes: " + ", ".join(f"{dtype}({count})" for dtype, count in counts.items())
+    )
+    return "\n".join(lines)
+
+
+def correlation_job(corr_matrix, top_pairs):
+    """
+    Returns the correlation plot job and its view, chosen from the number of
+    columns: an annotated heatmap (up to PROFILE_HEATMAP_ANNOTATE_COLUMNS), a
+    clustered heatmap without annotations (up to PROFILE_HEATMAP_MAX_COLUMNS)
+    or only the most correlated pairs.
+    """
+    n_columns = len(corr_matrix)
+    if n_columns <= settings.PROFILE_HEATMAP_ANNOTATE_COLUMNS:
+        return CORRELATION_ANNOTATED, (create_correlation_heatmap, (corr_matrix, True))
+    if n_columns <= settings.PROFILE_HEATMAP_MAX_COLUMNS:
+        order = cluster_order(corr_matrix)
+        return CORRELATION_CLUSTERED, (
+            create_correlation_heatmap,
+            (corr_matrix.loc[order, order], False),
+        )
+    return CORRELATION_TOP_PAIRS, (create_top_correlations_plot, (top_pairs,))
+
+
+def build_dataset_profile(column_stats, sample_df, corr_matrix, head_df, dtypes):
+    """
+    Builds the visualization profile of a dataset from its column statistics
+    (see statistics.compute_column_statistics). The data isn't read again.
+
+    Statistics:
+        - Descriptive statistics
+        - Info summary
+    Plots for numerical columns:
+        - PDF plots (drawn from the row sample)
+        - Correlation heatmap, or top correlated pairs for many columns
+        - Histograms (from the histogram bins)
+    Plots for categorical columns:
+        - Count plots (from the top categories)
+
+    Plots are independent, so they are rendered by a pool of
+    PLOT_RENDER_WORKERS processes.
+
+    Rendered plots are kept in the artifact store, only their digests are
+    returned.
+
+    Args:
+        column_stats (dict): The column statistics.
+        sample_df (DataFrame): Row sample of the numeric columns.
+        corr_matrix (DataFrame): Correlation matrix of the numeric columns,
+            None if there are less than two.
+        head_df (DataFrame): First rows of the dataset.
+        dtypes (dict): Column name -> dtype shown in the info summary.
+
+    Returns:
+        tuple: (plots, stats, head) ready to be cached on the Dataset.
+    """
+    columns = column_stats["columns"]
+
+    # Stats
+    stats = {}
+    stats["description"] = describe_table(column_stats).to_html(classes=TABLE_CLASSES)
+    stats["info"] = info_text(column_stats, dtypes)
+    missing_values = pd.Series(
+        {col: col_stats["missing"] for col, col_stats in columns.items()}, dtype=int
+    )
+    stats["missing_values_plot"] = save_png_artifact(
+        create_missing_values_plot(missing_values)
+    )
+    if not stats["missing_values_plot"]:
+        stats["missing_values_message"] = "None of the features have empty values."
+    else:
+        stats["missing_values_message"] = None
+    stats["sample"] = column_stats["sample"]
+    stats["top_correlated_pairs"] = column_stats["correlation"]["top_pairs"]
+    stats["correlation_view"] = None
+
+    # Each job only receives the data it plots
+    jobs = {}
+
+    # Numerial columns plots
+    numerical_cols = [
+        col
+        for col, col_stats in columns.items()
+        # Columns without finite values have nothing to plot
+        if col_stats["kind"] == "numeric" and col_stats["min"] is not None
+    ]
+    if numerical_cols:
+        ranges = {col: (columns[col]["min"], columns[col]["max"]) for col in numerical_cols}
+        numerical_df = sample_df[numerical_cols]
+        jobs["pdf_plot"] = (
+            create_normalized_pdf_plot,
+            (numerical_df, numerical_cols, ranges),
+        )
+        for col in numerical_cols:
+            histogram = columns[col]["histogram"]
+            if histogram:
+                jobs[f"histo_{col}"] = (
+                    create_histogram,
+                    (histogram["edges"], histogram["counts"]),
+                )
+
+    if corr_matrix is not None:
+        stats["correlation_view"], jobs["correlation_heatmap"] = correlation_job(
+            corr_matrix, stats["top_correlated_pairs"]
+        )
+
+    # Categorical columns plots
+    for col, col_stats in columns.items():
+        if col_stats["kind"] == "categorical" and col_stats["top"]:
+            jobs[f"count_{col}"] = (create_countplot, (col_stats["top"],))
+
+    rendered = render_plots(jobs, workers=settings.PLOT_RENDER_WORKERS)
+    plots = {key: save_png_artifact(png) for key, png in rendered.items()}
+
+    head = head_df.to_html(classes=TABLE_CLASSES)
+    return plots, stats, head
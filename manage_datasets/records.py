@@ -0,0 +1,239 @@
+"""
+Creation of Dataset records for stored files.
+
+Shared by the views and the background import tasks: datasets with content
+already stored share its files and profile, new content is ingested (see
+storage.py) and its profile is queued.
+"""
+
+import os
+
+from django.conf import settings
+from django.db import transaction
+
+from .imports import new_archive_path
+from .models import Dataset, DatasetImport
+from .storage import (
+    DatasetWriter,
+    append_csv_rows,
+    content_file_path,
+    delete_replaced_file,
+    delete_unused_column_cache,
+    ingest_csv,
+    new_content_hash,
+    new_csv_filename,
+    save_upload,
+)
+from .tasks import generate_dataset_profile_task, import_dataset_archive_task
+
+
+def request_dataset_profile(dataset, sample_size=None, incremental=False):
+    """Marks the dataset profile as pending and queues its generation."""
+    dataset.profile_status = Dataset.PROFILE_PENDING
+    dataset.profile_error = None
+    dataset.save(update_fields=["profile_status", "profile_error"])
+    transaction.on_commit(
+        lambda: generate_dataset_profile_task.delay(
+            dataset.id, sample_size, incremental
+        )
+    )
+
+
+def share_or_request_profile(dataset):
+    """
+    Reuses the profile of a dataset with identical content, generated or
+    being generated, and only queues a new generation when there is none.
+    """
+    source = None
+    if dataset.content_hash:
+        source = (
+            Dataset.objects.with_profile()
+            .filter(
+                content_hash=dataset.content_hash,
+                profile_status__in=[
+                    Dataset.PROFILE_PENDING,
+                    Dataset.PROFILE_RUNNING,
+                    Dataset.PROFILE_COMPLETED,
+                ],
+            )
+            .exclude(pk=dataset.pk)
+            .first()
+        )
+    if source is None:
+        request_dataset_profile(dataset)
+        return
+
+    for field in Dataset.PROFILE_FIELDS:
+        setattr(dataset, field, getattr(source, field))
+    dataset.save(update_fields=Dataset.PROFILE_FIELDS)
+
+
+def stored_dataset_content(content_hash):
+    """
+    Returns the stored files and schema of a dataset with the given content,
+    in the format of DatasetWriter.close(), or None if it isn't stored.
+    """
+    source = Dataset.objects.filter(content_hash=content_hash).first()
+    if source is None or not os.path.exists(source.file.path):
+        return None
+    return {
+        "file": source.file.name,
+        "columnar_file": source.columnar_file.name or None,
+        "content_hash": content_hash,
+        "columns": source.columns,
+        "dtypes": source.dtypes,
+        "n_rows": source.n_rows,
+    }
+
+
+def create_dataset_record(
+    name, description, stored, user, separator=",", encoding="utf-8"
+):
+    """
+    Helper function to create a Dataset model instance for files already stored.
+    `stored` is the dict returned by DatasetWriter.close().
+    """
+    new_dataset = Dataset.objects.create(
+        name=name,
+        file=stored["file"],
+        columnar_file=stored["columnar_file"],
+        content_hash=stored["content_hash"],
+        separator=separator,
+        encoding=encoding,
+        columns=stored["columns"],
+        dtypes=stored["dtypes"],
+        n_rows=stored["n_rows"],
+        n_columns=len(stored["columns"]),
+        uploaded_by=user if user and user.is_authenticated else None,
+        description=description,
+    )
+    share_or_request_profile(new_dataset)
+    return new_dataset
+
+
+def create_dataset_instance(name, description, df, user):
+    """Helper function to save a dataframe and create a Dataset model instance."""
+    with DatasetWriter(name) as writer:
+        writer.write(df)
+        stored = writer.close()
+    return create_dataset_record(name, description, stored, user)
+
+
+def create_dataset_from_upload(
+    name, description, uploaded_file, separator, encoding, user
+):
+    """
+    Helper function to stream an uploaded CSV to disk and create a Dataset.
+    The file is never fully loaded, it is scanned in chunks to build the schema.
+    Content that is already stored isn't scanned again, its files are shared.
+    """
+    upload_path = os.path.join(settings.DATASETS_DIR, new_csv_filename(name))
+    content_hash = new_content_hash(separator, encoding)
+    save_upload(uploaded_file, upload_path, content_hash)
+    return create_dataset_from_csv(
+        name,
+        description,
+        upload_path,
+        content_hash.hexdigest(),
+        separator,
+        encoding,
+        user,
+    )
+
+
+def create_dataset_from_csv(
+    name, description, upload_path, digest, separator, encoding, user
+):
+    """
+    Helper function to create a Dataset from a CSV file written to disk, whose
+    content hash (see new_content_hash) is `digest`. The file is moved to its
+    content-addressed path, or removed if that content is already stored.
+    """
+    stored = stored_dataset_content(digest)
+    if stored is not None:
+        os.remove(upload_path)
+        return create_dataset_record(
+            name, description, stored, user, separator=separator, encoding=encoding
+        )
+
+    csv_path = content_file_path(digest, ".csv")
+    os.makedirs(os.path.dirname(csv_path), exist_ok=True)
+    os.replace(upload_path, csv_path)
+    try:
+        ingested = ingest_csv(csv_path, separator=separator, encoding=encoding)
+    except Exception:
+        for path in (csv_path, content_file_path(digest, ".parquet")):
+            if os.path.exists(path):
+                os.remove(path)
+        raise
+
+    stored = {
+        "file": os.path.relpath(csv_path, settings.MEDIA_ROOT),
+        "columnar_file": ingested["columnar_path"],
+        "content_hash": digest,
+        "columns": ingested["columns"],
+        "dtypes": ingested["dtypes"],
+        "n_rows": ingested["n_rows"],
+    }
+    return create_dataset_record(
+        name, description, stored, user, separator=separator, encoding=encoding
+    )
+
+
+def create_dataset_import(name, description, uploaded_file, separator, encoding, user):
+    """
+    Helper function to stream an uploaded archive of CSV files to disk and
+    queue its import, each file becomes its own Dataset (see imports.py).
+    """
+    archive_path = new_archive_path(uploaded_file.name)
+    os.makedirs(os.path.dirname(archive_path), exist_ok=True)
+    save_upload(uploaded_file, archive_path)
+    dataset_import = DatasetImport.objects.create(
+        archive=os.path.relpath(archive_path, settings.MEDIA_ROOT),
+        name=name,
+        separator=separator,
+        encoding=encoding,
+        description=description,
+        uploaded_by=user if user and user.is_authenticated else None,
+    )
+    transaction.on_commit(lambda: import_dataset_archive_task.delay(dataset_import.id))
+    return dataset_import
+
+
+def append_rows_from_upload(dataset, uploaded_file):
+    """
+    Helper function to append the rows of an uploaded CSV to a dataset.
+    The dataset gets new files (stored files are shared by content) and its
+    statistics are updated in the background from the new rows only.
+    """
+    upload_path = os.path.join(settings.DATASETS_DIR, new_csv_filename(dataset.name))
+    save_upload(uploaded_file, upload_path)
+    try:
+        stored = append_csv_rows(dataset, upload_path)
+    finally:
+        os.remove(upload_path)
+
+    previous_files = (dataset.file, dataset.columnar_file)
+    previous_hash = dataset.content_hash
+    dataset.file = stored["file"]
+    dataset.columnar_file = stored["columnar_file"]
+    dataset.content_hash = stored["content_hash"]
+    dataset.columns = stored["columns"]
+    dataset.dtypes = stored["dtypes"]
+    dataset.n_rows = stored["n_rows"]
+    dataset.save(
+        update_fields=[
+            "file",
+            "columnar_file",
+            "content_hash",
+            "columns",
+            "dtypes",
+            "n_rows",
+        ]
+    )
+    for field in previous_files:
+        delete_replaced_file(field)
+    if previous_hash:
+        delete_unused_column_cache(previous_hash)
+    request_dataset_profile(dataset, incremental=True)
+    return dataset
@@ -0,0 +1,562 @@
+"""
+Single-pass column statistics.
+
+The columns of a dataset are split in partitions, each read by its own
+process in one chunked pass (from the Parquet copy, only the partition's
+columns are read). Every statistic is accumulated chunk by chunk:
+
+    - counts and missing values
+    - moments (mean, std, skewness, kurtosis), min and max
+    - histogram bins, widened as values outside the range come in
+    - top-k categories and distinct counts
+    - a uniform row sample, the same rows in every partition, from which the
+      quantiles and the density (KDE) grid are taken (exact when the sample
+      holds every row)
+
+The correlation matrix of the numeric columns is accumulated over every row
+by one more process (see correlation.py).
+
+The result is stored as JSON on the Dataset (column_stats), every table and
+plot of the profile is derived from it and from the sample.
+
+The accumulators are saved too (Dataset.statistics_file): when rows are
+appended, only the new rows are read and added to them.
+"""
+
+import logging
+import math
+import multiprocessing
+import os
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import django
+import numpy as np
+import pandas as pd
+from django.conf import settings
+
+from .correlation import CorrelationAccumulator, top_correlated_pairs
+from .operations import row_uniforms
+from .storage import content_file_path, dataset_source, iter_source_chunks
+
+logger = logging.getLogger(__name__)
+
+QUANTILES = [0.01, 0.05, 0.25, 0.5, 0.75, 0.95, 0.99]
+
+# Version of the saved accumulators, older states are recomputed
+STATE_VERSION = 2
+
+
+def _json_number(value):
+    """Converts a number to a JSON-safe float (None for NaN and infinity)."""
+    if value is None:
+        return None
+    value = float(value)
+    return value if math.isfinite(value) else None
+
+
+def kde_grid(values, low, high, points):
+    """
+    Gaussian kernel density estimate of `values` on `points` evenly spaced
+    positions over [low, high], with Scott's bandwidth (as seaborn).
+    The values are binned on the grid and the bins convolved with the kernel,
+    so the cost doesn't grow with the product of values and points.
+
+    Returns:
+        dict: 'x' (grid positions) and 'density', or None without spread or
+        bounds.
+    """
+    values = values[np.isfinite(values)]
+    if low is None or high is None or values.size < 2 or not high > low:
+        return None
+    std = values.std(ddof=1)
+    if not std > 0:
+        return None
+    bandwidth = std * values.size ** (-1 / 5)
+
+    grid = np.linspace(low, high, points)
+    step = grid[1] - grid[0]
+    counts = np.histogram(values, bins=points, range=(low - step / 2, high + step / 2))[0]
+    radius = int(np.ceil(4 * bandwidth / step))
+    offsets = np.arange(-radius, radius + 1) * step
+    kernel = np.exp(-0.5 * (offsets / bandwidth) ** 2)
+    density = np.convolve(counts, kernel, mode="full")[radius : radius + points]
+    density /= values.size * bandwidth * math.sqrt(2 * math.pi)
+    return {
+        "x": [float(x) for x in grid],
+        "density": [float(d) for d in density],
+    }
+
+
+def is_numeric_dtype(dtype):
+    """Checks if a recorded column dtype (Dataset.columns) is numeric."""
+    return str(dtype).lower().startswith(("int", "uint", "float"))
+
+
+class _NumericStats:
+    """
+    Moments, range and histogram of the finite values of a numeric column,
+    infinities are only counted.
+    """
+
+    def __init__(self, bins):
+        self.n = 0
+        self.infinite = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.m3 = 0.0
+        self.m4 = 0.0
+        self.min = None
+        self.max = None
+        # Histogram over [low, high], its bins double in width to cover new values
+        self.low = None
+        self.high = None
+        self.counts = np.zeros(bins + bins % 2, dtype=np.int64)
+
+    def update(self, values):
+        finite = np.isfinite(values)
+        self.infinite += int(np.isinf(values).sum())
+        values = values[finite]
+        if values.size:
+            low, high = values.min(), values.max()
+            self.min = low if self.min is None else min(self.min, low)
+            self.max = high if self.max is None else max(self.max, high)
+            self._update_moments(values)
+            self._update_histogram(values)
+
+    def _update_moments(self, values):
+        # Combines the chunk central moments with the running ones (Pebay, 2008)
+        n_b = values.size
+        mean_b = values.mean()
+        dev = values - mean_b
+        m2_b = np.dot(dev, dev)
+        m3_b = np.sum(dev**3)
+        m4_b = np.sum(dev**4)
+
+        n_a, n = self.n, self.n + n_b
+        delta = mean_b - self.mean
+        self.m4 += (
+            m4_b
+            + delta**4 * n_a * n_b * (n_a**2 - n_a * n_b + n_b**2) / n**3
+            + 6 * delta**2 * (n_a**2 * m2_b + n_b**2 * self.m2) / n**2
+            + 4 * delta * (n_a * m3_b - n_b * self.m3) / n
+        )
+        self.m3 += (
+            m3_b
+            + delta**3 * n_a * n_b * (n_a - n_b) / n**2
+            + 3 * delta * (n_a * m2_b - n_b * self.m2) / n
+        )
+        self.m2 += m2_b + delta**2 * n_a * n_b / n
+        self.mean += delta * n_b / n
+        self.n = n
+
+    def _min_width(self, value):
+        # Adding 1.0 is lost on magnitudes above ~1e16
+        return max(abs(value) * 1e-9, 1.0)
+
+    def _update_histogram(self, values):
+        low, high = values.min(), values.max()
+        if self.low is None:
+            self.low = low
+            self.high = high if high > low else low + self._min_width(low)
+        while low < self.low or high > self.high:
+            width = self.high - self.low
+            if not width > 0:
+                width = self._min_width(self.low)
+                self.high = self.low + width
+            merged = self.counts.reshape(-1, 2).sum(axis=1)
+            empty = np.zeros_like(merged)
+            if low < self.low:
+                self.low -= width
+                self.counts = np.concatenate([empty, merged])
+            else:
+                self.high += width
+                self.counts = np.concatenate([merged, empty])
+        self.counts += np.histogram(
+            values, bins=len(self.counts), range=(self.low, self.high)
+        )[0]
+
+    def result(self):
+        n = self.n
+        std = skew = kurtosis = None
+        # Same (bias corrected) estimators as pandas
+        if n > 1:
+            std = math.sqrt(self.m2 / (n - 1))
+        if n > 2 and self.m2 > 0:
+            g1 = math.sqrt(n) * self.m3 / self.m2**1.5
+            skew = math.sqrt(n * (n - 1)) / (n - 2) * g1
+        if n > 3 and self.m2 > 0:
+            g2 = n * self.m4 / self.m2**2 - 3
+            kurtosis = ((n + 1) * g2 + 6) * (n - 1) / ((n - 2) * (n - 3))
+
+        histogram = None
+        if self.low is not None:
+            edges = np.linspace(self.low, self.high, len(self.counts) + 1)
+            filled = np.flatnonzero(self.counts)
+            first, last = filled[0], filled[-1]
+            histogram = {
+                "edges": [float(edge) for edge in edges[first : last + 2]],
+                "counts": [int(count) for count in self.counts[first : last + 1]],
+            }
+
+        return {
+            "kind": "numeric",
+            "mean": _json_number(self.mean) if n else None,
+            "std": _json_number(std),
+            "skew": _json_number(skew),
+            "kurtosis": _json_number(kurtosis),
+            "min": _json_number(self.min),
+            "max": _json_number(self.max),
+            "infinite": self.infinite,
+            "histogram": histogram,
+        }
+
+
+class _CategoricalStats:
+    """Category counts of a non-numeric column, pruned to the most frequent."""
+
+    def __init__(self, distinct_cap):
+        self.distinct_cap = distinct_cap
+        self.counts = pd.Series(dtype=np.int64)
+        self.exact = True
+
+    def update(self, values):
+        chunk_counts = values.astype(str).value_counts()
+        self.counts = self.counts.add(chunk_counts, fill_value=0)
+        if len(self.counts) > self.distinct_cap:
+            # Keep memory bounded, counts of rare values become approximate
+            self.counts = self.counts.nlargest(self.distinct_cap // 2)
+            self.exact = False
+
+    def result(self, top_k):
+        top = self.counts.sort_values(ascending=False, kind="stable").head(top_k)
+        return {
+            "kind": "categorical",
+            "distinct": len(self.counts),
+            "distinct_exact": self.exact,
+            "top": [{"value": value, "count": int(count)} for value, count in top.items()],
+        }
+
+
+class _RowSample:
+    """
+    Uniform sample of `size` rows (every row when size is None).
+    Keeps the rows with the smallest hash of their row number, so every
+    partition samples the same rows.
+    """
+
+    def __init__(self, size, seed):
+        self.size = size
+        self.seed = seed
+        self.threshold = 1.0
+        self.parts = []
+        self.hashes = []
+        self.n_rows = 0
+
+    def add(self, row_numbers, df):
+        df = df.set_axis(row_numbers)
+        if self.size is None:
+            self.parts.append(df)
+            return
+        hashes = row_uniforms(row_numbers, self.seed)
+        keep = hashes <= self.threshold
+        self.parts.append(df[keep])
+        self.hashes.append(hashes[keep])
+        self.n_rows += int(keep.sum())
+        if self.n_rows > 2 * self.size:
+            self._shrink()
+
+    def _shrink(self):
+        hashes = np.concatenate(self.hashes)
+        df = pd.concat(self.parts)
+        if len(hashes) > self.size:
+            kept = np.argpartition(hashes, self.size - 1)[: self.size]
+            self.threshold = hashes[kept].max()
+            hashes, df = hashes[kept], df.iloc[kept]
+        self.parts, self.hashes, self.n_rows = [df], [hashes], len(hashes)
+
+    def result(self):
+        if not self.parts:
+            return pd.DataFrame()
+        if self.size is not None:
+            self._shrink()
+        else:
+            self.parts = [pd.concat(self.parts)]
+        return self.parts[0].sort_index()
+
+
+class _PartitionStatistics:
+    """Accumulators of a partition of the columns, updated chunk by chunk."""
+
+    def __init__(self, columns, numeric_columns, sample_size, seed):
+        self.columns = columns
+        self.numeric_columns = numeric_columns
+        self.accumulators = {
+            col: (
+                _NumericStats(settings.PROFILE_HISTOGRAM_BINS)
+                if col in numeric_columns
+                else _CategoricalStats(settings.PROFILE_DISTINCT_CAP)
+            )
+            for col in columns
+        }
+        self.missing = dict.fromkeys(columns, 0)
+        self.sample = _RowSample(sample_size, seed)
+        self.n_rows = 0
+
+    def update(self, chunk):
+        row_numbers = np.arange(self.n_rows, self.n_rows + len(chunk))
+        self.n_rows += len(chunk)
+
+        numeric = {}
+        for col in self.columns:
+            series = chunk[col]
+            if col in self.numeric_columns:
+                series = pd.to_numeric(series, errors="coerce")
+                numeric[col] = series
+            present = series.notna()
+            self.missing[col] += int(len(series) - present.sum())
+            if present.any():
+                values = series[present]
+                if col in self.numeric_columns:
+                    values = values.to_numpy(dtype=np.float64)
+                self.accumulators[col].update(values)
+        if numeric:
+            self.sample.add(row_numbers, pd.DataFrame(numeric))
+
+    def result(self):
+        """
+        Returns:
+            tuple: (column -> statistics, row sample of the numeric columns).
+        """
+        statistics = {}
+        for col, accumulator in self.accumulators.items():
+            if isinstance(accumulator, _NumericStats):
+                col_stats = accumulator.result()
+            else:
+                col_stats = accumulator.result(settings.PROFILE_TOP_K)
+            col_stats["count"] = self.n_rows - self.missing[col]
+            col_stats["missing"] = self.missing[col]
+            statistics[col] = col_stats
+        return statistics, self.sample.result()
+
+
+def _update_partition(source, partition, start_row):
+    """
+    Adds the rows from `start_row` on to the statistics of a partition of the
+    columns, in one chunked pass. Runs in a worker process.
+    """
+    for chunk in iter_source_chunks(
+        source, columns=partition.columns, raw=True, start_row=start_row
+    ):
+        partition.update(chunk)
+    return partition
+
+
+def _update_correlation(source, accumulator, start_row):
+    """
+    Adds the rows from `start_row` on to the correlation of the numeric
+    columns, in one chunked pass. Runs in a worker process.
+    """
+    for chunk in iter_source_chunks(
+        source, columns=accumulator.columns, raw=True, start_row=start_row
+    ):
+        accumulator.update(chunk)
+    return accumulator
+
+
+def _run_job(job):
+    """Runs a single (function, args) job."""
+    function, args = job
+    return function(*args)
+
+
+def _run_jobs(jobs, workers):
+    """Runs independent jobs, in parallel processes when allowed."""
+    workers = min(workers or 1, len(jobs))
+    if workers <= 1:
+        return [_run_job(job) for job in jobs]
+
+    # Spawned processes set Django up again, they only inherit the environment
+    try:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=django.setup,
+        ) as executor:
+            return list(executor.map(_run_job, jobs))
+    except (BrokenProcessPool, AssertionError, OSError) as e:
+        # Daemonic processes (e.g. some Celery pools) can't start children
+        logger.warning(f"Statistics process pool unavailable, running serially: {e}")
+        return [_run_job(job) for job in jobs]
+
+
+def _numeric_columns(dataset):
+    return [
+        col for col, dtype in (dataset.columns or {}).items() if is_numeric_dtype(dtype)
+    ]
+
+
+def _new_state(dataset, sample_size, workers):
+    """Returns empty accumulators for the columns of a dataset."""
+    columns = list(dataset.columns or {})
+    numeric_columns = _numeric_columns(dataset)
+    n_partitions = max(min(workers or 1, len(columns)), 1)
+    partitions = [columns[i::n_partitions] for i in range(n_partitions)]
+    return {
+        "version": STATE_VERSION,
+        "n_rows": 0,
+        "columns": columns,
+        "numeric_columns": numeric_columns,
+        "partitions": [
+            _PartitionStatistics(
+                partition,
+                set(numeric_columns) & set(partition),
+                sample_size or None,
+                settings.PROFILE_SAMPLE_SEED,
+            )
+            for partition in partitions
+            if partition
+        ],
+        "correlation": (
+            CorrelationAccumulator(numeric_columns)
+            if len(numeric_columns) > 1
+            else None
+        ),
+    }
+
+
+def state_matches(state, dataset):
+    """
+    Checks if saved accumulators can be continued with the rows of a dataset:
+    same columns, read the same way, and no more rows than it holds.
+    """
+    return (
+        state.get("version") == STATE_VERSION
+        and state["columns"] == list(dataset.columns or {})
+        and state["numeric_columns"] == _numeric_columns(dataset)
+        and state["n_rows"] <= dataset.n_rows
+    )
+
+
+def save_statistics_state(state, digest):
+    """
+    Saves the accumulators of the statistics of a dataset content, next to
+    its files. Returns the path relative to MEDIA_ROOT.
+    """
+    path = content_file_path(digest, ".stats.pkl")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path + ".tmp", "wb") as f:
+        pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(path + ".tmp", path)
+    return os.path.relpath(path, settings.MEDIA_ROOT)
+
+
+def load_statistics_state(dataset):
+    """
+    Loads the saved accumulators of a dataset, None if there are none.
+    The file is only ever written by save_statistics_state().
+    """
+    if not dataset.statistics_file or not os.path.exists(dataset.statistics_file.path):
+        return None
+    try:
+        with open(dataset.statistics_file.path, "rb") as f:
+            return pickle.load(f)
+    except Exception as e:
+        # e.g. saved by an older version of the accumulators
+        logger.warning(f"Could not load the statistics state of {dataset.pk}: {e}")
+        return None
+
+
+def compute_column_statistics(dataset, sample_size=None, workers=1, state=None):
+    """
+    Computes the statistics of every column of a dataset in a single pass.
+    The correlation of the numeric columns is accumulated by one more job
+    running alongside the column partitions.
+
+    Given the saved accumulators of the first rows of the dataset (see
+    state_matches), only the rows after them are read.
+
+    Args:
+        dataset (Dataset): The dataset to profile.
+        sample_size (int, optional): Rows in the sample used for quantiles and
+            density plots. PROFILE_SAMPLE_ROWS by default, 0 keeps every row.
+            A given state keeps its own sample size.
+        workers (int): Maximum number of worker processes.
+        state (dict, optional): Accumulators to continue.
+
+    Returns:
+        tuple: (statistics, sample, correlation, state). statistics holds
+        'n_rows', 'columns' (column -> statistics), 'sample' ({'rows',
+        'total_rows'}, None when every row was used) and 'correlation'
+        ({'top_pairs'}, the PROFILE_TOP_CORRELATIONS most correlated pairs).
+        sample is a dataframe of the sampled rows of the numeric columns,
+        correlation the matrix of the numeric columns (None if there are less
+        than two) and state the updated accumulators, to save.
+    """
+    if sample_size is None:
+        sample_size = settings.PROFILE_SAMPLE_ROWS
+    if state is None:
+        state = _new_state(dataset, sample_size, workers)
+    columns = state["columns"]
+    numeric_columns = state["numeric_columns"]
+    start_row = state["n_rows"]
+
+    source = dataset_source(dataset)
+    jobs = [
+        (_update_partition, (source, partition, start_row))
+        for partition in state["partitions"]
+    ]
+    if state["correlation"] is not None:
+        jobs.append((_update_correlation, (source, state["correlation"], start_row)))
+    results = _run_jobs(jobs, workers)
+
+    # Worker processes return updated copies
+    correlation = None
+    if state["correlation"] is not None:
+        state["correlation"] = results.pop()
+        correlation = state["correlation"].correlation()
+    state["partitions"] = results
+    n_rows = results[0].n_rows if results else start_row
+    state["n_rows"] = n_rows
+
+    by_column = {}
+    samples = []
+    for partition in results:
+        partition_stats, partition_sample = partition.result()
+        by_column.update(partition_stats)
+        if not partition_sample.empty:
+            samples.append(partition_sample)
+    sample = pd.concat(samples, axis=1) if samples else pd.DataFrame()
+
+    # Quantiles and density from the sample, exact when it holds every row
+    for col in numeric_columns:
+        values = sample[col].dropna() if col in sample else pd.Series(dtype=float)
+        by_column[col]["quantiles"] = {
+            f"{q:.0%}": _json_number(values.quantile(q)) if len(values) else None
+            for q in QUANTILES
+        }
+        by_column[col]["kde"] = kde_grid(
+            values.to_numpy(dtype=np.float64),
+            by_column[col]["min"],
+            by_column[col]["max"],
+            settings.PROFILE_KDE_POINTS,
+        )
+
+    statistics = {
+        "n_rows": n_rows,
+        "columns": {col: by_column[col] for col in columns},
+        "sample": (
+            {"rows": len(sample), "total_rows": n_rows}
+            if numeric_columns and len(sample) < n_rows
+            else None
+        ),
+        "correlation": {
+            "top_pairs": (
+                top_correlated_pairs(correlation, settings.PROFILE_TOP_CORRELATIONS)
+                if correlation is not None
+                else []
+            )
+        },
+    }
+    return statistics, sample.reset_index(drop=True), correlation, state
@@ -0,0 +1,707 @@
+"""Storage helpers for dataset files"""
+
+import hashlib
+import logging
+import os
+import uuid
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from django.conf import settings
+
+from .column_cache import delete_column_cache, load_column_cache, write_column_cache
+from .dtypes import DtypeProfiler, apply_dtypes, extend_dtypes
+from .models import Dataset
+
+logger = logging.getLogger(__name__)
+
+# Column types ordered from narrowest to widest, a column is only ever widened
+SCHEMA_DTYPES = ["bool", "int64", "float64", "object"]
+ARROW_TYPES = {
+    "bool": pa.bool_(),
+    "int64": pa.int64(),
+    "float64": pa.float64(),
+    "object": pa.string(),
+}
+
+
+class SchemaChanged(Exception):
+    """Raised when chunks hold values wider than the inferred column types."""
+
+    def __init__(self, widened):
+        described = ", ".join(f"'{col}' to {dtype}" for col, dtype in widened.items())
+        super().__init__(f"Columns widened: {described}")
+        self.widened = widened
+
+
+def new_csv_filename(name):
+    """Returns a unique CSV filename for a dataset name."""
+    return f"{name.replace(' ', '_')}_{uuid.uuid4().hex[:8]}.csv"
+
+
+def new_content_hash(separator=",", encoding="utf-8"):
+    """
+    Starts the SHA-256 content hash of a dataset file.
+    The parsing options are hashed too, the same bytes read differently are
+    a different dataset.
+    """
+    content_hash = hashlib.sha256()
+    content_hash.update(f"{separator}\0{encoding}\0".encode("utf-8"))
+    return content_hash
+
+
+def content_file_path(digest, extension):
+    """Returns the absolute content-addressed path of a dataset file."""
+    return os.path.join(settings.DATASETS_DIR, digest[:2], f"{digest}{extension}")
+
+
+def store_content_file(path, digest, extension):
+    """
+    Moves a file to its content-addressed path. If that content is already
+    stored the file is dropped and the stored one is shared.
+    Returns the path relative to MEDIA_ROOT.
+    """
+    stored_path = content_file_path(digest, extension)
+    if os.path.exists(stored_path):
+        os.remove(path)
+    else:
+        os.makedirs(os.path.dirname(stored_path), exist_ok=True)
+        os.replace(path, stored_path)
+    return os.path.relpath(stored_path, settings.MEDIA_ROOT)
+
+
+class DatasetWriter:
+    """
+    Writes a new dataset chunk by chunk, to a CSV file and its Parquet copy.
+
+    Memory is bounded by the size of the chunks given to write(). If a chunk
+    can't be stored with the Parquet schema (e.g. mixed-type columns), the
+    Parquet copy is dropped and only the CSV is kept.
+
+    The CSV is hashed while written, on close() both files are moved to their
+    content-addressed paths (shared with identical datasets).
+
+    Args:
+        name (str): Name of the dataset, used for the filename.
+        arrow_schema (pa.Schema, optional): Parquet schema, inferred from the
+            first chunk when not given.
+        columns (dict, optional): Column name -> dtype to record on the Dataset,
+            taken from the chunks when not given (widened as chunks come in).
+    """
+
+    def __init__(self, name, arrow_schema=None, columns=None):
+        self.csv_filename = new_csv_filename(name)
+        self.csv_path = os.path.join(settings.DATASETS_DIR, self.csv_filename)
+        self.parquet_path = os.path.splitext(self.csv_path)[0] + ".parquet"
+        self.arrow_schema = arrow_schema
+        self.columns = dict(columns) if columns else None
+        self._infer_columns = not columns
+        self.n_rows = 0
+        self._profiler = DtypeProfiler()
+        self._header_written = False
+        self._content_hash = new_content_hash()
+        self._csv = open(self.csv_path, "wb")
+        self._parquet = None
+        self._parquet_failed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.discard()
+
+    def write(self, df):
+        """Appends the rows of a dataframe."""
+        data = df.to_csv(index=False, header=not self._header_written).encode("utf-8")
+        self._csv.write(data)
+        self._content_hash.update(data)
+        self._header_written = True
+        if self._infer_columns:
+            self._update_columns(df)
+        self._profiler.update(df)
+        self._write_parquet(df)
+        self.n_rows += len(df)
+
+    def _update_columns(self, df):
+        if self.columns is None:
+            self.columns = {col: str(dtype) for col, dtype in df.dtypes.items()}
+            return
+        # A later chunk may hold wider values (e.g. text or empty rows after ints)
+        for col, dtype in df.dtypes.items():
+            current, dtype = self.columns.get(col), str(dtype)
+            if current == dtype:
+                continue
+            self.columns[col] = widest_dtype(
+                current if current in SCHEMA_DTYPES else "object",
+                dtype if dtype in SCHEMA_DTYPES else "object",
+            )
+
+    def _write_parquet(self, df):
+        if self._parquet_failed:
+            return
+        try:
+            if self._parquet is None:
+                if self.arrow_schema is None:
+                    self.arrow_schema = pa.Schema.from_pandas(df, preserve_index=False)
+                self._parquet = pq.ParquetWriter(self.parquet_path, self.arrow_schema)
+            table = pa.Table.from_pandas(
+                df, schema=self.arrow_schema, preserve_index=False
+            )
+            self._parquet.write_table(
+                table, row_group_size=settings.DATASET_ROW_GROUP_ROWS
+            )
+        except Exception as e:
+            # Mixed-type object columns can't be stored as Parquet, keep CSV only
+            logger.warning(f"Could not write columnar copy for {self.csv_path}: {e}")
+            self._parquet_failed = True
+            self._close_parquet()
+            if os.path.exists(self.parquet_path):
+                os.remove(self.parquet_path)
+
+    def _close_parquet(self):
+        if self._parquet is not None:
+            self._parquet.close()
+            self._parquet = None
+
+    def close(self):
+        """
+        Finishes writing the files.
+
+        Returns:
+            dict: 'file' and 'columnar_file' (relative to MEDIA_ROOT, the latter
+            None if there is no Parquet copy), 'content_hash', 'columns',
+            'dtypes' (compact dtypes, see DtypeProfiler) and 'n_rows'.
+        """
+        # Nothing was written, still leave a valid file with the header
+        if not self._header_written and self.columns:
+            self.write(pd.DataFrame(columns=list(self.columns)))
+        self._csv.close()
+        self._close_parquet()
+
+        digest = self._content_hash.hexdigest()
+        columnar_file = None
+        if not self._parquet_failed and os.path.exists(self.parquet_path):
+            columnar_file = store_content_file(self.parquet_path, digest, ".parquet")
+        return {
+            "file": store_content_file(self.csv_path, digest, ".csv"),
+            "columnar_file": columnar_file,
+            "content_hash": digest,
+            "columns": self.columns or {},
+            "dtypes": self._profiler.dtypes(),
+            "n_rows": self.n_rows,
+        }
+
+    def discard(self):
+        """Closes and removes the files written so far."""
+        self._csv.close()
+        self._close_parquet()
+        for path in (self.csv_path, self.parquet_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def save_upload(uploaded_file, path, content_hash=None):
+    """
+    Streams an uploaded file to disk chunk by chunk.
+    The chunks are added to `content_hash` (see new_content_hash) when given.
+    """
+    with open(path, "wb") as f:
+        for chunk in uploaded_file.chunks():
+            f.write(chunk)
+            if content_hash is not None:
+                content_hash.update(chunk)
+
+
+def _chunk_dtype(series):
+    """Returns the schema type of a parsed chunk column, None if it is all empty."""
+    if series.isna().all():
+        return None
+    kind = series.dtype.kind
+    if kind == "b":
+        return "bool"
+    if kind in "iu":
+        return "int64"
+    if kind == "f":
+        return "float64"
+    return "object"
+
+
+def widest_dtype(dtype_a, dtype_b):
+    """Returns the widest of two schema types."""
+    if dtype_a is None:
+        return dtype_b
+    if dtype_b is None:
+        return dtype_a
+    return max(dtype_a, dtype_b, key=SCHEMA_DTYPES.index)
+
+
+def _read_csv_chunks(csv_path, separator, encoding, schema=None):
+    """Iterates over a CSV file in chunks of DATASET_CHUNK_ROWS rows."""
+    # Text columns keep their raw values instead of being parsed as numbers
+    dtype = {
+        col: "str" for col, col_dtype in (schema or {}).items() if col_dtype == "object"
+    }
+    return pd.read_csv(
+        csv_path,
+        sep=separator,
+        encoding=encoding,
+        chunksize=settings.DATASET_CHUNK_ROWS,
+        dtype=dtype or None,
+    )
+
+
+def infer_csv_schema(csv_path, separator, encoding):
+    """Infers the column types of a CSV file from its first chunks."""
+    schema = {}
+    with _read_csv_chunks(csv_path, separator, encoding) as reader:
+        for i, chunk in enumerate(reader):
+            for col in chunk.columns:
+                schema[col] = widest_dtype(schema.get(col), _chunk_dtype(chunk[col]))
+            if i + 1 >= settings.DATASET_SCHEMA_INFERENCE_CHUNKS:
+                break
+    # Columns without any value are read as floats, like pandas does
+    return {col: col_dtype or "float64" for col, col_dtype in schema.items()}
+
+
+def _write_parquet_from_csv(csv_path, parquet_path, separator, encoding, schema):
+    """
+    Converts a CSV file to Parquet one chunk at a time.
+    Returns the number of rows written and the compact dtypes of the columns.
+
+    Raises SchemaChanged when chunks don't fit the given schema. From the
+    first such chunk on, the rest of the file is only scanned to find every
+    column to widen, so the conversion is retried once.
+    """
+    arrow_schema = pa.schema(
+        [(col, ARROW_TYPES[col_dtype]) for col, col_dtype in schema.items()]
+    )
+    n_rows = 0
+    profiler = DtypeProfiler()
+    widened = {}
+    with pq.ParquetWriter(parquet_path, arrow_schema) as writer:
+        with _read_csv_chunks(csv_path, separator, encoding, schema) as reader:
+            for chunk in reader:
+                for col, col_dtype in schema.items():
+                    current = widened.get(col, col_dtype)
+                    dtype = widest_dtype(current, _chunk_dtype(chunk[col]))
+                    if dtype != col_dtype:
+                        widened[col] = dtype
+                if widened:
+                    continue
+                table = pa.Table.from_pandas(
+                    chunk, schema=arrow_schema, preserve_index=False
+                )
+                writer.write_table(
+                    table, row_group_size=settings.DATASET_ROW_GROUP_ROWS
+                )
+                profiler.update(chunk)
+                n_rows += len(chunk)
+    if widened:
+        raise SchemaChanged(widened)
+    return n_rows, profiler.dtypes()
+
+
+def ingest_csv(csv_path, separator=",", encoding="utf-8"):
+    """
+    Scans a CSV file stored on disk with bounded memory.
+    Infers the schema, counts the rows, picks the compact dtypes and writes
+    the Parquet copy.
+
+    Returns:
+        dict: 'columns' (name -> dtype), 'dtypes' (compact dtypes), 'n_rows'
+        and 'columnar_path' (relative to MEDIA_ROOT).
+    """
+    schema = infer_csv_schema(csv_path, separator, encoding)
+    parquet_path = os.path.splitext(csv_path)[0] + ".parquet"
+
+    # Later chunks may hold wider values than the first ones, widen and retry
+    # (once, every column to widen is found by the first pass)
+    while True:
+        try:
+            n_rows, dtypes = _write_parquet_from_csv(
+                csv_path, parquet_path, separator, encoding, schema
+            )
+            break
+        except SchemaChanged as e:
+            logger.info(f"Re-reading {csv_path}: {e}")
+            schema.update(e.widened)
+
+    return {
+        "columns": schema,
+        "dtypes": dtypes,
+        "n_rows": n_rows,
+        "columnar_path": os.path.relpath(parquet_path, settings.MEDIA_ROOT),
+    }
+
+
+def _read_parquet_compact(parquet_path, columns, dtypes):
+    """
+    Reads a Parquet file one column at a time, each column converted to its
+    compact dtype before the next one is read.
+    """
+    names = columns or pq.read_schema(parquet_path).names
+    data = {}
+    for col in names:
+        column = pd.read_parquet(parquet_path, columns=[col])
+        data[col] = apply_dtypes(column, dtypes)[col]
+        del column
+    return pd.DataFrame(data, columns=names, copy=False)
+
+
+def load_dataset_df(dataset, columns=None):
+    """
+    Loads a Dataset as a dataframe, with its compact dtypes.
+    Reads the Parquet copy when available and falls back to parsing the CSV.
+    The compact dtypes are applied while reading, one Parquet column or CSV
+    chunk at a time, so the dataset is never held with its default types.
+
+    With DATASET_COLUMN_CACHE set, the first full load writes the memory-mapped
+    column cache (see column_cache.py) and later loads map it instead.
+
+    Args:
+        dataset (Dataset): The dataset to load.
+        columns (list, optional): Subset of columns to read.
+    """
+    use_cache = settings.DATASET_COLUMN_CACHE and dataset.content_hash
+    if use_cache:
+        cache_path = content_file_path(dataset.content_hash, ".columns")
+        df = load_column_cache(cache_path, columns)
+        if df is not None:
+            return df
+
+    if dataset.columnar_file and os.path.exists(dataset.columnar_file.path):
+        df = _read_parquet_compact(dataset.columnar_file.path, columns, dataset.dtypes)
+    else:
+        chunks = list(iter_dataset_chunks(dataset, columns=columns))
+        if chunks:
+            df = pd.concat(chunks, ignore_index=True)
+        else:
+            df = pd.read_csv(
+                dataset.file.path,
+                sep=dataset.separator,
+                encoding=dataset.encoding,
+                usecols=columns,
+                nrows=0,
+            )
+    if use_cache and columns is None:
+        write_column_cache(cache_path, df)
+    return df
+
+
+def dataset_source(dataset):
+    """
+    Returns the absolute paths and read options of a Dataset's files, to read
+    them without the model (e.g. from worker processes).
+    """
+    columnar_path = None
+    if dataset.columnar_file and os.path.exists(dataset.columnar_file.path):
+        columnar_path = dataset.columnar_file.path
+    return {
+        "csv_path": dataset.file.path,
+        "columnar_path": columnar_path,
+        "separator": dataset.separator,
+        "encoding": dataset.encoding,
+        "dtypes": dataset.dtypes,
+    }
+
+
+def _row_groups_window(metadata, offset, limit=None):
+    """
+    Finds the row groups of a Parquet file holding the rows
+    [offset, offset + limit) (to the end when limit is None), from the row
+    counts in the file footer.
+
+    Returns:
+        tuple: (row group indices, number of the first row of the first group).
+    """
+    end = None if limit is None else offset + limit
+    groups, first_row, group_start = [], None, 0
+    for i in range(metadata.num_row_groups):
+        group_end = group_start + metadata.row_group(i).num_rows
+        if group_end > offset and (end is None or group_start < end):
+            if first_row is None:
+                first_row = group_start
+            groups.append(i)
+        group_start = group_end
+    return groups, first_row
+
+
+def iter_source_chunks(source, columns=None, raw=False, start_row=0):
+    """
+    Iterates over the files described by dataset_source() in dataframes of at
+    most DATASET_CHUNK_ROWS rows, from row `start_row` on. Reads the Parquet
+    copy when available and falls back to the CSV. Chunks get the compact
+    dtypes of the dataset unless `raw` is set, as needed to write them to a
+    new dataset.
+    """
+    dtypes = None if raw else source["dtypes"]
+    if source["columnar_path"]:
+        parquet_file = pq.ParquetFile(source["columnar_path"])
+        # Row groups before start_row aren't read
+        groups, first_row = _row_groups_window(parquet_file.metadata, start_row)
+        if not groups:
+            return
+        skip = start_row - first_row
+        for batch in parquet_file.iter_batches(
+            batch_size=settings.DATASET_CHUNK_ROWS, row_groups=groups, columns=columns
+        ):
+            if skip:
+                dropped = min(skip, batch.num_rows)
+                batch, skip = batch.slice(dropped), skip - dropped
+                if not batch.num_rows:
+                    continue
+            yield apply_dtypes(batch.to_pandas(), dtypes)
+        return
+
+    with pd.read_csv(
+        source["csv_path"],
+        sep=source["separator"],
+        encoding=source["encoding"],
+        usecols=columns,
+        skiprows=range(1, start_row + 1) if start_row else None,
+        chunksize=settings.DATASET_CHUNK_ROWS,
+    ) as reader:
+        for chunk in reader:
+            yield apply_dtypes(chunk, dtypes)
+
+
+def iter_dataset_chunks(dataset, columns=None, raw=False, start_row=0):
+    """Iterates over a Dataset in chunks, see iter_source_chunks()."""
+    return iter_source_chunks(
+        dataset_source(dataset), columns=columns, raw=raw, start_row=start_row
+    )
+
+
+def read_dataset_rows(dataset, offset, limit):
+    """
+    Reads the rows [offset, offset + limit) of a Dataset.
+
+    The row groups of the Parquet copy (DATASET_ROW_GROUP_ROWS rows each) act
+    as the row index: the group holding a row is found from the row counts in
+    the file footer, and only the groups covering the window are read.
+    Datasets without a Parquet copy are parsed from the start of the CSV.
+    """
+    if dataset.columnar_file and os.path.exists(dataset.columnar_file.path):
+        parquet_file = pq.ParquetFile(dataset.columnar_file.path)
+        groups, first_row = _row_groups_window(parquet_file.metadata, offset, limit)
+        if not groups:
+            return parquet_file.schema_arrow.empty_table().to_pandas()
+        df = parquet_file.read_row_groups(groups).to_pandas()
+        start = offset - first_row
+        return df.iloc[start : start + limit].reset_index(drop=True)
+
+    return pd.read_csv(
+        dataset.file.path,
+        sep=dataset.separator,
+        encoding=dataset.encoding,
+        skiprows=range(1, offset + 1),
+        nrows=limit,
+    )
+
+
+def dataset_arrow_schema(dataset):
+    """Returns the Parquet schema of a Dataset, or None if it has no Parquet copy."""
+    if dataset.columnar_file and os.path.exists(dataset.columnar_file.path):
+        return pq.read_schema(dataset.columnar_file.path).remove_metadata()
+    return None
+
+
+def _schema_columns(dataset):
+    """Returns the columns of a dataset with their schema type."""
+    # Types written by DatasetWriter (e.g. 'str') are text in the schema
+    return {
+        col: dtype if dtype in SCHEMA_DTYPES else "object"
+        for col, dtype in dataset.columns.items()
+    }
+
+
+def _appended_columns(dataset, csv_path):
+    """
+    Checks the rows of a CSV file to append to a dataset against its columns,
+    in one chunked pass.
+    The file must hold the same columns (in any order) with compatible values,
+    integer columns are widened to floats when the new values need it.
+
+    Returns:
+        tuple: (columns with their schema types, widened or not, DtypeProfiler
+        of the new rows, number of new rows).
+    """
+    header = pd.read_csv(
+        csv_path, sep=dataset.separator, encoding=dataset.encoding, nrows=0
+    ).columns
+    missing = [col for col in dataset.columns if col not in header]
+    unexpected = [col for col in header if col not in dataset.columns]
+    if missing or unexpected:
+        raise ValueError(
+            "The columns don't match the dataset "
+            f"(missing: {missing or 'none'}, unexpected: {unexpected or 'none'})."
+        )
+
+    columns = _schema_columns(dataset)
+    profiler = DtypeProfiler()
+    n_rows = 0
+    with _read_csv_chunks(
+        csv_path, dataset.separator, dataset.encoding, columns
+    ) as reader:
+        for chunk in reader:
+            for col, col_dtype in columns.items():
+                chunk_dtype = _chunk_dtype(chunk[col])
+                widened = widest_dtype(col_dtype, chunk_dtype)
+                if widened == col_dtype:
+                    continue
+                if (col_dtype, widened) != ("int64", "float64"):
+                    raise ValueError(
+                        f"Column '{col}' holds {chunk_dtype} values, "
+                        f"the dataset stores {col_dtype}."
+                    )
+                columns[col] = widened
+            profiler.update(chunk)
+            n_rows += len(chunk)
+    if not n_rows:
+        raise ValueError("The file holds no rows.")
+    return columns, profiler, n_rows
+
+
+def append_csv_rows(dataset, csv_path):
+    """
+    Appends the rows of a CSV file to a dataset's files. The file is read
+    with the dataset's separator and encoding and must hold the same columns.
+
+    Stored files are shared by content, so they are never changed: new files
+    are written with the stored rows copied as they are (the CSV bytes and the
+    Parquet row groups, nothing is parsed again) followed by the new rows.
+
+    Returns:
+        dict: The new files and schema, in the format of DatasetWriter.close().
+        The caller updates the Dataset and removes the previous files.
+
+    Raises:
+        ValueError: When the columns or their values don't match the dataset.
+    """
+    columns, profiler, n_new_rows = _appended_columns(dataset, csv_path)
+    order = list(dataset.columns)
+    # Integer columns holding floats in the new rows
+    widened = [
+        col
+        for col, col_dtype in _schema_columns(dataset).items()
+        if columns[col] != col_dtype
+    ]
+
+    new_csv_path = os.path.join(settings.DATASETS_DIR, new_csv_filename(dataset.name))
+    new_parquet_path = os.path.splitext(new_csv_path)[0] + ".parquet"
+    content_hash = new_content_hash(dataset.separator, dataset.encoding)
+
+    parquet_writer = None
+    arrow_schema = None
+    if dataset.columnar_file and os.path.exists(dataset.columnar_file.path):
+        parquet_file = pq.ParquetFile(dataset.columnar_file.path)
+        arrow_schema = parquet_file.schema_arrow.remove_metadata()
+        for col in widened:
+            index = arrow_schema.get_field_index(col)
+            arrow_schema = arrow_schema.set(index, pa.field(col, pa.float64()))
+
+    try:
+        with open(new_csv_path, "wb") as new_csv:
+            # Stored rows, the bytes are copied as they are
+            with open(dataset.file.path, "rb") as stored_csv:
+                last = b"\n"
+                while data := stored_csv.read(1024 * 1024):
+                    new_csv.write(data)
+                    content_hash.update(data)
+                    last = data[-1:]
+            if last != b"\n":
+                new_csv.write(b"\n")
+                content_hash.update(b"\n")
+
+            if arrow_schema is not None:
+                parquet_writer = pq.ParquetWriter(new_parquet_path, arrow_schema)
+                for i in range(parquet_file.num_row_groups):
+                    parquet_writer.write_table(
+                        parquet_file.read_row_group(i).cast(arrow_schema)
+                    )
+
+            # New rows, in the column order of the dataset
+            with _read_csv_chunks(
+                csv_path, dataset.separator, dataset.encoding, columns
+            ) as reader:
+                for chunk in reader:
+                    chunk = chunk[order]
+                    data = chunk.to_csv(
+                        index=False, header=False, sep=dataset.separator
+                    ).encode(dataset.encoding)
+                    new_csv.write(data)
+                    content_hash.update(data)
+                    if parquet_writer is not None:
+                        table = pa.Table.from_pandas(
+                            chunk, schema=arrow_schema, preserve_index=False
+                        )
+                        parquet_writer.write_table(
+                            table, row_group_size=settings.DATASET_ROW_GROUP_ROWS
+                        )
+        if parquet_writer is not None:
+            parquet_writer.close()
+    except Exception:
+        if parquet_writer is not None:
+            parquet_writer.close()
+        for path in (new_csv_path, new_parquet_path):
+            if os.path.exists(path):
+                os.remove(path)
+        raise
+
+    digest = content_hash.hexdigest()
+    columnar_file = None
+    if parquet_writer is not None:
+        columnar_file = store_content_file(new_parquet_path, digest, ".parquet")
+    return {
+        "file": store_content_file(new_csv_path, digest, ".csv"),
+        "columnar_file": columnar_file,
+        "content_hash": digest,
+        # The recorded types are kept, but for the widened columns
+        "columns": {
+            col: columns[col] if col in widened else dtype
+            for col, dtype in dataset.columns.items()
+        },
+        "dtypes": extend_dtypes(dataset.dtypes, profiler),
+        "n_rows": dataset.n_rows + n_new_rows,
+    }
+
+
+def delete_dataset_files(dataset):
+    """
+    Removes the CSV file, the columnar copy and the statistics state of a
+    dataset from disk.
+    Files shared with other datasets (identical content) are kept until
+    their last reference is deleted.
+    """
+    for field in (dataset.file, dataset.columnar_file, dataset.statistics_file):
+        if not field or not os.path.exists(field.path):
+            continue
+        references = Dataset.objects.filter(**{field.field.name: field.name})
+        if references.exclude(pk=dataset.pk).exists():
+            continue
+        os.remove(field.path)
+    if dataset.content_hash:
+        delete_unused_column_cache(dataset.content_hash, exclude_pk=dataset.pk)
+
+
+def delete_unused_column_cache(digest, exclude_pk=None):
+    """Removes the column cache of a content no other dataset holds."""
+    references = Dataset.objects.filter(content_hash=digest)
+    if exclude_pk is not None:
+        references = references.exclude(pk=exclude_pk)
+    if not references.exists():
+        delete_column_cache(content_file_path(digest, ".columns"))
+
+
+def delete_replaced_file(field):
+    """
+    Removes a file a dataset no longer uses (e.g. after appending rows), once
+    the dataset is saved with its new file. Shared files are kept.
+    """
+    if not field or not os.path.exists(field.path):
+        return
+    if Dataset.objects.filter(**{field.field.name: field.name}).exists():
+        return
+    os.remove(field.path)
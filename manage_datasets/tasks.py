@@ -0,0 +1,230 @@
+# celery -A cidra_ML worker -l info -P solo
+import logging
+import os
+import traceback
+
+from celery import shared_task
+from django.conf import settings
+
+from .imports import iter_csv_members, member_dataset_name, stage_member
+from .models import Dataset, DatasetImport, DatasetImportFile
+from .profiling import build_dataset_profile
+from .statistics import (
+    compute_column_statistics,
+    load_statistics_state,
+    save_statistics_state,
+    state_matches,
+)
+from .storage import delete_replaced_file, read_dataset_rows
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def generate_dataset_profile_task(dataset_id, sample_size=None, incremental=False):
+    """
+    Celery task to generate and cache the visualization profile of a dataset.
+    The column statistics are computed in one pass, the profile is built from
+    them. sample_size overrides the plot row budget, 0 uses every row.
+    With incremental set (rows were appended), the saved statistics are
+    continued with the new rows only, when they still match the dataset.
+    """
+    logger.info(f"Starting profile generation for Dataset ID: {dataset_id}")
+    try:
+        dataset = Dataset.objects.get(id=dataset_id)
+    except Dataset.DoesNotExist:
+        logger.error(f"Dataset with id={dataset_id} not found. Aborting profile task.")
+        return
+
+    dataset.profile_status = Dataset.PROFILE_RUNNING
+    dataset.profile_error = None
+    dataset.save(update_fields=["profile_status", "profile_error"])
+
+    try:
+        state = load_statistics_state(dataset) if incremental else None
+        if state is not None and not state_matches(state, dataset):
+            logger.info(f"Statistics of Dataset ID: {dataset_id} changed, recomputing.")
+            state = None
+        column_stats, sample_df, corr_matrix, state = compute_column_statistics(
+            dataset, sample_size, workers=settings.PROFILE_STATS_WORKERS, state=state
+        )
+        dtypes = dict(dataset.columns or {})
+        dtypes.update(
+            {col: entry["dtype"] for col, entry in (dataset.dtypes or {}).items()}
+        )
+        plots, stats, head = build_dataset_profile(
+            column_stats,
+            sample_df,
+            corr_matrix,
+            read_dataset_rows(dataset, 0, 5),
+            dtypes,
+        )
+
+        # Rows appended meanwhile have queued a newer profile
+        current_hash = (
+            Dataset.objects.filter(pk=dataset.pk)
+            .values_list("content_hash", flat=True)
+            .first()
+        )
+        if current_hash != dataset.content_hash:
+            logger.info(f"Dataset ID: {dataset_id} changed, discarding its profile.")
+            return
+
+        previous_statistics_file = dataset.statistics_file
+        statistics_file = save_statistics_state(
+            state, dataset.content_hash or f"dataset-{dataset.pk}"
+        )
+        dataset.column_stats = column_stats
+        dataset.statistics_file = statistics_file
+        dataset.plots_context = plots
+        dataset.stats_context = stats
+        dataset.head_context = head
+        dataset.profile_status = Dataset.PROFILE_COMPLETED
+        dataset.save(
+            update_fields=[
+                "column_stats",
+                "statistics_file",
+                "plots_context",
+                "stats_context",
+                "head_context",
+                "profile_status",
+            ]
+        )
+
+        # Datasets with identical content share the profile
+        if dataset.content_hash:
+            Dataset.objects.filter(content_hash=dataset.content_hash).exclude(
+                pk=dataset.pk
+            ).update(
+                column_stats=column_stats,
+                statistics_file=statistics_file,
+                plots_context=plots,
+                stats_context=stats,
+                head_context=head,
+                profile_status=Dataset.PROFILE_COMPLETED,
+                profile_error=None,
+            )
+        if previous_statistics_file.name != statistics_file:
+            delete_replaced_file(previous_statistics_file)
+        logger.info(f"Profile for Dataset ID: {dataset_id} completed successfully.")
+
+    except Exception as e:
+        logger.error(
+            f"An error occurred during profiling for Dataset ID: {dataset_id}. Error: {e}"
+        )
+        dataset.profile_status = Dataset.PROFILE_FAILED
+        dataset.profile_error = traceback.format_exc()
+        dataset.save(update_fields=["profile_status", "profile_error"])
+
+        # Datasets waiting for this shared profile won't get it
+        if dataset.content_hash:
+            Dataset.objects.filter(
+                content_hash=dataset.content_hash,
+                profile_status__in=[Dataset.PROFILE_PENDING, Dataset.PROFILE_RUNNING],
+            ).exclude(pk=dataset.pk).update(
+                profile_status=Dataset.PROFILE_FAILED,
+                profile_error=dataset.profile_error,
+            )
+
+
+@shared_task
+def import_dataset_archive_task(import_id):
+    """
+    Celery task to extract the CSV files of an uploaded archive in one pass.
+    Each file is staged and queued to its own ingestion task as soon as it is
+    extracted, the archive is removed at the end.
+    """
+    logger.info(f"Starting extraction of DatasetImport ID: {import_id}")
+    try:
+        dataset_import = DatasetImport.objects.get(id=import_id)
+    except DatasetImport.DoesNotExist:
+        logger.error(
+            f"DatasetImport with id={import_id} not found. Aborting import task."
+        )
+        return
+
+    dataset_import.status = DatasetImport.STATUS_RUNNING
+    dataset_import.save(update_fields=["status"])
+
+    try:
+        n_files = 0
+        for member, member_file in iter_csv_members(dataset_import.archive.path):
+            path, digest = stage_member(
+                member_file, dataset_import.separator, dataset_import.encoding
+            )
+            import_file = DatasetImportFile.objects.create(
+                dataset_import=dataset_import,
+                member=member,
+                staged_file=os.path.relpath(path, settings.MEDIA_ROOT),
+                content_hash=digest,
+            )
+            import_dataset_file_task.delay(import_file.id)
+            n_files += 1
+        if not n_files:
+            raise ValueError("The archive holds no CSV files.")
+        dataset_import.status = DatasetImport.STATUS_COMPLETED
+        logger.info(f"Extracted {n_files} files of DatasetImport ID: {import_id}")
+
+    except Exception as e:
+        logger.error(
+            f"An error occurred extracting DatasetImport ID: {import_id}. Error: {e}"
+        )
+        dataset_import.status = DatasetImport.STATUS_FAILED
+        dataset_import.error = f"Error reading the archive: {e}"
+
+    finally:
+        if dataset_import.archive and os.path.exists(dataset_import.archive.path):
+            os.remove(dataset_import.archive.path)
+        dataset_import.archive = None
+        dataset_import.save(update_fields=["status", "error", "archive"])
+
+
+@shared_task
+def import_dataset_file_task(import_file_id):
+    """
+    Celery task to ingest a staged CSV file of a bulk import as a new Dataset,
+    named after the file.
+    """
+    # records queues the profile task of this module
+    from .records import create_dataset_from_csv
+
+    try:
+        import_file = DatasetImportFile.objects.select_related(
+            "dataset_import", "dataset_import__uploaded_by"
+        ).get(id=import_file_id)
+    except DatasetImportFile.DoesNotExist:
+        logger.error(
+            f"DatasetImportFile with id={import_file_id} not found. Aborting import task."
+        )
+        return
+
+    import_file.status = DatasetImport.STATUS_RUNNING
+    import_file.save(update_fields=["status"])
+    dataset_import = import_file.dataset_import
+    staged_path = os.path.join(settings.MEDIA_ROOT, import_file.staged_file)
+
+    try:
+        import_file.dataset = create_dataset_from_csv(
+            member_dataset_name(import_file.member),
+            dataset_import.description
+            or f"Imported from '{dataset_import.name}' ({import_file.member})",
+            staged_path,
+            import_file.content_hash,
+            dataset_import.separator,
+            dataset_import.encoding,
+            dataset_import.uploaded_by,
+        )
+        import_file.status = DatasetImport.STATUS_COMPLETED
+        logger.info(
+            f"Imported '{import_file.member}' as Dataset ID: {import_file.dataset.id}"
+        )
+
+    except Exception as e:
+        logger.error(f"An error occurred importing '{import_file.member}'. Error: {e}")
+        import_file.status = DatasetImport.STATUS_FAILED
+        import_file.error = f"Error reading the file: {e}"
+        if os.path.exists(staged_path):
+            os.remove(staged_path)
+
+    import_file.staged_file = None
+    import_file.save(update_fields=["dataset", "status", "error", "staged_file"])
@@ -1,3 +1,314 @@
-from django.test import TestCase
+import math
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from django.conf import settings
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from .correlation import CorrelationAccumulator
+from . import storage
+from .models import Dataset
+from .operations import row_uniforms
+from .profiling import describe_table
+from .statistics import _NumericStats, _PartitionStatistics, compute_column_statistics
+from .storage import DatasetWriter, append_csv_rows, ingest_csv, load_dataset_df
+
+MEDIA_ROOT = Path(tempfile.mkdtemp())
+
+
+def _written_dataset(df, name="written", **fields):
+    """Writes a dataframe as a new Dataset, fields override the stored ones."""
+    with DatasetWriter(name) as writer:
+        writer.write(df)
+        stored = writer.close()
+    values = {
+        "name": name,
+        "file": stored["file"],
+        "columnar_file": stored["columnar_file"],
+        "content_hash": stored["content_hash"],
+        "columns": stored["columns"],
+        "dtypes": stored["dtypes"],
+        "n_rows": stored["n_rows"],
+        "n_columns": len(stored["columns"]),
+    }
+    values.update(fields)
+    return Dataset.objects.create(**values)
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, DATASETS_DIR=MEDIA_ROOT / "datasets")
+class DatasetFilesTestCase(TestCase):
+    """Tests writing dataset files to a temporary MEDIA_ROOT."""
+
+    def setUp(self):
+        os.makedirs(settings.DATASETS_DIR, exist_ok=True)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+
+class AppendCsvRowsTests(DatasetFilesTestCase):
+    """Appending rows to datasets written chunk by chunk (split, merge, manual)."""
+
+    def _csv(self, text):
+        path = os.path.join(settings.DATASETS_DIR, "new_rows.csv")
+        with open(path, "w") as f:
+            f.write(text)
+        return path
+
+    def test_text_column_keeps_its_type(self):
+        dataset = _written_dataset(pd.DataFrame({"a": [1, 2], "b": ["x", "y"]}))
+        self.assertEqual(dataset.columns, {"a": "int64", "b": "str"})
+
+        stored = append_csv_rows(dataset, self._csv("a,b\n3,y\n4,z\n"))
+
+        self.assertEqual(stored["n_rows"], 4)
+        self.assertEqual(stored["columns"], {"a": "int64", "b": "str"})
+        table = pq.read_table(
+            os.path.join(settings.MEDIA_ROOT, stored["columnar_file"])
+        )
+        text_type = table.schema.field("b").type
+        self.assertTrue(
+            pa.types.is_string(text_type) or pa.types.is_large_string(text_type)
+        )
+        self.assertEqual(table.column("b").to_pylist(), ["x", "y", "y", "z"])
+
+    def test_integer_column_widened_to_float(self):
+        dataset = _written_dataset(pd.DataFrame({"a": [1, 2], "b": ["x", "y"]}))
+
+        stored = append_csv_rows(dataset, self._csv("a,b\n3.5,y\n"))
+
+        self.assertEqual(stored["columns"], {"a": "float64", "b": "str"})
+        table = pq.read_table(
+            os.path.join(settings.MEDIA_ROOT, stored["columnar_file"])
+        )
+        self.assertEqual(str(table.schema.field("a").type), "double")
+        self.assertEqual(table.column("a").to_pylist(), [1.0, 2.0, 3.5])
+
+
+@override_settings(DATASET_CHUNK_ROWS=5, DATASET_SCHEMA_INFERENCE_CHUNKS=1)
+class IngestCsvTests(DatasetFilesTestCase):
+    """Ingesting CSV files whose later chunks widen the inferred schema."""
+
+    def test_columns_widened_in_different_chunks(self):
+        rows = [(i, i, i, "x") for i in range(30)]
+        rows[12] = (12, 12.5, 12, "x")  # float in the 3rd chunk
+        rows[23] = (23, 23, "text", "x")  # text in the 5th chunk
+        rows[27] = (27, 27.25, 27, "y")
+        path = os.path.join(settings.DATASETS_DIR, "widened.csv")
+        with open(path, "w") as f:
+            f.write("a,b,c,d\n")
+            f.writelines(",".join(map(str, row)) + "\n" for row in rows)
+
+        with mock.patch.object(
+            storage, "_write_parquet_from_csv", wraps=storage._write_parquet_from_csv
+        ) as write:
+            ingested = ingest_csv(path)
+
+        # A single retry, with every widened column
+        self.assertEqual(write.call_count, 2)
+        self.assertEqual(
+            ingested["columns"],
+            {"a": "int64", "b": "float64", "c": "object", "d": "object"},
+        )
+        self.assertEqual(ingested["n_rows"], 30)
+        table = pq.read_table(
+            os.path.join(settings.MEDIA_ROOT, ingested["columnar_path"])
+        )
+        self.assertEqual(table.column("b").to_pylist()[12], 12.5)
+        self.assertEqual(table.column("c").to_pylist()[22:24], ["22", "text"])
+
+
+class LoadDatasetDfTests(DatasetFilesTestCase):
+    """Loading datasets with their compact dtypes, from Parquet or CSV."""
+
+    def setUp(self):
+        super().setUp()
+        # Compact dtypes given explicitly, whatever the profiler would pick
+        self.dataset = _written_dataset(
+            pd.DataFrame({"a": [1, 2, 3], "b": ["x", "y", "x"], "c": [0.5] * 3}),
+            dtypes={
+                "a": {"dtype": "int8"},
+                "b": {"dtype": "category", "categories": ["x", "y"]},
+            },
+        )
+
+    def _assert_compact(self, df):
+        self.assertEqual(list(df.columns), ["a", "b", "c"])
+        self.assertEqual(str(df["a"].dtype), "int8")
+        self.assertEqual(str(df["b"].dtype), "category")
+        self.assertEqual(str(df["c"].dtype), "float64")
+        self.assertEqual(df["b"].tolist(), ["x", "y", "x"])
+
+    def test_parquet_copy(self):
+        self._assert_compact(load_dataset_df(self.dataset))
+        self.assertEqual(
+            list(load_dataset_df(self.dataset, columns=["b", "a"]).columns),
+            ["b", "a"],
+        )
+
+    def test_csv_fallback(self):
+        os.remove(self.dataset.columnar_file.path)
+        self._assert_compact(load_dataset_df(self.dataset))
+
+
+def _chunks(values, sizes):
+    """Splits values in consecutive chunks of the given sizes (cycled)."""
+    chunks, start, i = [], 0, 0
+    while start < len(values):
+        size = sizes[i % len(sizes)]
+        chunks.append(values[start : start + size])
+        start, i = start + size, i + 1
+    return chunks
+
+
+@override_settings(PROFILE_HISTOGRAM_BINS=16)
+class NumericStatisticsTests(SimpleTestCase):
+    """Moments merged chunk by chunk, against pandas on the whole column."""
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        values = rng.gamma(2.0, 3.0, size=500) + 1e3
+        values[rng.choice(500, size=40, replace=False)] = np.nan
+        self.series = pd.Series(values)
+
+    def assertClose(self, value, expected):
+        self.assertTrue(
+            math.isclose(value, expected, rel_tol=1e-9, abs_tol=1e-12),
+            f"{value} != {expected}",
+        )
+
+    def assert_moments(self, col_stats, series):
+        self.assertClose(col_stats["mean"], series.mean())
+        self.assertClose(col_stats["std"], series.std())
+        self.assertClose(col_stats["skew"], series.skew())
+        self.assertClose(col_stats["kurtosis"], series.kurt())
+        self.assertEqual(col_stats["min"], series.min())
+        self.assertEqual(col_stats["max"], series.max())
+
+    def test_moments_of_chunks_with_single_rows(self):
+        stats = _NumericStats(16)
+        for chunk in _chunks(self.series.to_numpy(), [1, 37, 1, 1, 120]):
+            stats.update(chunk)
+        col_stats = stats.result()
+
+        self.assert_moments(col_stats, self.series)
+        self.assertEqual(sum(col_stats["histogram"]["counts"]), self.series.count())
+
+    def test_partition_counts_missing_values(self):
+        partition = _PartitionStatistics(["x"], {"x"}, None, 0)
+        for chunk in _chunks(self.series.to_frame("x"), [1, 64, 3]):
+            partition.update(chunk)
+        statistics, sample = partition.result()
+
+        self.assert_moments(statistics["x"], self.series)
+        self.assertEqual(statistics["x"]["count"], 460)
+        self.assertEqual(statistics["x"]["missing"], 40)
+        self.assertEqual(len(sample), 500)
+
+    def test_single_value(self):
+        stats = _NumericStats(16)
+        stats.update(np.array([4.0]))
+        col_stats = stats.result()
+
+        self.assertEqual(col_stats["mean"], 4.0)
+        self.assertIsNone(col_stats["std"])
+        self.assertIsNone(col_stats["skew"])
+
+
+class RowSampleTests(SimpleTestCase):
+    """The hashed row sample, the same whatever the chunking and partition."""
+
+    def test_row_uniforms_are_deterministic(self):
+        rows = np.arange(1000)
+        uniforms = row_uniforms(rows, 42)
+
+        np.testing.assert_array_equal(uniforms, row_uniforms(rows, 42))
+        # Only depends on the row number, not on the rows hashed with it
+        np.testing.assert_array_equal(
+            uniforms[500:510], row_uniforms(rows[500:510], 42)
+        )
+        self.assertFalse(np.array_equal(uniforms, row_uniforms(rows, 43)))
+        self.assertTrue(((uniforms >= 0) & (uniforms < 1)).all())
+
+    def test_sample_ignores_chunking(self):
+        df = pd.DataFrame({"x": np.arange(1000, dtype=np.float64)})
+        samples = []
+        for sizes in ([1000], [7], [1, 250, 33]):
+            partition = _PartitionStatistics(["x"], {"x"}, 50, 42)
+            for chunk in _chunks(df, sizes):
+                partition.update(chunk)
+            samples.append(partition.result()[1])
+
+        self.assertEqual(len(samples[0]), 50)
+        for sample in samples[1:]:
+            pd.testing.assert_frame_equal(sample, samples[0])
+
+
+@override_settings(DATASET_CHUNK_ROWS=7)
+class DescribeTableTests(DatasetFilesTestCase):
+    """describe_table() from single-pass statistics, against DataFrame.describe()."""
+
+    def describe(self, df):
+        dataset = _written_dataset(df)
+        statistics = compute_column_statistics(dataset, sample_size=0, workers=1)[0]
+        return describe_table(statistics)
+
+    def test_mixed_columns(self):
+        df = pd.DataFrame(
+            {
+                "a": [3.5, np.nan, -1.0, 8.25, 2.0, np.nan, 4.0, 0.5, 9.0, 1.5] * 3,
+                "b": list(range(30)),
+                "c": ["x", "y", "x", "z", "x", "y"] * 5,
+            }
+        )
+
+        pd.testing.assert_frame_equal(
+            self.describe(df), df.describe(), check_dtype=False
+        )
+
+    def test_categorical_columns(self):
+        df = pd.DataFrame(
+            {"c": ["x", "y", "x", "z", "x", "y"] * 5, "d": ["p", "q", "q"] * 10}
+        )
+
+        expected = df.describe().astype(object)
+        pd.testing.assert_frame_equal(
+            self.describe(df).astype(object), expected, check_dtype=False
+        )
+
+
+class CorrelationAccumulatorTests(SimpleTestCase):
+    """Pairwise complete correlation over chunks, against DataFrame.corr()."""
+
+    def test_scattered_missing_values(self):
+        rng = np.random.default_rng(1)
+        base = rng.normal(size=400)
+        df = pd.DataFrame(
+            {
+                "a": base * 50 + 1e4,
+                "b": base + rng.normal(scale=0.5, size=400),
+                "c": rng.normal(size=400),
+                "d": -base + rng.normal(scale=2.0, size=400),
+            }
+        )
+        for col in df.columns:
+            df.loc[rng.choice(400, size=60, replace=False), col] = np.nan
+        # No value of c in the first chunks, they give it no shift
+        df.loc[: rng.integers(100), "c"] = np.nan
+
+        accumulator = CorrelationAccumulator(df.columns)
+        for chunk in _chunks(df, [1, 90, 13]):
+            accumulator.update(chunk)
+
+        pd.testing.assert_frame_equal(
+            accumulator.correlation(), df.corr(), check_exact=False, atol=1e-9
+        )
@@ -5,6 +5,10 @@ from django.urls import path
 from .views import (
     delete_dataset,
     download_dataset,
+    get_dataset_import_status,
+    get_dataset_plot_data,
+    get_dataset_profile_status,
+    get_dataset_rows,
     get_multiple_dataset_columns,
     manage_datasets,
     visualize_dataset,
@@ -27,6 +31,26 @@ urlpatterns = [
         visualize_dataset,
         name="visualize_dataset_view",
     ),
+    path(
+        "manage_datasets/profile_status<int:dataset_id>/",
+        get_dataset_profile_status,
+        name="dataset_profile_status_view",
+    ),
+    path(
+        "manage_datasets/plot_data<int:dataset_id>/",
+        get_dataset_plot_data,
+        name="dataset_plot_data_view",
+    ),
+    path(
+        "manage_datasets/rows<int:dataset_id>/",
+        get_dataset_rows,
+        name="dataset_rows_view",
+    ),
+    path(
+        "manage_datasets/import_status<int:import_id>/",
+        get_dataset_import_status,
+        name="dataset_import_status_view",
+    ),
     path(
         "manage_datasets/merge/",
         get_multiple_dataset_columns,
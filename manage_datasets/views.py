@@ -1,48 +1,37 @@
 """Datasets page"""
 
-import io
 import json
 import os
-import uuid
 
-import pandas as pd
 from django.conf import settings
 from django.contrib.auth.decorators import login_required
-from django.http import HttpResponse, JsonResponse
-from django.shortcuts import redirect, render
-from django.views.decorators.http import require_POST
-
-from .forms import MergeDatasetsForm, SplitDatasetForm, UploadCSVForm
-from .models import Dataset
-from .plots import (
-    create_correlation_heatmap,
-    create_countplot,
-    create_histogram,
-    create_missing_values_plot,
-    create_normalized_pdf_plot,
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404, redirect, render
+from django.views.decorators.http import require_GET, require_POST
+
+from cidra_ML.downloads import stream_file_response
+
+from .forms import AppendRowsForm, MergeDatasetsForm, SplitDatasetForm, UploadCSVForm
+from .imports import is_archive
+from .models import Dataset, DatasetImport
+from .operations import (
+    merge_dataset_chunks,
+    merged_arrow_schema,
+    split_dataset_chunks,
+)
+from .records import (
+    append_rows_from_upload,
+    create_dataset_from_upload,
+    create_dataset_import,
+    create_dataset_record,
+    request_dataset_profile,
+)
+from .storage import (
+    DatasetWriter,
+    dataset_arrow_schema,
+    delete_dataset_files,
+    read_dataset_rows,
 )
-
-
-def _create_dataset_instance(name, description, df, user):
-    """Helper function to save a dataframe and create a Dataset model instance."""
-    csv_filename = f"{name.replace(' ', '_')}_{uuid.uuid4().hex[:8]}.csv"
-    csv_path = os.path.join(settings.DATASETS_DIR, csv_filename)
-    df.to_csv(csv_path, index=False, sep=",", encoding="utf-8")
-
-    columns_info = {col: str(dtype) for col, dtype in df.dtypes.items()}
-
-    new_dataset = Dataset.objects.create(
-        name=name,
-        file=os.path.join("datasets", csv_filename),
-        separator=",",
-        encoding="utf-8",
-        columns=columns_info,
-        n_rows=df.shape[0],
-        n_columns=df.shape[1],
-        uploaded_by=user if user and user.is_authenticated else None,
-        description=description,
-    )
-    return new_dataset
 
 
 @login_required
@@ -60,7 +49,13 @@ def manage_datasets(request):
         .exclude(name="--manual-data--")
         .order_by("-date")
     )
+    dataset_imports = (
+        DatasetImport.objects.filter(uploaded_by=request.user)
+        .prefetch_related("files")
+        .order_by("-date")[:5]
+    )
     upload_form = UploadCSVForm()
+    append_form = AppendRowsForm(user=request.user)
     split_form = SplitDatasetForm(user=request.user)
     merge_form = MergeDatasetsForm(user=request.user)
 
@@ -80,9 +75,16 @@ def manage_datasets(request):
                 if separator == "\\t":
                     separator = "\t"
 
-                # Read uploaded CSV file
+                # Stream uploaded file to disk, archives are imported in background
                 try:
-                    dataset = pd.read_csv(file, sep=separator, encoding=encoding)
+                    if is_archive(file.name):
+                        create_dataset_import(
+                            name, description, file, separator, encoding, request.user
+                        )
+                    else:
+                        create_dataset_from_upload(
+                            name, description, file, separator, encoding, request.user
+                        )
                 except Exception as e:
                     upload_form.add_error("file", f"Error reading the file: {e}")
                     return render(
@@ -90,42 +92,70 @@ def manage_datasets(request):
                         "manage_datasets.html",
                         {
                             "upload_form": upload_form,
+                            "append_form": append_form,
                             "split_form": split_form,
                             "merge_form": merge_form,
                             "datasets": datasets,
+                            "dataset_imports": dataset_imports,
                         },
                     )
 
-                _create_dataset_instance(name, description, dataset, request.user)
                 return redirect("manage_datasets_view")
 
+        elif "append_rows" in request.POST:
+            # --- Handle Rows Append ---
+            append_form = AppendRowsForm(request.POST, request.FILES, user=request.user)
+            if append_form.is_valid():
+                try:
+                    append_rows_from_upload(
+                        append_form.cleaned_data["dataset"],
+                        append_form.cleaned_data["file"],
+                    )
+                    return redirect("manage_datasets_view")
+                except Exception as e:
+                    append_form.add_error("file", f"Error appending the rows: {e}")
+
         elif "split_dataset" in request.POST:
             # --- Handle Dataset Split ---
             split_form = SplitDatasetForm(request.POST, user=request.user)
             if split_form.is_valid():
                 original_dataset = split_form.cleaned_data["dataset"]
                 train_ratio = split_form.cleaned_data["train_split_ratio"] / 100.0
+                train_name = f"{original_dataset.name}_train"
+                test_name = f"{original_dataset.name}_test"
 
-                original_file_path = original_dataset.file.path
                 try:
-                    original_df = pd.read_csv(original_file_path)
-
-                    # Split the dataframe
-                    train_df = original_df.sample(frac=train_ratio, random_state=42)
-                    test_df = original_df.drop(train_df.index)
+                    # Stream the dataset, writing both splits chunk by chunk
+                    schema = dataset_arrow_schema(original_dataset)
+                    with DatasetWriter(
+                        train_name, schema, original_dataset.columns
+                    ) as train_writer, DatasetWriter(
+                        test_name, schema, original_dataset.columns
+                    ) as test_writer:
+                        for train_chunk, test_chunk in split_dataset_chunks(
+                            original_dataset,
+                            train_ratio,
+                            method=split_form.cleaned_data["method"],
+                            column=split_form.cleaned_data["column"] or None,
+                            seed=split_form.cleaned_data["seed"],
+                        ):
+                            train_writer.write(train_chunk)
+                            test_writer.write(test_chunk)
+                        train_stored = train_writer.close()
+                        test_stored = test_writer.close()
 
                     # Create train dataset
-                    _create_dataset_instance(
-                        name=f"{original_dataset.name}_train",
+                    create_dataset_record(
+                        name=train_name,
                         description=f"Training split from '{original_dataset.name}'",
-                        df=train_df,
+                        stored=train_stored,
                         user=request.user,
                     )
                     # Create test dataset
-                    _create_dataset_instance(
-                        name=f"{original_dataset.name}_test",
+                    create_dataset_record(
+                        name=test_name,
                         description=f"Test split from '{original_dataset.name}'",
-                        df=test_df,
+                        stored=test_stored,
                         user=request.user,
                     )
                     return redirect("manage_datasets_view")
@@ -145,7 +175,7 @@ def manage_datasets(request):
                     )
                 else:
                     try:
-                        dataframes_to_merge = []
+                        datasets_columns = []
                         for ds in selected_datasets:
                             # Get selected columns for this dataset from the POST data
                             selected_columns = request.POST.getlist(f"columns_{ds.id}")
@@ -153,22 +183,21 @@ def manage_datasets(request):
                                 raise ValueError(
                                     f"No columns selected for dataset '{ds.name}'."
                                 )
+                            datasets_columns.append((ds, selected_columns))
 
-                            df = pd.read_csv(ds.file.path)
-                            # Reset index to ensure alignment, drop old index
-                            df = df[selected_columns].reset_index(drop=True)
-                            dataframes_to_merge.append(df)
-
-                        # Merge dataframes vertically
-                        merged_df = pd.concat(
-                            dataframes_to_merge, axis=0, ignore_index=True
-                        )
+                        # Stream the selected columns of every dataset to the new files
+                        with DatasetWriter(
+                            new_name, merged_arrow_schema(datasets_columns)
+                        ) as writer:
+                            for chunk in merge_dataset_chunks(datasets_columns):
+                                writer.write(chunk)
+                            stored = writer.close()
 
                         # Create new dataset instance
-                        _create_dataset_instance(
+                        create_dataset_record(
                             name=new_name,
                             description=f"Merged from {', '.join([d.name for d in selected_datasets])}",
-                            df=merged_df,
+                            stored=stored,
                             user=request.user,
                         )
                         return redirect("manage_datasets_view")
@@ -181,9 +210,11 @@ def manage_datasets(request):
         "manage_datasets.html",
         {
             "upload_form": upload_form,
+            "append_form": append_form,
             "split_form": split_form,
             "merge_form": merge_form,
             "datasets": datasets,
+            "dataset_imports": dataset_imports,
         },
     )
 
@@ -195,9 +226,7 @@ def delete_dataset(request, dataset_id):
     """
     try:
         dataset = Dataset.objects.get(id=dataset_id, uploaded_by=request.user)
-        if dataset.file:
-            if os.path.exists(dataset.file.path):
-                os.remove(dataset.file.path)
+        delete_dataset_files(dataset)
         dataset.delete()
     except Dataset.DoesNotExist:
         pass  # To implement
@@ -209,20 +238,19 @@ def delete_dataset(request, dataset_id):
 def download_dataset(request, dataset_id):
     """
     Download a dataset by its ID.
+    The file is streamed, supports range requests and ?gzip=true.
     """
     try:
         dataset = Dataset.objects.get(id=dataset_id, uploaded_by=request.user)
 
         if dataset.file:
             if os.path.exists(dataset.file.path):
-                with open(dataset.file.path, "rb") as f:
-                    response = HttpResponse(
-                        f.read(), content_type="application/octet-stream"
-                    )
-                    response["Content-Disposition"] = (
-                        f'attachment; filename="{os.path.basename(dataset.file.path)}"'
-                    )
-                    return response
+                return stream_file_response(
+                    request,
+                    dataset.file.path,
+                    f"{dataset.name.replace(' ', '_')}.csv",
+                    "application/octet-stream",
+                )
     except Dataset.DoesNotExist:
         pass  # To implement
 
@@ -233,87 +261,167 @@ def download_dataset(request, dataset_id):
 def visualize_dataset(request, dataset_id):
     """
     Visualize a dataset by its ID.
-    Saves generated plots and stats in the database for future access.
-
-    Statistics:
-        - Descriptive statistics
-        - Info summary
-    Plots for numerical columns:
-        - PDF plots
-        - Correlation heatmap
-    Plots for categorical columns:
-        - Count plots
+    Only serves the cached profile, which is generated by a background task.
+    Passing ?refresh=true queues a new profile generation, adding &mode=exact
+    draws the plots from every row instead of a sample.
     """
     # Assure dataset exists
     try:
-        dataset_obj = Dataset.objects.get(pk=dataset_id, uploaded_by=request.user)
+        dataset_obj = Dataset.objects.with_profile().get(
+            pk=dataset_id, uploaded_by=request.user
+        )
     except Dataset.DoesNotExist:
         return redirect("manage_datasets_view")
 
     refresh = request.GET.get("refresh", "false").lower() == "true"
+    exact = request.GET.get("mode", "sampled").lower() == "exact"
+
+    # Datasets created before background profiling have never been queued
+    if refresh or dataset_obj.profile_status is None:
+        request_dataset_profile(dataset_obj, sample_size=0 if exact else None)
+
+    context = {
+        "dataset": dataset_obj,
+        "plots": dataset_obj.plots_context,
+        "stats": dataset_obj.stats_context,
+        "head": dataset_obj.head_context,
+    }
+    return render(request, "_visualize_dataset_partial.html", context)
 
-    # Check if context is cached
-    if (
-        not refresh
-        and dataset_obj.plots_context
-        and dataset_obj.stats_context
-        and dataset_obj.head_context
-    ):
-        context = {
-            "dataset": dataset_obj,
-            "plots": dataset_obj.plots_context,
-            "stats": dataset_obj.stats_context,
-            "head": dataset_obj.head_context,
+
+@login_required
+@require_GET
+def get_dataset_profile_status(request, dataset_id):
+    """
+    Returns the status of the dataset profile generation as JSON.
+    """
+    # Polled often, avoid loading the cached plots
+    dataset = get_object_or_404(
+        Dataset.objects.only("profile_status", "profile_error"),
+        pk=dataset_id,
+        uploaded_by=request.user,
+    )
+    return JsonResponse(
+        {"status": dataset.profile_status, "error": dataset.profile_error}
+    )
+
+
+@login_required
+@require_GET
+def get_dataset_import_status(request, import_id):
+    """
+    Returns the status of a bulk import as JSON, with the status of each file.
+    """
+    dataset_import = get_object_or_404(
+        DatasetImport, pk=import_id, uploaded_by=request.user
+    )
+    files = [
+        {
+            "member": import_file.member,
+            "status": import_file.status,
+            "error": import_file.error,
+            "dataset_id": import_file.dataset_id,
         }
-    else:  # generate, save, and then display
-        dataset_df = pd.read_csv(dataset_obj.file.path)
+        for import_file in dataset_import.files.order_by("id")
+    ]
+    return JsonResponse(
+        {
+            "status": dataset_import.status,
+            "error": dataset_import.error,
+            "files": files,
+        }
+    )
 
-        # Stats
-        stats = {}
-        stats["description"] = dataset_df.describe().to_html(
-            classes="table table-striped table-bordered"
-        )
-        buffer = io.StringIO()
-        dataset_df.info(buf=buffer)
-        stats["info"] = buffer.getvalue()
-        stats["missing_values_plot"] = create_missing_values_plot(dataset_df)
-        if not stats["missing_values_plot"]:
-            stats["missing_values_message"] = "None of the features have empty values."
-        else:
-            stats["missing_values_message"] = None
-
-        # Numerial columns plots
-        plots = {}
-        numerical_cols = dataset_df.select_dtypes(include=["number"]).columns.tolist()
-        if numerical_cols:
-            plots["pdf_plot"] = create_normalized_pdf_plot(dataset_df, numerical_cols)
-            plots["correlation_heatmap"] = create_correlation_heatmap(
-                dataset_df, numerical_cols
-            )
-            for col in numerical_cols:
-                plots[f"histo_{col}"] = create_histogram(dataset_df, col)
-
-        # Categorical columns plots
-        categorical_cols = dataset_df.select_dtypes(include=["object"]).columns.tolist()
-        for col in categorical_cols:
-            plots[f"count_{col}"] = create_countplot(dataset_df, col)
-
-        # Save context
-        dataset_obj.plots_context = plots
-        dataset_obj.stats_context = stats
-        dataset_obj.head_context = dataset_df.head().to_html(
-            classes="table table-striped table-bordered"
+
+@login_required
+@require_GET
+def get_dataset_rows(request, dataset_id):
+    """
+    Returns a window of rows of a dataset as JSON.
+    Query parameters: offset (first row, default 0) and limit (default 50,
+    at most DATASET_ROWS_PAGE_MAX).
+    """
+    dataset = get_object_or_404(Dataset, pk=dataset_id, uploaded_by=request.user)
+    try:
+        offset = int(request.GET.get("offset", 0))
+        limit = int(request.GET.get("limit", 50))
+    except ValueError:
+        return JsonResponse({"error": "offset and limit must be integers"}, status=400)
+    if offset < 0 or limit < 1:
+        return JsonResponse(
+            {"error": "offset must be >= 0 and limit must be >= 1"}, status=400
         )
-        dataset_obj.save()
+    limit = min(limit, settings.DATASET_ROWS_PAGE_MAX)
 
-        context = {
-            "dataset": dataset_obj,
-            "plots": plots,
-            "stats": stats,
-            "head": dataset_obj.head_context,
+    rows_df = read_dataset_rows(dataset, offset, limit)
+    return JsonResponse(
+        {
+            "offset": offset,
+            "limit": limit,
+            "total_rows": dataset.n_rows,
+            "columns": list(rows_df.columns),
+            "rows": json.loads(
+                rows_df.to_json(
+                    orient="values", date_format="iso", double_precision=15
+                )
+            ),
         }
+    )
 
-    return render(request, "_visualize_dataset_partial.html", context)
+
+@login_required
+@require_GET
+def get_dataset_plot_data(request, dataset_id):
+    """
+    Returns the data behind the distribution plots of a dataset as JSON, taken
+    from its cached column statistics: histogram bins and density grid of the
+    numeric columns, top category counts of the others.
+    Pass ?column=<name> to get a single column.
+    """
+    # Only the statistics are needed, avoid loading the rest of the profile
+    dataset = get_object_or_404(
+        Dataset.objects.with_profile().only("column_stats", "profile_status"),
+        pk=dataset_id,
+        uploaded_by=request.user,
+    )
+    if not dataset.column_stats:
+        return JsonResponse(
+            {
+                "error": "The dataset profile is not available yet.",
+                "status": dataset.profile_status,
+            },
+            status=404,
+        )
+
+    columns = dataset.column_stats["columns"]
+    column = request.GET.get("column")
+    if column is not None:
+        if column not in columns:
+            return JsonResponse({"error": f"Unknown column '{column}'."}, status=404)
+        columns = {column: columns[column]}
+
+    plot_data = {}
+    for name, stats in columns.items():
+        if stats["kind"] == "numeric":
+            plot_data[name] = {
+                "kind": "numeric",
+                "histogram": stats["histogram"],
+                "kde": stats.get("kde"),
+            }
+        else:
+            plot_data[name] = {
+                "kind": "categorical",
+                "distinct": stats["distinct"],
+                "distinct_exact": stats["distinct_exact"],
+                "categories": stats["top"],
+            }
+    return JsonResponse(
+        {
+            "n_rows": dataset.column_stats["n_rows"],
+            "sample": dataset.column_stats["sample"],
+            "columns": plot_data,
+        }
+    )
 
 
 @login_required
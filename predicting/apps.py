@@ -1,6 +1,16 @@
+import threading
+
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class PredictingConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "predicting"
+
+    def ready(self):
+        # Warm the predictor cache in the background, after startup
+        if settings.ONLINE_PREDICTION_PRELOAD:
+            from .online import preload_predictors
+
+            threading.Thread(target=preload_predictors, daemon=True).start()
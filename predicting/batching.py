@@ -0,0 +1,101 @@
+"""
+Micro-batching of concurrent online predictions.
+
+Concurrent requests for the same model are scored with a single predict:
+the first request opens a batch and waits up to ONLINE_BATCH_WINDOW_MS, or
+until the batch holds ONLINE_BATCH_MAX_ROWS rows, while the requests
+arriving meanwhile join it. It then predicts the rows of the whole batch and
+hands every request its slice of the predictions. No extra thread is used,
+the first request runs the batch.
+
+If the batch fails, its requests are predicted one by one, so a request with
+invalid values only fails itself. Requests that joined a batch wait for it
+at most ONLINE_BATCH_TIMEOUT seconds, and fail if the first request died
+without predicting it.
+"""
+
+import threading
+
+import pandas as pd
+from django.conf import settings
+
+_open_batches = {}  # key -> batch still accepting rows
+_lock = threading.Lock()
+
+
+class _Batch:
+    def __init__(self):
+        self.frames = []
+        self.n_rows = 0
+        self.full = threading.Event()
+        self.done = threading.Event()
+        self.results = None  # predictions list or exception, per frame
+
+    def run(self, predict):
+        try:
+            self.results = self._predict(predict)
+        finally:
+            # Also wakes the other requests if predict() raised a BaseException
+            self.done.set()
+
+    def _predict(self, predict):
+        try:
+            predictions = predict(pd.concat(self.frames, ignore_index=True))
+        except Exception:
+            return [_predict_one(predict, frame) for frame in self.frames]
+        results, offset = [], 0
+        for frame in self.frames:
+            results.append(predictions[offset : offset + len(frame)])
+            offset += len(frame)
+        return results
+
+
+def _predict_one(predict, frame):
+    try:
+        return predict(frame)
+    except Exception as e:
+        return e
+
+
+def predict_batched(key, frame, predict):
+    """
+    Returns predict(frame), run together with the frames submitted
+    concurrently under the same key (e.g. the model id).
+
+    Args:
+        key: Identifies the predictor, only frames of the same key are batched.
+        frame (pd.DataFrame): The rows to predict.
+        predict (callable): Takes a frame and returns the list of its predictions.
+    """
+    window = settings.ONLINE_BATCH_WINDOW_MS / 1000
+    max_rows = settings.ONLINE_BATCH_MAX_ROWS
+    if window <= 0 or max_rows <= 1:
+        return predict(frame)
+
+    with _lock:
+        batch = _open_batches.get(key)
+        leader = batch is None
+        if leader:
+            batch = _open_batches[key] = _Batch()
+        index = len(batch.frames)
+        batch.frames.append(frame)
+        batch.n_rows += len(frame)
+        if batch.n_rows >= max_rows:
+            del _open_batches[key]
+            batch.full.set()
+
+    if leader:
+        batch.full.wait(window)
+        with _lock:
+            if _open_batches.get(key) is batch:
+                del _open_batches[key]
+        batch.run(predict)
+    elif not batch.done.wait(settings.ONLINE_BATCH_TIMEOUT):
+        raise TimeoutError("The batch of this prediction took too long.")
+
+    if batch.results is None:
+        raise RuntimeError("The batch of this prediction was interrupted.")
+    result = batch.results[index]
+    if isinstance(result, Exception):
+        raise result
+    return result
@@ -0,0 +1,87 @@
+"""
+Synchronous online predictions.
+
+A few rows sent as JSON are scored in the web process, with the warm
+predictors of manage_MLmodels.predictors, without queuing a task or saving a
+PredictionResult and its file. The latencies of the last ONLINE_LATENCY_WINDOW
+requests of each model are kept to report their p50/p99.
+Concurrent requests for the same model are micro-batched (see batching.py).
+"""
+
+import logging
+import threading
+from collections import defaultdict, deque
+
+import numpy as np
+import pandas as pd
+from django.conf import settings
+
+from manage_MLmodels.models import MLModel
+from manage_MLmodels.predictors import get_predictor
+
+from .batching import predict_batched
+
+logger = logging.getLogger(__name__)
+
+_latencies = defaultdict(lambda: deque(maxlen=settings.ONLINE_LATENCY_WINDOW))
+_lock = threading.Lock()
+
+
+def rows_frame(ml_model, rows):
+    """
+    Builds the frame of the features of the rows (a list of objects mapping
+    feature names to values), in the order of the model features.
+    Raises ValueError on invalid rows.
+    """
+    if not isinstance(rows, list) or not rows:
+        raise ValueError("No rows provided.")
+    if len(rows) > settings.ONLINE_PREDICTION_MAX_ROWS:
+        raise ValueError(
+            f"At most {settings.ONLINE_PREDICTION_MAX_ROWS} rows can be predicted at once."
+        )
+    if not all(isinstance(row, dict) for row in rows):
+        raise ValueError("Each row must be an object of feature values.")
+
+    features = ml_model.features or []
+    missing = sorted({f for row in rows for f in features if f not in row})
+    if missing:
+        raise ValueError(f"Missing features: {', '.join(missing)}")
+    return pd.DataFrame([[row[f] for f in features] for row in rows], columns=features)
+
+
+def predict_rows(ml_model, rows):
+    """Returns the predictions of the model for the rows, as a list."""
+    data = rows_frame(ml_model, rows)
+    predictor = get_predictor(ml_model.file.path)
+    return predict_batched(
+        ml_model.id, data, lambda frame: predictor.predict(frame).tolist()
+    )
+
+
+def record_latency(model_id, seconds):
+    """Adds the latency of a request to the window of the model."""
+    with _lock:
+        _latencies[model_id].append(seconds)
+
+
+def latency_percentiles(model_id):
+    """Returns the number of requests and p50/p99 latencies (ms) of a model."""
+    with _lock:
+        latencies = np.array(_latencies.get(model_id, ()))
+    if not len(latencies):
+        return {"count": 0, "p50_ms": None, "p99_ms": None}
+    p50, p99 = np.percentile(latencies, [50, 99]) * 1000
+    return {"count": len(latencies), "p50_ms": round(p50, 3), "p99_ms": round(p99, 3)}
+
+
+def preload_predictors():
+    """
+    Loads the predictors of the latest trained models into the cache of this
+    process, as many as it holds, so their first requests are served warm.
+    """
+    models = MLModel.objects.filter(status="COMPLETED").exclude(file="")
+    for ml_model in models.order_by("-date")[: settings.PREDICTOR_CACHE_ENTRIES]:
+        try:
+            get_predictor(ml_model.file.path)
+        except Exception as e:
+            logger.warning(f"Could not preload the predictor of '{ml_model.name}': {e}")
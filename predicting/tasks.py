@@ -1,13 +1,14 @@
 import io
 import logging
-import os
 import traceback
 
 import pandas as pd
-from autogluon.tabular import TabularPredictor
 from celery import shared_task
 from django.core.files.base import ContentFile
 
+from manage_datasets.storage import load_dataset_df
+from manage_MLmodels.predictors import get_predictor
+
 from .models import PredictionResult
 
 logger = logging.getLogger(__name__)
@@ -25,20 +26,20 @@ def run_prediction_task(result_id, manual_data_rows=None):
         result.save()
 
         ml_model = result.model
-        predictor = TabularPredictor.load(ml_model.file.path)
+        predictor = get_predictor(ml_model.file.path)
 
         if manual_data_rows:
             input_df = pd.DataFrame(manual_data_rows)
             data_for_prediction = input_df.copy()
             prediction_filename = f"manual_prediction_{ml_model.id}_{result.id}.csv"
         else:
-            input_df = pd.read_csv(result.dataset.file.path)
+            input_df = load_dataset_df(result.dataset)
             data_for_prediction = input_df.copy()
             if ml_model.target in data_for_prediction.columns:
                 data_for_prediction = data_for_prediction.drop(
                     columns=[ml_model.target]
                 )
-            base_name, _ = os.path.splitext(os.path.basename(result.dataset.file.name))
+            base_name = result.dataset.name.replace(" ", "_")
             prediction_filename = f"{base_name}_predicted.csv"
 
         predictions = predictor.predict(data_for_prediction)
@@ -1,3 +1,135 @@
-from django.test import TestCase
+import json
+import threading
+from unittest import mock
 
-# Create your tests here.
+import pandas as pd
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from manage_MLmodels.models import MLModel
+
+from .batching import predict_batched
+
+
+class StubPredictor:
+    """Predicts 10 * a, fails on negative values, records its batch sizes."""
+
+    def __init__(self):
+        self.batch_sizes = []
+        self._lock = threading.Lock()
+
+    def predict(self, frame):
+        with self._lock:
+            self.batch_sizes.append(len(frame))
+        if (frame["a"] < 0).any():
+            raise ValueError("Negative value.")
+        return pd.Series(frame["a"] * 10)
+
+
+def _submit_concurrently(frames, predict, key="model"):
+    """Submits every frame from its own thread, returns the results in order."""
+    results = [None] * len(frames)
+
+    def submit(i):
+        try:
+            results[i] = predict_batched(key, frames[i], predict)
+        except Exception as e:
+            results[i] = e
+
+    threads = [threading.Thread(target=submit, args=(i,)) for i in range(len(frames))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+# A long window: the batch only closes once every frame joined it
+@override_settings(ONLINE_BATCH_WINDOW_MS=5000, ONLINE_BATCH_MAX_ROWS=12)
+class PredictBatchedTests(SimpleTestCase):
+    def setUp(self):
+        self.predictor = StubPredictor()
+        self.frames = [pd.DataFrame({"a": [i, i + 100]}) for i in range(6)]
+
+    def predict(self, frame):
+        return self.predictor.predict(frame).tolist()
+
+    def test_frames_are_predicted_together(self):
+        results = _submit_concurrently(self.frames, self.predict)
+
+        self.assertEqual(self.predictor.batch_sizes, [12])
+        for i, result in enumerate(results):
+            self.assertEqual(result, [i * 10, (i + 100) * 10])
+
+    def test_failing_batch_falls_back_to_each_frame(self):
+        self.frames[3] = pd.DataFrame({"a": [-1, 5]})
+
+        results = _submit_concurrently(self.frames, self.predict)
+
+        self.assertEqual(self.predictor.batch_sizes, [12] + [2] * 6)
+        self.assertIsInstance(results[3], ValueError)
+        for i in [0, 1, 2, 4, 5]:
+            self.assertEqual(results[i], [i * 10, (i + 100) * 10])
+
+    @override_settings(ONLINE_BATCH_WINDOW_MS=0)
+    def test_disabled(self):
+        results = _submit_concurrently(self.frames[:3], self.predict)
+
+        self.assertEqual(self.predictor.batch_sizes, [2, 2, 2])
+        self.assertEqual(results[1], [10, 1010])
+
+
+@override_settings(ONLINE_BATCH_WINDOW_MS=0, ONLINE_PREDICTION_MAX_ROWS=3)
+class PredictOnlineTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("user", password="password")
+        self.client.force_login(self.user)
+        self.ml_model = MLModel.objects.create(
+            name="model",
+            target="y",
+            features=["a"],
+            uploaded_by=self.user,
+            file="MLmodels/model",
+            status="COMPLETED",
+        )
+        self.url = reverse("predict_online_view", args=[self.ml_model.id])
+        patcher = mock.patch(
+            "predicting.online.get_predictor", return_value=StubPredictor()
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def post(self, body):
+        if not isinstance(body, str):
+            body = json.dumps(body)
+        return self.client.post(self.url, body, content_type="application/json")
+
+    def test_predictions(self):
+        response = self.post({"rows": [{"a": 1}, {"a": 2, "b": 0}]})
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data["predictions"], [10, 20])
+        self.assertEqual(data["latency"]["count"], 1)
+
+    def test_bad_input(self):
+        for body in [
+            "not json",
+            [{"a": 1}],
+            {},
+            {"rows": []},
+            {"rows": [1, 2]},
+            {"rows": [{"b": 1}]},
+            {"rows": [{"a": 1}] * 4},
+        ]:
+            with self.subTest(body=body):
+                response = self.post(body)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn("error", response.json())
+
+    def test_other_users_model(self):
+        other = User.objects.create_user("other", password="password")
+        self.client.force_login(other)
+
+        self.assertEqual(self.post({"rows": [{"a": 1}]}).status_code, 404)
@@ -4,7 +4,9 @@ from .views import (
     delete_prediction_result,
     download_prediction_file,
     get_model_features,
+    get_online_latency,
     get_prediction_result_row_partial,
+    predict_online,
     predicting,
     visualize_prediction,
 )
@@ -16,6 +18,16 @@ urlpatterns = [
         get_model_features,
         name="get_model_features",
     ),
+    path(
+        "predicting/online/<int:model_id>/",
+        predict_online,
+        name="predict_online_view",
+    ),
+    path(
+        "predicting/online/<int:model_id>/latency/",
+        get_online_latency,
+        name="online_latency_view",
+    ),
     path(
         "predicting/visualize/<int:result_id>/",
         visualize_prediction,
@@ -1,6 +1,8 @@
 import base64
 import io
+import json
 import os
+import time
 
 import matplotlib.pyplot as plt
 import pandas as pd
@@ -8,19 +10,26 @@ import seaborn as sns
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.db import transaction
-from django.http import Http404, HttpResponse, JsonResponse
+from django.http import Http404, JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse
-from django.views.decorators.http import require_GET
+from django.views.decorators.http import require_GET, require_POST
 
+from cidra_ML.downloads import stream_file_response
 from manage_datasets.models import Dataset
 from manage_MLmodels.models import MLModel
 
 from .forms import FeatureSelectionForm, ModelSelectionForm, PredictionForm
 from .models import PredictionResult
+from .online import latency_percentiles, predict_rows, record_latency
 from .tasks import run_prediction_task
 
 
+def _history_deferred_fields():
+    """Large fields of the result model and dataset, unused by rows."""
+    return [*MLModel.deferred_through("model"), *Dataset.deferred_through("dataset")]
+
+
 @login_required
 def predicting(request):
     if request.method == "POST":
@@ -112,6 +121,7 @@ def predicting(request):
     history = (
         PredictionResult.objects.filter(model__uploaded_by=request.user)
         .select_related("model", "dataset")
+        .defer(*_history_deferred_fields())
         .order_by("-prediction_date")
     )
 
@@ -201,6 +211,49 @@ def visualize_prediction(request, result_id):
     return render(request, "_visualize_prediction.html", context)
 
 
+@login_required
+@require_POST
+def predict_online(request, model_id):
+    """
+    Predicts a few rows synchronously and returns the predictions as JSON,
+    with the latency of the request and the p50/p99 latency of the model.
+    Expects a JSON body {"rows": [{feature: value, ...}, ...]}.
+    """
+    start = time.perf_counter()
+    ml_model = get_object_or_404(
+        MLModel, pk=model_id, uploaded_by=request.user, status="COMPLETED"
+    )
+    try:
+        data = json.loads(request.body)
+        rows = data.get("rows") if isinstance(data, dict) else None
+        predictions = predict_rows(ml_model, rows)
+    except (json.JSONDecodeError, ValueError) as e:
+        return JsonResponse({"error": str(e)}, status=400)
+    except Exception as e:
+        return JsonResponse({"error": f"An error occurred: {e}"}, status=500)
+
+    latency = time.perf_counter() - start
+    record_latency(ml_model.id, latency)
+    return JsonResponse(
+        {
+            "predictions": predictions,
+            "latency_ms": round(latency * 1000, 3),
+            "latency": latency_percentiles(ml_model.id),
+        }
+    )
+
+
+@login_required
+@require_GET
+def get_online_latency(request, model_id):
+    """
+    Returns the p50/p99 latency of the online predictions of a model, over
+    its last requests served by this process.
+    """
+    ml_model = get_object_or_404(MLModel, pk=model_id, uploaded_by=request.user)
+    return JsonResponse(latency_percentiles(ml_model.id))
+
+
 @login_required
 @require_GET
 def get_model_features(request, model_id):
@@ -219,18 +272,20 @@ def get_model_features(request, model_id):
 def download_prediction_file(request, result_id):
     """
     Downloads the CSV file containing the original data plus the predictions.
+    The file is streamed, supports range requests and ?gzip=true.
     """
     result = get_object_or_404(
         PredictionResult, pk=result_id, model__uploaded_by=request.user
     )
-    if not result.prediction_file:
+    if not result.prediction_file or not os.path.exists(result.prediction_file.path):
         raise Http404("Prediction file not found.")
 
-    response = HttpResponse(result.prediction_file, content_type="text/csv")
-    response["Content-Disposition"] = (
-        f"attachment; filename={os.path.basename(result.prediction_file.name)}"
+    return stream_file_response(
+        request,
+        result.prediction_file.path,
+        os.path.basename(result.prediction_file.name),
+        "text/csv",
     )
-    return response
 
 
 @login_required
@@ -256,6 +311,10 @@ def get_prediction_result_row_partial(request, result_id):
     Returns the HTML for a single prediction result table row to enable live updates.
     """
     result = get_object_or_404(
-        PredictionResult, pk=result_id, model__uploaded_by=request.user
+        PredictionResult.objects.select_related("model", "dataset").defer(
+            *_history_deferred_fields()
+        ),
+        pk=result_id,
+        model__uploaded_by=request.user,
     )
     return render(request, "_prediction_result_row_partial.html", {"result": result})
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-17 20:56
+
+from django.db import migrations
+
+from cidra_ML.migration_utils import extract_png_blobs
+
+
+def move_plots_to_artifacts(apps, schema_editor):
+    """Moves the base64 plots stored on test results to the artifact store."""
+    TestResult = apps.get_model('testing', 'TestResult')
+    for result in TestResult.objects.iterator(chunk_size=10):
+        result.plot = extract_png_blobs(result.plot)
+        result.evaluation_plots = extract_png_blobs(result.evaluation_plots)
+        result.save(update_fields=['plot', 'evaluation_plots'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('testing', '0005_testresult_status_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(move_plots_to_artifacts, migrations.RunPython.noop),
+    ]
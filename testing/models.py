@@ -19,6 +19,14 @@ class TestResult(models.Model):
         (STATUS_FAILED, "Failed"),
     ]
 
+    # Large result fields, deferred by the history listings
+    RESULT_BLOBS = [
+        "evaluation_metrics",
+        "predictions",
+        "leaderboard_data",
+        "evaluation_plots",
+    ]
+
     model = models.ForeignKey(
         MLModel, on_delete=models.CASCADE, related_name="test_results"
     )
@@ -27,6 +35,7 @@ class TestResult(models.Model):
     )
     evaluation_metrics = models.JSONField(null=True, blank=True)
     predictions = models.JSONField(null=True, blank=True)
+    # Artifact digest of the predicted vs. real plot (see cidra_ML.artifacts)
     plot = models.TextField(null=True, blank=True)
     status = models.CharField(
         max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING
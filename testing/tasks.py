@@ -1,15 +1,17 @@
 # celery -A cidra_ML worker -l info -P solo
-import base64
 import logging
 import sys
 import traceback
 from io import BytesIO
 
-import matplotlib.pyplot as plt
 import pandas as pd
 import seaborn as sns
-from autogluon.tabular import TabularPredictor
 from celery import shared_task
+from matplotlib.figure import Figure
+
+from cidra_ML.artifacts import save_png_artifact
+from manage_datasets.storage import load_dataset_df
+from manage_MLmodels.predictors import get_predictor
 
 from .models import TestResult
 
@@ -38,12 +40,12 @@ def evaluate_model_task(result_id):
             dataset = result.dataset
             logger.info("Model and dataset fetched successfully.")
 
-            logger.info(f"Reading dataset from: {dataset.file.path}")
-            test_data = pd.read_csv(dataset.file.path)
+            logger.info(f"Reading dataset: {dataset.name}")
+            test_data = load_dataset_df(dataset)
             logger.info("Dataset loaded successfully.")
 
-            logger.info(f"Loading predictor from: {ml_model.file.path}")
-            predictor = TabularPredictor.load(path=ml_model.file.path)
+            logger.info(f"Getting predictor from: {ml_model.file.path}")
+            predictor = get_predictor(ml_model.file.path)
             logger.info("Predictor loaded successfully.")
 
             logger.info("Starting model evaluation...")
@@ -63,7 +65,7 @@ def evaluate_model_task(result_id):
             result.evaluation_metrics = evaluation_results
             result.predictions = predictions.tolist()
             result.leaderboard_data = leaderboard_df.to_dict("split")
-            result.plot = evaluation_plot
+            result.plot = save_png_artifact(evaluation_plot)
             result.status = TestResult.STATUS_COMPLETED
             result.save()
             logger.info(f"Task for TestResult ID: {result_id} completed successfully.")
@@ -92,7 +94,7 @@ def create_predicted_vs_real_plot(y_true, y_pred):
         y_pred (pd.Series): The values predicted by the model.
 
     Returns:
-        str: A base64 encoded string of the plot image, or None if data is not numeric.
+        bytes: The plot as PNG bytes, or None if data is not numeric.
     """
     # Ensure data is numeric for plotting
     if not pd.api.types.is_numeric_dtype(y_true) or not pd.api.types.is_numeric_dtype(
@@ -100,8 +102,9 @@ def create_predicted_vs_real_plot(y_true, y_pred):
     ):
         return None
 
-    plt.figure(figsize=(8, 6))
-    ax = sns.scatterplot(x=y_true, y=y_pred)
+    fig = Figure(figsize=(8, 6))
+    ax = fig.subplots()
+    sns.scatterplot(x=y_true, y=y_pred, ax=ax)
     ax.set_xlabel("Real Values")
     ax.set_ylabel("Predicted Values")
 
@@ -114,10 +117,9 @@ def create_predicted_vs_real_plot(y_true, y_pred):
     ax.set_xlim(lims)
     ax.set_ylim(lims)
 
-    plt.grid(True)
-    plt.tight_layout()
+    ax.grid(True)
+    fig.tight_layout()
 
     buf = BytesIO()
-    plt.savefig(buf, format="png")
-    plt.close()
-    return base64.b64encode(buf.getvalue()).decode("utf-8")
+    fig.savefig(buf, format="png")
+    return buf.getvalue()
@@ -1,7 +1,6 @@
 # celery -A cidra_ML worker -l info -P solo
 import io
 
-import pandas as pd
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.db import transaction
@@ -10,6 +9,10 @@ from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse
 from django.views.decorators.http import require_GET
 
+from manage_datasets.models import Dataset
+from manage_datasets.storage import load_dataset_df
+from manage_MLmodels.models import MLModel
+
 from .forms import TestingForm
 from .models import TestResult
 from .tasks import evaluate_model_task
@@ -17,6 +20,15 @@ from .tasks import evaluate_model_task
 CELERY_WORKER_REDIRECT_STDOUTS = False
 
 
+def _history_deferred_fields():
+    """Large fields of the results and their model and dataset, unused by rows."""
+    return [
+        *TestResult.RESULT_BLOBS,
+        *MLModel.deferred_through("model"),
+        *Dataset.deferred_through("dataset"),
+    ]
+
+
 @login_required
 def testing(request):
     form = TestingForm(user=request.user)
@@ -54,8 +66,10 @@ def testing(request):
             selected_model_id = request.POST.get("model", "")
             messages.error(request, "Please correct the errors below.")
 
-    history = TestResult.objects.filter(model__uploaded_by=request.user).select_related(
-        "model", "dataset"
+    history = (
+        TestResult.objects.filter(model__uploaded_by=request.user)
+        .select_related("model", "dataset")
+        .defer(*_history_deferred_fields())
     )
 
     context = {
@@ -89,7 +103,9 @@ def get_test_result_details(request, result_id):
         {
             "metrics": result.evaluation_metrics,
             "leaderboard": leaderboard_payload,
-            "plot": result.plot,
+            "plot_url": (
+                reverse("artifact_view", args=[result.plot]) if result.plot else None
+            ),
             "model_name": result.model.name,
             "dataset_name": result.dataset.name,
         }
@@ -110,7 +126,7 @@ def download_test_with_predictions(request, result_id):
 
     try:
         # Read the original dataset
-        df = pd.read_csv(result.dataset.file.path)
+        df = load_dataset_df(result.dataset)
 
         # Add the predictions as a new column
         df[f"{result.model.target}_predicted"] = result.predictions
@@ -162,6 +178,10 @@ def get_test_result_row_partial(request, result_id):
     Returns the HTML for a single test result table row to enable live updates.
     """
     result = get_object_or_404(
-        TestResult, pk=result_id, model__uploaded_by=request.user
+        TestResult.objects.select_related("model", "dataset").defer(
+            *_history_deferred_fields()
+        ),
+        pk=result_id,
+        model__uploaded_by=request.user,
     )
     return render(request, "_test_result_row_partial.html", {"result": result})